@@ -3,11 +3,12 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.urls import reverse
+from healthquest_backend.testing import TemporaryMediaMixin
 from users.models import User, UserProfile
 from coach.models import Coach
 
 
-class CoachAPITests(TestCase):
+class CoachAPITests(TemporaryMediaMixin, TestCase):
     """Tests for Coach API endpoints."""
 
     def setUp(self):
@@ -0,0 +1,124 @@
+"""
+Query-free dirty-field tracking for models.
+
+DirtyFieldsMixin snapshots the field values an instance is loaded with, so
+`get_dirty_fields()` compares against memory instead of re-reading the row.
+A plain save() of a loaded instance writes only the changed columns (plus
+auto_now ones), or skips the UPDATE entirely when nothing changed, and
+leaves the names of the changed fields in `_changed_fields` for post_save
+receivers.
+"""
+
+import copy
+
+from django.db import models
+
+
+class ExcludedFieldChanged(ValueError):
+    """A plain save() would have dropped a change to an excluded field."""
+
+
+class DirtyFieldsMixin:
+    """
+    Mix into a model before models.Model. Fields named in
+    `dirty_fields_exclude` are only written when passed in update_fields,
+    so a stale instance cannot overwrite columns owned by other code;
+    changing one and calling plain save() raises ExcludedFieldChanged.
+    """
+
+    dirty_fields_exclude = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_fields()
+        return instance
+
+    @classmethod
+    def _tracked_fields(cls):
+        return [
+            field
+            for field in cls._meta.concrete_fields
+            if not field.primary_key and not field.generated
+        ]
+
+    @staticmethod
+    def _comparable(field, value):
+        if isinstance(field, models.FileField):
+            return getattr(value, "name", value) or None
+        if isinstance(field, models.JSONField):
+            # copied, so changes made in place are noticed
+            return copy.deepcopy(value)
+        return value
+
+    def _snapshot_fields(self, names=None):
+        """Remember the current values of the loaded fields (or of `names`)."""
+        # a new dict: copies of the instance must not share the snapshot
+        snapshot = dict(self.__dict__.get("_loaded_values", {}))
+        for field in self._tracked_fields():
+            if field.attname not in self.__dict__:
+                continue
+            if names is None or field.name in names or field.attname in names:
+                value = self.__dict__[field.attname]
+                snapshot[field.attname] = self._comparable(field, value)
+        self._loaded_values = snapshot
+
+    def mark_clean(self, fields=None):
+        """
+        Treat the current values of `fields` (default: all loaded fields) as
+        the stored ones, e.g. after copying values that were written with a
+        queryset update.
+        """
+        self._snapshot_fields(fields)
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._snapshot_fields(fields)
+
+    def get_dirty_fields(self):
+        """
+        Names of the fields changed since the instance was loaded or last
+        saved; every loaded field for an instance that was never saved.
+        """
+        snapshot = self.__dict__.get("_loaded_values")
+        loaded = self.__dict__
+        return [
+            field.name
+            for field in self._tracked_fields()
+            if field.attname in loaded
+            and (
+                snapshot is None
+                or field.attname not in snapshot
+                or snapshot[field.attname]
+                != self._comparable(field, loaded[field.attname])
+            )
+        ]
+
+    def save(self, *args, **kwargs):
+        dirty = self.get_dirty_fields()
+        update_fields = kwargs.get("update_fields")
+        tracked = (
+            "_loaded_values" in self.__dict__
+            and not self._state.adding
+            and self.pk is not None
+            and not kwargs.get("force_insert")
+        )
+        if update_fields is not None:
+            named = {self._meta.get_field(name).name for name in update_fields}
+            dirty = [name for name in dirty if name in named]
+        elif tracked:
+            excluded = [name for name in dirty if name in self.dirty_fields_exclude]
+            if excluded:
+                raise ExcludedFieldChanged(
+                    f"{type(self).__name__}.save() does not write "
+                    f"{', '.join(excluded)}; pass them in update_fields."
+                )
+            # an empty list makes Model.save skip the UPDATE (and signals)
+            kwargs["update_fields"] = dirty + [
+                field.name
+                for field in self._tracked_fields()
+                if dirty and getattr(field, "auto_now", False)
+            ]
+        self._changed_fields = dirty
+        super().save(*args, **kwargs)
+        self._snapshot_fields()
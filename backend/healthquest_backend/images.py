@@ -0,0 +1,181 @@
+"""
+Upload pipeline for user images (food posts, recipes, profile photos).
+
+Uploads are decoded straight from Django's upload file, which is streamed to
+disk in chunks once it exceeds FILE_UPLOAD_MAX_MEMORY_SIZE, so a photo is
+never read into memory as a whole. Every upload is re-encoded without its
+EXIF block into WebP and JPEG renditions at a few widths. The renditions are
+resized and encoded in a shared thread pool (Pillow releases the GIL while
+doing both) and their storage paths are kept on the model as a JSON map.
+Serializers with a writable `image` field run it through the same pipeline
+with ProcessedImageMixin.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils.text import slugify
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import serializers
+
+# rendition name -> maximum width in pixels, smallest first
+RENDITION_WIDTHS = {"thumb": 320, "medium": 960, "full": 2048}
+# format key -> (Pillow format, file extension, encoder options)
+RENDITION_FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+MAX_IMAGE_PIXELS = 40_000_000
+IMAGE_WORKERS = 4
+
+
+class InvalidImage(ValueError):
+    """The upload is not an image Pillow can decode."""
+
+
+@lru_cache(maxsize=None)
+def _pool():
+    return ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="image")
+
+
+def _open(upload):
+    """Decode `upload` upright and without metadata."""
+    largest = max(RENDITION_WIDTHS.values())
+    try:
+        image = Image.open(upload)
+        if image.width * image.height > MAX_IMAGE_PIXELS:
+            raise InvalidImage("Image is too large.")
+        # JPEGs decode at a reduced scale when far larger than the biggest
+        # rendition
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as exc:
+        raise InvalidImage("Upload is not a valid image.") from exc
+
+    if image.mode not in ("RGB", "RGBA"):
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    image.info = {}  # drop exif, xmp and comments
+    return image
+
+
+def _render(image, width):
+    """Resize `image` to `width` and encode it in every rendition format."""
+    if image.width > width:
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.Resampling.LANCZOS)
+
+    encoded = {}
+    for key, (pil_format, _, options) in RENDITION_FORMATS.items():
+        frame = image
+        if pil_format == "JPEG" and frame.mode != "RGB":
+            frame = frame.convert("RGB")
+        buffer = BytesIO()
+        frame.save(buffer, pil_format, **options)
+        encoded[key] = buffer.getvalue()
+    return image.size, encoded
+
+
+def process_upload(upload, folder, name=None):
+    """
+    Store the renditions of `upload` under `folder` and return
+    {rendition: {"width", "height", "webp": path, "jpeg": path}}.
+    Renditions that would not be smaller than the original share its entry.
+    Raises InvalidImage when the upload cannot be decoded.
+    """
+    image = _open(upload)
+    stem = slugify(os.path.splitext(os.path.basename(name or upload.name))[0])
+
+    names_by_width = {}
+    for rendition, max_width in RENDITION_WIDTHS.items():
+        names_by_width.setdefault(min(max_width, image.width), []).append(rendition)
+    futures = {width: _pool().submit(_render, image, width) for width in names_by_width}
+
+    renditions = {}
+    for width, names in names_by_width.items():
+        (w, h), encoded = futures[width].result()
+        entry = {"width": w, "height": h}
+        for key, data in encoded.items():
+            extension = RENDITION_FORMATS[key][1]
+            entry[key] = default_storage.save(
+                f"{folder}/{stem or 'image'}-{w}w.{extension}", ContentFile(data)
+            )
+        for rendition in names:
+            renditions[rendition] = entry
+    return renditions
+
+
+def original_path(renditions):
+    """Path stored in the model's image field: the full-size JPEG."""
+    return renditions["full"]["jpeg"]
+
+
+def srcset(renditions, current_path, request=None):
+    """
+    Return {"webp": "url 320w, url 960w, ...", "jpeg": ...} for `renditions`,
+    or None when they do not belong to the image at `current_path` (no image,
+    or one stored without going through process_upload).
+    """
+    if not renditions or not current_path:
+        return None
+    if renditions.get("full", {}).get("jpeg") != str(current_path):
+        return None
+
+    entries = sorted(
+        {entry["width"]: entry for entry in renditions.values()}.values(),
+        key=lambda entry: entry["width"],
+    )
+    result = {}
+    for key in RENDITION_FORMATS:
+        candidates = []
+        for entry in entries:
+            url = default_storage.url(entry[key])
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            candidates.append(f"{url} {entry['width']}w")
+        result[key] = ", ".join(candidates)
+    return result
+
+
+class ProcessedImageMixin:
+    """
+    Mix into a ModelSerializer whose model has `image` and `image_renditions`
+    fields: an `image` given to create() or update() is stored through
+    process_upload under `image_folder` instead of as the raw upload, and
+    clearing the image clears its renditions.
+    """
+
+    image_folder = None
+
+    def image_name(self, upload, validated_data):
+        """Name the renditions are stored under."""
+        return upload.name
+
+    def _process_image(self, validated_data):
+        if "image" not in validated_data:
+            return
+        upload = validated_data["image"]
+        if not upload:
+            validated_data["image_renditions"] = {}
+            return
+        try:
+            renditions = process_upload(
+                upload, self.image_folder, self.image_name(upload, validated_data)
+            )
+        except InvalidImage as exc:
+            raise serializers.ValidationError({"image": [str(exc)]}) from exc
+        validated_data["image"] = original_path(renditions)
+        validated_data["image_renditions"] = renditions
+
+    def create(self, validated_data):
+        self._process_image(validated_data)
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        self._process_image(validated_data)
+        return super().update(instance, validated_data)
@@ -0,0 +1,114 @@
+"""
+Keyset (cursor) pagination for the function-based API views.
+
+Pages are fetched with a ``WHERE (ordering columns) > (last row)`` condition
+instead of OFFSET, so the cost of a page does not grow with how deep into the
+listing the client is. Ordering columns must be non-null attributes of the
+returned rows (model fields or annotations) and end with a unique column.
+"""
+
+import base64
+import binascii
+import datetime
+import json
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ParseError
+from rest_framework.response import Response
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def _json_default(value):
+    # keep full microsecond precision, DjangoJSONEncoder truncates it
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def encode_cursor(values):
+    payload = json.dumps(list(values), default=_json_default)
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor, length):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError):
+        raise ParseError("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != length:
+        raise ParseError("Invalid cursor.")
+    return values
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset on ``ordering`` using opaque cursors.
+
+    Query params: ``cursor`` (from a previous ``next_cursor``) and ``page_size``.
+    """
+
+    def __init__(
+        self,
+        ordering,
+        default_page_size=DEFAULT_PAGE_SIZE,
+        max_page_size=MAX_PAGE_SIZE,
+    ):
+        self.ordering = list(ordering)
+        self.default_page_size = default_page_size
+        self.max_page_size = max_page_size
+
+    @staticmethod
+    def is_requested(request):
+        """Listings stay unpaginated unless the client asks for a page."""
+        params = request.query_params
+        return "cursor" in params or "page_size" in params
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get("page_size"))
+        except (TypeError, ValueError):
+            return self.default_page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def _after(self, values):
+        """Rows strictly after ``values`` in ``self.ordering``."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def paginate(self, queryset, request):
+        """Return ``(rows, next_cursor)``; ``next_cursor`` is None on the last page."""
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get("cursor")
+        if cursor:
+            values = decode_cursor(cursor, len(self.ordering))
+            try:
+                queryset = queryset.filter(self._after(values))
+            except (TypeError, ValueError, ValidationError):
+                raise ParseError("Invalid cursor.")
+
+        rows = list(queryset[: page_size + 1])
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            next_cursor = encode_cursor(
+                getattr(last, field.lstrip("-")) for field in self.ordering
+            )
+        return rows, next_cursor
+
+    def get_paginated_response(self, data, next_cursor):
+        return Response({"results": data, "next_cursor": next_cursor})
@@ -48,6 +48,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "django.contrib.sites",
     "login_page",
     "allauth",
@@ -62,6 +63,7 @@ INSTALLED_APPS = [
     "member",
     "recipe",
     "moderation",
+    "uploads",
 ]
 
 MIDDLEWARE = [
@@ -230,6 +232,12 @@ REST_FRAMEWORK = {
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# uploads are stored once per content, see uploads.storage
+STORAGES = {
+    "default": {"BACKEND": "uploads.storage.ContentAddressedStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
 EMAIL_BACKEND = env(
     "EMAIL_BACKEND", default="django.core.mail.backends.console.EmailBackend"
 )
@@ -0,0 +1,43 @@
+"""
+Helpers shared by the apps' tests: generated JPEG uploads and a temporary
+MEDIA_ROOT, so tests that store files never write into the real media
+directory.
+"""
+
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+
+
+def jpeg_bytes(size=(64, 48), color="red", exif=None):
+    """A solid `color` JPEG of `size`, with optional raw EXIF bytes."""
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, "JPEG", exif=exif or b"")
+    return buffer.getvalue()
+
+
+def image_upload(name, size=(64, 48), color="red", exif=None):
+    """jpeg_bytes() wrapped as an uploaded file called `name`."""
+    return SimpleUploadedFile(
+        name, jpeg_bytes(size, color, exif), content_type="image/jpeg"
+    )
+
+
+class TemporaryMediaMixin:
+    """
+    Mix into a TestCase to point MEDIA_ROOT (and so default_storage) at a
+    temporary directory for the whole class; it is removed afterwards.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        cls.addClassCleanup(media.disable)
+        super().setUpClass()
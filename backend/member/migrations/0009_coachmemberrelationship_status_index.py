@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("coach", "0003_alter_coach_public_id"),
+        ("member", "0008_rename_coach_foodpostcomment_author"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="coachmemberrelationship",
+            index=models.Index(
+                fields=["coach", "status", "-relationship_id"],
+                name="relationship_coach_status_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("member", "0009_coachmemberrelationship_status_index"),
+        ("users", "0019_userprofile_current_level"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="foodpost",
+            index=models.Index(
+                fields=["coach", "created_at"], name="foodpost_coach_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="foodpost",
+            index=models.Index(
+                fields=["user_profile", "created_at"],
+                name="foodpost_author_created_idx",
+            ),
+        ),
+    ]
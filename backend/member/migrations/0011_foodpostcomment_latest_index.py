@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("member", "0010_foodpost_feed_indexes"),
+        ("users", "0019_userprofile_current_level"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="foodpostcomment",
+            index=models.Index(
+                fields=["food_post", "-created_at"], name="foodcomment_post_latest_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("member", "0011_foodpostcomment_latest_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="foodpost",
+            name="image_renditions",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
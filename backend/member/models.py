@@ -51,6 +51,15 @@ class CoachMemberRelationship(models.Model):
     start_date = models.DateField(null=True, blank=True)
     end_date = models.DateField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # a coach's requests filtered by status, newest first
+            models.Index(
+                fields=["coach", "status", "-relationship_id"],
+                name="relationship_coach_status_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.coach} → {self.member} ({self.status})"
 
@@ -67,6 +76,8 @@ class FoodPost(models.Model):
     title = models.CharField(max_length=255, null=True, blank=True)
     content = models.TextField()
     image = models.ImageField(upload_to="food_posts/", null=True, blank=True)
+    # healthquest_backend.images.process_upload output for `image`
+    image_renditions = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -75,6 +86,16 @@ class FoodPost(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # coach and member feeds, newest first and by date range
+            models.Index(
+                fields=["coach", "created_at"], name="foodpost_coach_created_idx"
+            ),
+            models.Index(
+                fields=["user_profile", "created_at"],
+                name="foodpost_author_created_idx",
+            ),
+        ]
 
 
 class FoodPostComment(models.Model):
@@ -95,3 +116,9 @@ class FoodPostComment(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            # latest comment per post, and the uncommented-posts anti-join
+            models.Index(
+                fields=["food_post", "-created_at"], name="foodcomment_post_latest_idx"
+            ),
+        ]
@@ -1,7 +1,10 @@
 from rest_framework import serializers
 from member.models import CoachMemberRelationship, Member, FoodPost, FoodPostComment
-from users.models import FitnessGoal
 from coach.serializers import CoachSerializer
+from django.utils.text import Truncator
+from healthquest_backend.images import ProcessedImageMixin, srcset
+
+COMMENT_PREVIEW_LENGTH = 140
 
 
 class MemberSerializer(serializers.ModelSerializer):
@@ -74,17 +77,24 @@ class CoachMemberRelationshipSerializer(serializers.ModelSerializer):
         return None
 
     def get_goals(self, obj):
-        user_profile = obj.member.user
-        fitness_goals = FitnessGoal.objects.filter(user_profile=user_profile)
+        # .all() so a prefetch of member__user__fitness_goals is used
+        fitness_goals = obj.member.user.fitness_goals.all()
         return [goal.get_goal_type_display() for goal in fitness_goals]
 
 
-class FoodPostSerializer(serializers.ModelSerializer):
+class FoodPostSerializer(ProcessedImageMixin, serializers.ModelSerializer):
+    image_folder = "food_posts"
+
     author_name = serializers.SerializerMethodField()
     author_first_name = serializers.SerializerMethodField()
     member_id = serializers.SerializerMethodField()
     author_photo = serializers.SerializerMethodField()
+    author_photo_srcset = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
     coach_name = serializers.SerializerMethodField()
+    comment_count = serializers.SerializerMethodField()
+    last_comment_at = serializers.SerializerMethodField()
+    latest_comment = serializers.SerializerMethodField()
 
     class Meta:
         model = FoodPost
@@ -93,6 +103,7 @@ class FoodPostSerializer(serializers.ModelSerializer):
             "title",
             "content",
             "image",
+            "image_srcset",
             "created_at",
             "updated_at",
             "author_name",
@@ -100,6 +111,10 @@ class FoodPostSerializer(serializers.ModelSerializer):
             "member_id",
             "coach_name",
             "author_photo",
+            "author_photo_srcset",
+            "comment_count",
+            "last_comment_at",
+            "latest_comment",
         ]
         read_only_fields = ["id", "created_at", "updated_at"]
 
@@ -117,6 +132,17 @@ class FoodPostSerializer(serializers.ModelSerializer):
             return user_profile.photo.url
         return None
 
+    def get_author_photo_srcset(self, obj):
+        user_profile = obj.user_profile
+        return srcset(
+            user_profile.photo_renditions,
+            user_profile.photo.name,
+            self.context.get("request"),
+        )
+
+    def get_image_srcset(self, obj):
+        return srcset(obj.image_renditions, obj.image.name, self.context.get("request"))
+
     def get_coach_name(self, obj):
         return obj.coach.user.username if obj.coach else None
 
@@ -124,6 +150,36 @@ class FoodPostSerializer(serializers.ModelSerializer):
         profile = obj.user_profile
         return f"M-{profile.user.id:05d}"
 
+    # The comment fields read the feed annotations (member.views
+    # _with_feed_relations) and only query when serializing a single post.
+    def get_comment_count(self, obj):
+        if hasattr(obj, "comment_count"):
+            return obj.comment_count
+        return obj.comments.count()
+
+    def get_last_comment_at(self, obj):
+        if hasattr(obj, "last_comment_at"):
+            return obj.last_comment_at
+        latest = self._latest_comment(obj)
+        return latest.created_at if latest else None
+
+    def get_latest_comment(self, obj):
+        latest = self._latest_comment(obj)
+        if latest is None:
+            return None
+        return {
+            "id": latest.id,
+            "text": Truncator(latest.text).chars(COMMENT_PREVIEW_LENGTH),
+            "author_name": latest.author.user.username,
+            "author_role": latest.author.role,
+            "created_at": latest.created_at,
+        }
+
+    def _latest_comment(self, obj):
+        if hasattr(obj, "latest_comments"):
+            return obj.latest_comments[0] if obj.latest_comments else None
+        return obj.comments.order_by("-created_at", "-id").first()
+
     def create(self, validated_data):
         user = self.context["request"].user
         user_profile = user.userprofile
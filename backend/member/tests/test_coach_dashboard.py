@@ -0,0 +1,107 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from coach.models import Coach
+from member.models import Member, CoachMemberRelationship
+from workout.models import (
+    WorkoutAssignment,
+    WorkoutDay,
+    WorkoutDayCompletion,
+    WorkoutProgram,
+)
+
+
+class CoachDashboardTests(TestCase):
+    """Roster progress for a coach from a fixed number of queries"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.coach_user = User.objects.create_user(
+            username="coach", password="coachpass"
+        )
+        self.coach_profile = self.coach_user.userprofile
+        self.coach_profile.role = "coach"
+        self.coach_profile.save()
+        self.coach = Coach.objects.create(
+            user=self.coach_profile, public_id="C-001", status_approval="approved"
+        )
+        self.client.force_login(self.coach_user)
+        self.url = reverse("coach-dashboard")
+
+    def _add_member(self, n, completed_days=0):
+        user = User.objects.create_user(username=f"member{n}", password="pass")
+        profile = user.userprofile
+        profile.role = "member"
+        profile.save()
+        member = Member.objects.create(user=profile, member_id=f"M-{n:03d}")
+        CoachMemberRelationship.objects.create(
+            coach=self.coach, member=member, status="accepted"
+        )
+
+        program = WorkoutProgram.objects.create(
+            coach=self.coach_profile,
+            title=f"Plan {n}",
+            description="Dashboard program",
+            difficulty_level="easy",
+            is_public=False,
+        )
+        days = [
+            WorkoutDay.objects.create(program=program, day_number=d, duration=20)
+            for d in (1, 2, 3, 4)
+        ]
+        WorkoutAssignment.objects.create(member=member, program=program)
+        for day in days[:completed_days]:
+            WorkoutDayCompletion.objects.create(
+                user_profile=profile, workout_day=day, xp_earned=20
+            )
+        return member
+
+    def _get(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries), response.data
+
+    def test_reports_progress_per_member_and_program(self):
+        """Each member row carries its programs' stored progress and xp"""
+        self._add_member(1, completed_days=2)
+        self._add_member(2, completed_days=4)
+
+        _, data = self._get()
+
+        first, second = data["members"]
+        self.assertEqual(first["memberId"], "M-001")
+        self.assertEqual(first["progress"], 50.0)
+        self.assertEqual(first["programs"][0]["xp_earned"], 40)
+        self.assertEqual(first["programs"][0]["status"], "in_progress")
+        self.assertEqual(second["programs"][0]["status"], "completed")
+        self.assertIsNotNone(first["last_active"])
+        self.assertEqual(
+            data["summary"]["by_status"], {"in_progress": 1, "completed": 1}
+        )
+
+    def test_query_count_independent_of_roster_size(self):
+        """Two members and eight members cost the same number of queries"""
+        for n in range(2):
+            self._add_member(n, completed_days=1)
+        self._get()  # warm up session and profile lookups
+        small, _ = self._get()
+
+        for n in range(2, 8):
+            self._add_member(n, completed_days=n % 4)
+        large, data = self._get()
+
+        self.assertEqual(len(data["members"]), 8)
+        self.assertEqual(small, large)
+
+    def test_non_coach_is_forbidden(self):
+        """Members cannot open the coach dashboard"""
+        member = self._add_member(1)
+        self.client.force_login(member.user.user)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -5,6 +5,9 @@ from rest_framework.test import APIClient
 from rest_framework import status
 from coach.models import Coach
 from member.models import Member, CoachMemberRelationship
+from member.serializers import CoachMemberRelationshipSerializer
+from member.views import _with_request_relations
+from users.models import FitnessGoal
 from django.db import IntegrityError
 
 
@@ -183,3 +186,56 @@ class CoachMemberRelationshipAPITests(TestCase):
         url = reverse("accepted-members")
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def _add_requests(self, count, status_value="pending"):
+        for i in range(count):
+            user = User.objects.create_user(
+                username=f"applicant{status_value}{i}", password="pass"
+            )
+            profile = user.userprofile
+            profile.role = "member"
+            profile.save()
+            FitnessGoal.objects.create(user_profile=profile, goal_type="lose_weight")
+            member = Member.objects.create(
+                user=profile, member_id=f"M-{status_value[:3]}{i}"
+            )
+            CoachMemberRelationship.objects.create(
+                coach=self.coach, member=member, status=status_value
+            )
+
+    def test_request_list_uses_fixed_query_count(self):
+        """Relationships with coach and member, then goals: two queries"""
+        self._add_requests(6)
+        relationships = _with_request_relations(
+            CoachMemberRelationship.objects.filter(coach=self.coach)
+        )
+
+        with self.assertNumQueries(2):
+            data = CoachMemberRelationshipSerializer(relationships, many=True).data
+
+        self.assertEqual(len(data), 7)
+        applicant = [r for r in data if r["memberId"] == "M-pen0"][0]
+        self.assertEqual(applicant["goals"], ["Lose Weight"])
+        self.assertEqual(applicant["coach"]["name"], "coach")
+
+    def test_request_list_filters_and_paginates(self):
+        """?status= filters and page_size/cursor bound the response"""
+        self._add_requests(5)
+        self._add_requests(2, status_value="accepted")
+        self.client.force_authenticate(user=self.coach_user)
+        url = reverse("coach-member-requests")
+
+        response = self.client.get(url, {"status": "accepted"})
+        self.assertEqual(len(response.data), 2)
+
+        seen = []
+        params = {"status": "pending", "page_size": 4}
+        while True:
+            response = self.client.get(url, params)
+            self.assertLessEqual(len(response.data["results"]), 4)
+            seen.extend(r["relationship_id"] for r in response.data["results"])
+            if not response.data["next_cursor"]:
+                break
+            params["cursor"] = response.data["next_cursor"]
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(seen, sorted(seen, reverse=True))
@@ -1,10 +1,18 @@
+from datetime import timedelta
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.contrib.auth.models import User
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage
+from PIL import Image
 from coach.models import Coach
+from healthquest_backend.testing import TemporaryMediaMixin, image_upload
 from member.models import Member, FoodPost, FoodPostComment, CoachMemberRelationship
 
 
@@ -404,8 +412,73 @@ class FoodPostTests(TestCase):
         comment.refresh_from_db()
         self.assertEqual(comment.text, "Original comment")
 
+    def _feed(self, params=None):
+        self.client.force_login(self.coach_user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("food-posts"), params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries), response.data
+
+    def test_feed_includes_comment_count_and_latest_preview(self):
+        """Each feed row carries its comment count and newest comment"""
+        FoodPostComment.objects.create(
+            food_post=self.food_post, author=self.member_profile, text="First"
+        )
+        FoodPostComment.objects.create(
+            food_post=self.food_post, author=self.coach_profile, text="x" * 300
+        )
+
+        _, data = self._feed()
+
+        post = data[0]
+        self.assertEqual(post["comment_count"], 2)
+        self.assertIsNotNone(post["last_comment_at"])
+        preview = post["latest_comment"]
+        self.assertEqual(preview["author_name"], "coach")
+        self.assertEqual(preview["author_role"], "coach")
+        self.assertEqual(len(preview["text"]), 140)
+
+    def test_feed_uncommented_filter(self):
+        """?uncommented=true keeps only posts without any comment"""
+        quiet = FoodPost.objects.create(
+            user_profile=self.member_profile,
+            coach=self.coach_profile,
+            title="Quiet Post",
+            content="No comments yet",
+        )
+        FoodPostComment.objects.create(
+            food_post=self.food_post, author=self.coach_profile, text="Seen"
+        )
 
-class FoodPostImageTests(TestCase):
+        _, data = self._feed({"uncommented": "true"})
+
+        self.assertEqual([p["id"] for p in data], [quiet.id])
+        self.assertEqual(data[0]["comment_count"], 0)
+        self.assertIsNone(data[0]["latest_comment"])
+
+    def test_feed_query_count_independent_of_comments(self):
+        """More posts and comments do not add queries to the feed"""
+        self._feed()
+        small, _ = self._feed()
+
+        for i in range(5):
+            post = FoodPost.objects.create(
+                user_profile=self.member_profile,
+                coach=self.coach_profile,
+                title=f"Meal {i}",
+                content="Meal content",
+            )
+            for text in ("One", "Two"):
+                FoodPostComment.objects.create(
+                    food_post=post, author=self.coach_profile, text=text
+                )
+        large, data = self._feed()
+
+        self.assertEqual(len(data), 6)
+        self.assertEqual(small, large)
+
+
+class FoodPostImageTests(TemporaryMediaMixin, TestCase):
     """Tests for food post image upload functionality"""
 
     def setUp(self):
@@ -438,11 +511,80 @@ class FoodPostImageTests(TestCase):
     def test_image_upload(self):
         """Test image upload to food post"""
         url = reverse("upload-food-post-image", kwargs={"id": self.food_post.id})
+        image = image_upload("mock_image.jpg", color="green")
+        response = self.client.post(url, {"image": image}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_image_upload_renditions_without_exif(self):
+        """Uploads are stored upright, without EXIF, at every rendition width"""
+        exif = Image.Exif()
+        exif[0x0112] = 6  # orientation: rotate 90 degrees clockwise
+        exif[0x010F] = "PhoneMaker"
+        image = image_upload("meal.jpg", (1600, 1200), "green", exif.tobytes())
+        url = reverse("upload-food-post-image", kwargs={"id": self.food_post.id})
+
+        response = self.client.post(url, {"image": image}, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.food_post.refresh_from_db()
+        renditions = self.food_post.image_renditions
+        self.assertEqual(
+            {name: entry["width"] for name, entry in renditions.items()},
+            {"thumb": 320, "medium": 960, "full": 1200},
+        )
+        self.assertEqual(self.food_post.image.name, renditions["full"]["jpeg"])
+        with default_storage.open(renditions["full"]["jpeg"]) as stored:
+            full = Image.open(stored)
+            self.assertEqual(full.size, (1200, 1600))
+            self.assertEqual(len(full.getexif()), 0)
+        with default_storage.open(renditions["thumb"]["webp"]) as stored:
+            self.assertEqual(Image.open(stored).format, "WEBP")
+
+        srcset = response.data["image_srcset"]
+        self.assertTrue(srcset["webp"].endswith("1200w"))
+        self.assertEqual(srcset["jpeg"].count("w, "), 2)
+
+    def test_post_created_with_an_image_goes_through_the_pipeline(self):
+        """An image sent with the new post is stored without EXIF, in renditions"""
+        coach = Coach.objects.create(
+            user=self.coach_profile, status_approval="approved", public_id="C-00001"
+        )
+        member = Member.objects.create(
+            user=self.member_profile, member_id="M-00001", status="approved"
+        )
+        CoachMemberRelationship.objects.create(
+            coach=coach, member=member, status="accepted"
+        )
+        exif = Image.Exif()
+        exif[0x010F] = "PhoneMaker"
+        data = {
+            "title": "Lunch",
+            "content": "Rice and beans",
+            "image": image_upload("lunch.jpg", (800, 600), "green", exif.tobytes()),
+        }
+
+        response = self.client.post(reverse("food-posts"), data, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        post = FoodPost.objects.get(pk=response.data["id"])
+        self.assertEqual(post.image.name, post.image_renditions["full"]["jpeg"])
+        self.assertEqual(post.image_renditions["thumb"]["width"], 320)
+        with default_storage.open(post.image.name) as stored:
+            self.assertEqual(len(Image.open(stored).getexif()), 0)
+        self.assertIn("800w", response.data["image_srcset"]["webp"])
+
+    def test_image_upload_rejects_non_image(self):
+        """Files Pillow cannot decode are rejected and nothing is stored"""
         image = SimpleUploadedFile(
             "mock_image.jpg", b"fake image content", content_type="image/jpeg"
         )
+        url = reverse("upload-food-post-image", kwargs={"id": self.food_post.id})
+
         response = self.client.post(url, {"image": image}, format="multipart")
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.food_post.refresh_from_db()
+        self.assertFalse(self.food_post.image)
 
     def test_image_upload_by_non_owner(self):
         """Test non-owner cannot upload image"""
@@ -457,3 +599,60 @@ class FoodPostImageTests(TestCase):
         response = self.client.post(url, {})
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def _backdate(self, post, days):
+        FoodPost.objects.filter(pk=post.pk).update(
+            created_at=timezone.now() - timedelta(days=days)
+        )
+
+    def test_food_post_feed_cursor_pages(self):
+        """Coach walks the feed newest first in bounded pages"""
+        for i in range(6):
+            post = FoodPost.objects.create(
+                user_profile=self.member_profile,
+                coach=self.coach_profile,
+                title=f"Meal {i}",
+                content="Meal content",
+            )
+            self._backdate(post, days=i + 1)
+        self.client.force_login(self.coach_user)
+        url = reverse("food-posts")
+
+        titles = []
+        params = {"page_size": 3}
+        while True:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(ctx.captured_queries), 5)
+            titles.extend(p["title"] for p in response.data["results"])
+            if not response.data["next_cursor"]:
+                break
+            params["cursor"] = response.data["next_cursor"]
+
+        self.assertEqual(titles, ["Test Post"] + [f"Meal {i}" for i in range(6)])
+
+    def test_food_post_date_range_filter(self):
+        """date_from/date_to keep posts created within the inclusive range"""
+        for days in (1, 3, 5):
+            post = FoodPost.objects.create(
+                user_profile=self.member_profile,
+                coach=self.coach_profile,
+                title=f"{days} days ago",
+                content="Meal content",
+            )
+            self._backdate(post, days)
+        today = timezone.localdate()
+        self.client.force_login(self.coach_user)
+
+        response = self.client.get(
+            reverse("food-posts"),
+            {
+                "date_from": str(today - timedelta(days=4)),
+                "date_to": str(today - timedelta(days=1)),
+            },
+        )
+
+        self.assertEqual(
+            [p["title"] for p in response.data], ["1 days ago", "3 days ago"]
+        )
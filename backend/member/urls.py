@@ -3,6 +3,7 @@ from .views import (
     coach_member_requests,
     coach_member_profile,
     accepted_members,
+    coach_dashboard,
     coach_remove_member,
     apply_as_member,
     get_member_profile,
@@ -26,6 +27,7 @@ urlpatterns = [
         name="coach-member-requests-detail",
     ),
     path("accepted/", accepted_members, name="accepted-members"),
+    path("coach-dashboard/", coach_dashboard, name="coach-dashboard"),
     # coach can view member profile
     path("profile/<str:member_id>/", coach_member_profile, name="member-profile"),
     # member specific endpoints
@@ -1,10 +1,11 @@
-from datetime import datetime
+from datetime import datetime, time, timedelta
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from .models import Member, CoachMemberRelationship, FoodPost, FoodPostComment
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from .serializers import (
     CoachMemberRelationshipSerializer,
     MemberSerializer,
@@ -12,9 +13,23 @@ from .serializers import (
     FoodPostCommentSerializer,
 )
 from coach.models import Coach
-from workout.models import WorkoutProgram, WorkoutAssignment, WorkoutDayCompletion
+from workout.models import (
+    UserDailyActivity,
+    WorkoutProgram,
+    WorkoutAssignment,
+    WorkoutDayCompletion,
+)
 from workout.serializers import WorkoutAssignmentSerializer
 from django.db import models
+from django.db.models import Prefetch
+from healthquest_backend.images import (
+    InvalidImage,
+    original_path,
+    process_upload,
+    srcset,
+)
+from healthquest_backend.pagination import KeysetPaginator
+from users.models import FitnessGoal
 
 
 @api_view(["GET"])
@@ -43,30 +58,11 @@ def coach_member_profile(request, member_id):
     profile = member.user
     user = profile.user
 
-    # Calculate progress if member has assignments
-    total_days = 0
-    completed_days = 0
-    progress = 0
-    assignments = WorkoutAssignment.objects.filter(member=member).select_related(
-        "program"
+    # Progress over all assignments, from their stored day counts
+    totals = WorkoutAssignment.objects.filter(member=member).aggregate(
+        completed=models.Sum("completed_days"), total=models.Sum("total_days")
     )
-    if assignments.exists():
-        for assignment in assignments:
-            program_days = (
-                assignment.program.days.values("day_number").distinct().count()
-            )
-            total_days += program_days
-            program_completed = (
-                WorkoutDayCompletion.objects.filter(
-                    user_profile=profile, workout_day__program=assignment.program
-                )
-                .values("workout_day__day_number")
-                .distinct()
-                .count()
-            )
-            completed_days += program_completed
-        if total_days > 0:
-            progress = round((completed_days / total_days) * 100, 1)
+    progress = _progress_percent(totals["completed"] or 0, totals["total"] or 0)
 
     data = {
         "user": {
@@ -92,6 +88,21 @@ def coach_member_profile(request, member_id):
     return Response(data, status=status.HTTP_200_OK)
 
 
+# newest requests first
+REQUEST_LIST_ORDERING = ("-relationship_id",)
+
+
+def _with_request_relations(relationships):
+    """Load what CoachMemberRelationshipSerializer reads, in two queries."""
+    return relationships.select_related(
+        "coach__user__user", "member__user__user"
+    ).prefetch_related(
+        Prefetch(
+            "member__user__fitness_goals", queryset=FitnessGoal.objects.order_by("id")
+        )
+    )
+
+
 @api_view(["GET", "PATCH"])
 @permission_classes([IsAuthenticated])
 def coach_member_requests(request, pk=None):
@@ -137,7 +148,20 @@ def coach_member_requests(request, pk=None):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     else:
-        relationships = CoachMemberRelationship.objects.filter(coach=coach_profile)
+        relationships = _with_request_relations(
+            CoachMemberRelationship.objects.filter(coach=coach_profile)
+        )
+        statuses = [v for v in request.query_params.get("status", "").split(",") if v]
+        if statuses:
+            relationships = relationships.filter(status__in=statuses)
+
+        if KeysetPaginator.is_requested(request):
+            paginator = KeysetPaginator(REQUEST_LIST_ORDERING)
+            page, next_cursor = paginator.paginate(relationships, request)
+            serializer = CoachMemberRelationshipSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data, next_cursor)
+
+        relationships = relationships.order_by(*REQUEST_LIST_ORDERING)
         serializer = CoachMemberRelationshipSerializer(relationships, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -183,6 +207,120 @@ def accepted_members(request):
     return Response(members_data, status=status.HTTP_200_OK)
 
 
+def _progress_percent(completed, total):
+    return round((completed / total) * 100, 1) if total > 0 else 0
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def coach_dashboard(request):
+    """
+    Progress of every accepted member on every program the coach assigned
+    them, from a fixed number of grouped queries however large the roster.
+    """
+    user_profile = getattr(request.user, "userprofile", None)
+    coach_profile = getattr(user_profile, "coach_profile", None)
+
+    if not coach_profile:
+        return Response(
+            {"error": "You are not a coach"}, status=status.HTTP_403_FORBIDDEN
+        )
+
+    relationships = list(
+        CoachMemberRelationship.objects.filter(
+            coach=coach_profile, status__in=["accepted", "approved"]
+        )
+        .select_related("member__user__user")
+        .order_by("member__member_id")
+    )
+    members = [r.member for r in relationships]
+    profile_ids = {m.id: m.user_id for m in members}
+
+    assignments = WorkoutAssignment.objects.filter(
+        member__in=members, program__coach=user_profile
+    ).values(
+        "id",
+        "member_id",
+        "program_id",
+        "program__title",
+        "status",
+        "due_date",
+        "completed_days",
+        "total_days",
+    )
+    xp_by_program = {
+        (row["user_profile_id"], row["workout_day__program_id"]): row
+        for row in WorkoutDayCompletion.objects.filter(
+            user_profile_id__in=profile_ids.values(),
+            workout_day__program__coach=user_profile,
+        )
+        .values("user_profile_id", "workout_day__program_id")
+        .annotate(xp=models.Sum("xp_earned"), workouts=models.Count("id"))
+        .order_by()
+    }
+    last_active = dict(
+        UserDailyActivity.objects.filter(user_profile_id__in=profile_ids.values())
+        .values("user_profile_id")
+        .annotate(last=models.Max("date"))
+        .values_list("user_profile_id", "last")
+        .order_by()
+    )
+
+    programs_by_member = {}
+    by_status = {}
+    for a in assignments:
+        by_status[a["status"]] = by_status.get(a["status"], 0) + 1
+        completions = xp_by_program.get(
+            (profile_ids[a["member_id"]], a["program_id"]), {}
+        )
+        programs_by_member.setdefault(a["member_id"], []).append(
+            {
+                "assignment_id": a["id"],
+                "program_id": a["program_id"],
+                "program_title": a["program__title"],
+                "status": a["status"],
+                "due_date": a["due_date"],
+                "completed_days": a["completed_days"],
+                "total_days": a["total_days"],
+                "progress": _progress_percent(a["completed_days"], a["total_days"]),
+                "completed_workouts": completions.get("workouts", 0),
+                "xp_earned": completions.get("xp", 0),
+            }
+        )
+
+    members_data = []
+    for member in members:
+        profile = member.user
+        programs = programs_by_member.get(member.id, [])
+        completed = sum(p["completed_days"] for p in programs)
+        total = sum(p["total_days"] for p in programs)
+        members_data.append(
+            {
+                "memberId": member.member_id,
+                "name": profile.user.get_full_name() or profile.user.username,
+                "level": profile.level,
+                "xp": profile.xp,
+                "last_active": last_active.get(profile.id),
+                "completed_days": completed,
+                "total_days": total,
+                "progress": _progress_percent(completed, total),
+                "programs": programs,
+            }
+        )
+
+    return Response(
+        {
+            "members": members_data,
+            "summary": {
+                "members": len(members_data),
+                "assignments": sum(by_status.values()),
+                "by_status": by_status,
+            },
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
 @api_view(["DELETE"])
 @permission_classes([IsAuthenticated])
 def coach_remove_member(request, member_id):
@@ -622,10 +760,11 @@ def coach_member_workout_progress(request, program_id, member_id):
             .order_by("workout_day__day_number")
         )
 
-        completed_workouts = completed_qs.count()
-        xp_earned = (
-            completed_qs.aggregate(models.Sum("xp_earned"))["xp_earned__sum"] or 0
+        totals = completed_qs.aggregate(
+            workouts=models.Count("id"), xp=models.Sum("xp_earned")
         )
+        completed_workouts = totals["workouts"]
+        xp_earned = totals["xp"] or 0
 
         return Response(
             {
@@ -659,10 +798,69 @@ def coach_member_workout_progress(request, program_id, member_id):
 # ==================== FOOD POSTS ====================
 
 
+FOOD_POST_FEED_ORDERING = ("-created_at", "id")
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _filter_food_post_dates(posts, params):
+    """
+    Restrict posts to ?date= (one day) or ?date_from=/?date_to= (inclusive).
+    Days are turned into created_at bounds so the created_at indexes apply.
+    Invalid dates are ignored.
+    """
+    date_from = _parse_date(params.get("date_from") or params.get("date"))
+    date_to = _parse_date(params.get("date_to") or params.get("date"))
+    if date_from:
+        start = timezone.make_aware(datetime.combine(date_from, time.min))
+        posts = posts.filter(created_at__gte=start)
+    if date_to:
+        end = timezone.make_aware(
+            datetime.combine(date_to + timedelta(days=1), time.min)
+        )
+        posts = posts.filter(created_at__lt=end)
+    return posts
+
+
+def _uncommented(posts):
+    """Posts with no comments, as an anti-join on the comment index."""
+    return posts.filter(
+        ~models.Exists(FoodPostComment.objects.filter(food_post=models.OuterRef("pk")))
+    )
+
+
+def _with_feed_relations(posts):
+    """
+    Add comment_count, last_comment_at and a latest_comments preview list
+    (at most one comment) to each post, and load the author and coach.
+    """
+    latest = FoodPostComment.objects.select_related("author__user").order_by(
+        "-created_at", "-id"
+    )
+    return (
+        posts.select_related("user_profile__user", "coach__user")
+        .annotate(
+            comment_count=models.Count("comments"),
+            last_comment_at=models.Max("comments__created_at"),
+        )
+        .prefetch_related(
+            Prefetch("comments", queryset=latest[:1], to_attr="latest_comments")
+        )
+    )
+
+
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
 def food_posts(request):
-    """List or create food posts"""
+    """
+    List or create food posts.
+    GET is newest first; pass page_size (and then cursor) for cursor pages.
+    """
     profile = request.user.userprofile
 
     if request.method == "GET":
@@ -670,24 +868,29 @@ def food_posts(request):
             posts = FoodPost.objects.filter(user_profile=profile)
         elif profile.role == "coach":
             member_id = request.query_params.get("member_id")
-            date_str = request.query_params.get("date")
 
             posts = FoodPost.objects.filter(coach=profile)
 
             if member_id:
                 posts = posts.filter(user_profile__member_profile__member_id=member_id)
-
-            if date_str:
-                try:
-                    target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                    posts = posts.filter(created_at__date=target_date)
-                except ValueError:
-                    # If date is invalid, ignore.
-                    pass
         else:
             posts = FoodPost.objects.none()
 
-        serializer = FoodPostSerializer(posts, many=True)
+        posts = _with_feed_relations(
+            _filter_food_post_dates(posts, request.query_params)
+        )
+        if request.query_params.get("uncommented") == "true":
+            posts = _uncommented(posts)
+
+        if KeysetPaginator.is_requested(request):
+            paginator = KeysetPaginator(FOOD_POST_FEED_ORDERING)
+            page, next_cursor = paginator.paginate(posts, request)
+            serializer = FoodPostSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data, next_cursor)
+
+        serializer = FoodPostSerializer(
+            posts.order_by(*FOOD_POST_FEED_ORDERING), many=True
+        )
         return Response(serializer.data)
 
     elif request.method == "POST":
@@ -736,10 +939,20 @@ def upload_food_post_image(request, id):
             {"error": "No image provided"}, status=status.HTTP_400_BAD_REQUEST
         )
 
-    post.image = request.FILES["image"]
-    post.save()
+    try:
+        renditions = process_upload(request.FILES["image"], "food_posts")
+    except InvalidImage as exc:
+        return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    post.image = original_path(renditions)
+    post.image_renditions = renditions
+    post.save(update_fields=["image", "image_renditions", "updated_at"])
     return Response(
-        {"message": "Image uploaded", "image_url": post.image.url},
+        {
+            "message": "Image uploaded",
+            "image_url": post.image.url,
+            "image_srcset": srcset(renditions, post.image.name, request),
+        },
         status=status.HTTP_200_OK,
     )
 
@@ -848,8 +1061,8 @@ def uncommented_food_posts(request):
 
     # Get all food posts where this coach is assigned and has no comments
     uncommented_posts = (
-        FoodPost.objects.filter(coach=profile, comments__isnull=True)
-        .select_related("user_profile__user")
+        _uncommented(FoodPost.objects.filter(coach=profile))
+        .select_related("user_profile__user", "user_profile__member_profile")
         .order_by("-created_at")
     )
 
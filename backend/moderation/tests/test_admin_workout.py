@@ -1,6 +1,11 @@
 from django.urls import reverse
 from rest_framework import status
-from workout.models import WorkoutProgram
+from workout.models import (
+    UserDailyActivity,
+    WorkoutDay,
+    WorkoutDayCompletion,
+    WorkoutProgram,
+)
 from .test_admin import AdminTestBase
 
 
@@ -29,6 +34,24 @@ class AdminWorkoutTests(AdminTestBase):
         with self.assertRaises(WorkoutProgram.DoesNotExist):
             WorkoutProgram.objects.get(pk=self.workout_program.pk)
 
+    def test_deleting_a_program_removes_its_completions_from_rollups(self):
+        """The member's daily activity no longer counts the deleted workouts"""
+        day = WorkoutDay.objects.create(
+            program=self.workout_program, day_number=1, duration=30
+        )
+        WorkoutDayCompletion.objects.create(
+            user_profile=self.member_profile, workout_day=day, xp_earned=30
+        )
+        rollup = UserDailyActivity.objects.filter(user_profile=self.member_profile)
+        self.assertTrue(rollup.exists())
+
+        self.client.force_authenticate(user=self.admin_user)
+        url = reverse("delete_workout", kwargs={"id": self.workout_program.pk})
+        response = self.client.delete(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(rollup.exists())
+
     def test_non_admin_cannot_delete_workout_program(self):
         """Test that non-admin users cannot delete a workout program."""
         self.client.force_authenticate(user=self.member_user)
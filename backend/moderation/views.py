@@ -238,8 +238,13 @@ def delete_user(request, user_id):
         action="delete_user",
     )
 
+    from workout.models import WorkoutDay
+    from workout.rollups import removing_completions
+
     username = user.username
-    user.delete()
+    # the user's programs cascade away with the completions of other members
+    with removing_completions(WorkoutDay.objects.filter(program__coach__user=user)):
+        user.delete()
 
     return Response(
         {"message": (f"User '{username}' deleted, email sent and action logged.")},
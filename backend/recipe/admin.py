@@ -1,5 +1,11 @@
 from django.contrib import admin
-from .models import Recipe, RecipeRating
+from .models import PDF_QUEUE_FIELDS, Recipe, RecipeRating
+
+
+@admin.register(Recipe)
+class RecipeAdmin(admin.ModelAdmin):
+    # written by the PDF rendering queue, see recipe.pdf_queue
+    readonly_fields = PDF_QUEUE_FIELDS
+
 
-admin.site.register(Recipe)
 admin.site.register(RecipeRating)
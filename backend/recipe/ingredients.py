@@ -0,0 +1,249 @@
+"""
+Structured ingredient index.
+
+Recipe.ingredients is free text. Every line (and every comma-separated item
+on it) is parsed into a quantity, a unit and a normalised name: lower case,
+no preparation words ("chopped", "fresh"), singular. The parsed items are
+stored as RecipeIngredient rows, so "recipes containing chicken but no
+peanuts" is two indexed semi-joins instead of a scan of the text. A search
+term matches an ingredient with the same name or a name starting with it
+("chicken" matches "chicken breast").
+"""
+
+import re
+from decimal import Decimal
+from fractions import Fraction
+from typing import NamedTuple
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from .models import Recipe, RecipeIngredient
+
+INDEX_CHUNK_SIZE = 500
+
+UNITS = {
+    "cup": "cup",
+    "cups": "cup",
+    "c": "cup",
+    "tablespoon": "tbsp",
+    "tablespoons": "tbsp",
+    "tbsp": "tbsp",
+    "tbs": "tbsp",
+    "teaspoon": "tsp",
+    "teaspoons": "tsp",
+    "tsp": "tsp",
+    "g": "g",
+    "gram": "g",
+    "grams": "g",
+    "kg": "kg",
+    "ml": "ml",
+    "l": "l",
+    "liter": "l",
+    "litre": "l",
+    "oz": "oz",
+    "ounce": "oz",
+    "ounces": "oz",
+    "lb": "lb",
+    "lbs": "lb",
+    "pound": "lb",
+    "pounds": "lb",
+    "scoop": "scoop",
+    "scoops": "scoop",
+    "slice": "slice",
+    "slices": "slice",
+    "clove": "clove",
+    "cloves": "clove",
+    "can": "can",
+    "cans": "can",
+    "piece": "piece",
+    "pieces": "piece",
+    "pinch": "pinch",
+    "handful": "handful",
+}
+
+# words describing preparation or size rather than the ingredient itself
+DESCRIPTORS = {
+    "boneless",
+    "chopped",
+    "cooked",
+    "crushed",
+    "diced",
+    "dried",
+    "fresh",
+    "frozen",
+    "grated",
+    "large",
+    "medium",
+    "minced",
+    "optional",
+    "peeled",
+    "raw",
+    "ripe",
+    "shredded",
+    "skinless",
+    "sliced",
+    "small",
+    "taste",
+    "to",
+    "of",
+}
+
+UNICODE_FRACTIONS = {"½": "1/2", "¼": "1/4", "¾": "3/4", "⅓": "1/3", "⅔": "2/3"}
+QUANTITY = re.compile(r"^(\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?)(?:\s*-\s*[\d./]+)?\s*")
+LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)](?=\s))\s*")
+NAME_MAX_LENGTH = RecipeIngredient._meta.get_field("name").max_length
+_QUANTITY_FIELD = RecipeIngredient._meta.get_field("quantity")
+QUANTITY_STEP = Decimal(1).scaleb(-_QUANTITY_FIELD.decimal_places)
+QUANTITY_LIMIT = Decimal(10) ** (
+    _QUANTITY_FIELD.max_digits - _QUANTITY_FIELD.decimal_places
+)
+
+
+class ParsedIngredient(NamedTuple):
+    name: str
+    quantity: Decimal = None
+    unit: str = ""
+
+
+def _quantity(text):
+    """
+    The quantity in `text`, rounded to what RecipeIngredient.quantity
+    stores, or None when it is not a number ("1/0") or does not fit.
+    """
+    try:
+        value = sum(Fraction(part) for part in text.split())
+    except (ValueError, ZeroDivisionError):
+        return None
+    quantity = (Decimal(value.numerator) / Decimal(value.denominator)).quantize(
+        QUANTITY_STEP
+    )
+    return quantity if abs(quantity) < QUANTITY_LIMIT else None
+
+
+def _singular(word):
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "xes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def normalise_name(text):
+    """Lower case, letters only, no preparation words, singular."""
+    words = re.findall(r"[a-z]+", text.lower())
+    words = [_singular(word) for word in words if word not in DESCRIPTORS]
+    return " ".join(words)[:NAME_MAX_LENGTH].strip()
+
+
+def parse_item(text):
+    """Parse "1 1/2 cups cooked rice" into a ParsedIngredient, or None."""
+    text = re.sub(r"\([^)]*\)", " ", text)  # "(vanilla or chocolate)"
+    for symbol, fraction in UNICODE_FRACTIONS.items():
+        text = text.replace(symbol, f" {fraction}")
+    text = text.strip().lower()
+
+    quantity = None
+    match = QUANTITY.match(text)
+    if match:
+        quantity = _quantity(match.group(1))
+        text = text.removeprefix(match.group(0))
+
+    unit = ""
+    first, _, rest = text.partition(" ")
+    if first.rstrip(".") in UNITS and rest:
+        unit = UNITS[first.rstrip(".")]
+        text = rest
+
+    name = normalise_name(text)
+    return ParsedIngredient(name, quantity, unit) if name else None
+
+
+def parse_ingredients(text):
+    """Parse every line, and every comma-separated item on it, of `text`."""
+    parsed = []
+    for line in (text or "").splitlines():
+        line = LIST_MARKER.sub("", line)
+        for item in re.split(r"[,;]", line):
+            ingredient = parse_item(item)
+            if ingredient:
+                parsed.append(ingredient)
+    return parsed
+
+
+def index_ingredients(recipes):
+    """Replace the RecipeIngredient rows of `recipes` with freshly parsed ones."""
+    rows = [
+        RecipeIngredient(
+            recipe_id=recipe.pk,
+            position=position,
+            name=ingredient.name,
+            quantity=ingredient.quantity,
+            unit=ingredient.unit,
+        )
+        for recipe in recipes
+        for position, ingredient in enumerate(parse_ingredients(recipe.ingredients))
+    ]
+    with transaction.atomic():
+        RecipeIngredient.objects.filter(
+            recipe_id__in=[recipe.pk for recipe in recipes]
+        ).delete()
+        RecipeIngredient.objects.bulk_create(rows)
+    return len(rows)
+
+
+def index_all(after_id=0, chunk_size=INDEX_CHUNK_SIZE):
+    """
+    Re-index recipes with a primary key above `after_id` in chunks, each in
+    its own transaction. Yields (recipes, ingredients, last id) per chunk.
+    """
+    while True:
+        chunk = list(
+            Recipe.objects.filter(pk__gt=after_id)
+            .order_by("pk")
+            .only("pk", "ingredients")[:chunk_size]
+        )
+        if not chunk:
+            return
+        written = index_ingredients(chunk)
+        after_id = chunk[-1].pk
+        yield len(chunk), written, after_id
+
+
+def parse_ingredient_filter(text):
+    """
+    Split "chicken, no peanuts" into normalised names to include and to
+    exclude. Terms starting with "no", "without" or "-" are excluded.
+    """
+    include, exclude = [], []
+    for term in re.split(r"[,;]", text or ""):
+        term = term.strip().lower()
+        negated = re.match(r"^(?:(?:no|without)\s+|-\s*)", term)
+        if negated:
+            term = term.removeprefix(negated.group(0))
+        name = normalise_name(term)
+        if name:
+            (exclude if negated else include).append(name)
+    return include, exclude
+
+
+def _contains(name):
+    return Exists(
+        RecipeIngredient.objects.filter(recipe=OuterRef("pk")).filter(
+            Q(name=name) | Q(name__startswith=f"{name} ")
+        )
+    )
+
+
+def filter_by_ingredients(recipes, text):
+    """Filter `recipes` by an include/exclude ingredient query."""
+    include, exclude = parse_ingredient_filter(text)
+    for name in include:
+        recipes = recipes.filter(_contains(name))
+    for name in exclude:
+        recipes = recipes.exclude(_contains(name))
+    return recipes
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from recipe.ingredients import INDEX_CHUNK_SIZE, index_all
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the parsed ingredient index of all recipes in chunks "
+        "(after deploying the index, after loaddata or a parser change)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=INDEX_CHUNK_SIZE)
+        parser.add_argument(
+            "--after-id",
+            type=int,
+            default=0,
+            help="Resume after this recipe id (printed with every chunk)",
+        )
+
+    def handle(self, *args, **options):
+        recipes = ingredients = 0
+        for chunk, written, last_id in index_all(
+            after_id=options["after_id"], chunk_size=options["chunk_size"]
+        ):
+            recipes += chunk
+            ingredients += written
+            self.stdout.write(f"Indexed {recipes} recipes (up to id {last_id})")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Indexed {ingredients} ingredients of {recipes} recipes"
+            )
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from recipe.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the stored rating sum and count of recipes whose ratings "
+        "changed without going through the model (e.g. after loaddata)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        fixed = reconcile_ratings(dry_run=options["dry_run"])
+        verb = "Would fix" if options["dry_run"] else "Fixed"
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} the rating aggregates of {fixed} recipes")
+        )
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipe.models import Recipe
+from recipe.pdf_queue import queue_pdf_render, render_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Render queued recipe PDFs; runs until stopped, or drains the queue "
+        "once with --once (e.g. from cron)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true")
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep while the queue is empty",
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Queue recipes whose render failed again before starting",
+        )
+
+    def handle(self, *args, **options):
+        if options["retry_failed"]:
+            requeued = queue_pdf_render(Recipe.objects.filter(pdf_status="failed"))
+            self.stdout.write(f"Queued {requeued} failed recipes again")
+
+        totals = {}
+        while True:
+            outcomes = render_pending(options["batch_size"])
+            for outcome, count in outcomes.items():
+                totals[outcome] = totals.get(outcome, 0) + count
+            if outcomes:
+                self.stdout.write(
+                    ", ".join(f"{n} {outcome}" for outcome, n in outcomes.items())
+                )
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["poll_interval"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rendered {totals.get('ready', 0)} recipe PDFs")
+        )
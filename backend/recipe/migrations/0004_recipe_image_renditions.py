@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipe", "0003_alter_reciperating_unique_together_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="image_renditions",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
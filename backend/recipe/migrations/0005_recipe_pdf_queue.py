@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def mark_rendered_pdfs_ready(apps, schema_editor):
+    """Recipes that already have a PDF need no render."""
+    Recipe = apps.get_model("recipe", "Recipe")
+    Recipe.objects.exclude(pdf_file="").exclude(pdf_file__isnull=True).update(
+        pdf_status="ready"
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipe", "0004_recipe_image_renditions"),
+        ("users", "0020_userprofile_photo_renditions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="pdf_attempts",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="pdf_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("rendering", "Rendering"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                ],
+                default="pending",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="pdf_status_changed_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                condition=models.Q(("pdf_status__in", ["pending", "rendering"])),
+                fields=["pdf_status_changed_at"],
+                name="recipe_pdf_queue_idx",
+            ),
+        ),
+        migrations.RunPython(mark_rendered_pdfs_ready, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:04
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Recipe = apps.get_model("recipe", "Recipe")
+    RecipeRating = apps.get_model("recipe", "RecipeRating")
+    ratings = (
+        RecipeRating.objects.filter(recipe=OuterRef("pk")).order_by().values("recipe")
+    )
+    Recipe.objects.filter(pk__in=RecipeRating.objects.values("recipe")).update(
+        rating_sum=Coalesce(
+            Subquery(
+                ratings.annotate(total=Sum("rating")).values("total"),
+                output_field=models.IntegerField(),
+            ),
+            0,
+        ),
+        rating_count=Coalesce(
+            Subquery(
+                ratings.annotate(total=Count("id")).values("total"),
+                output_field=models.IntegerField(),
+            ),
+            0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipe", "0005_recipe_pdf_queue"),
+        ("users", "0020_userprofile_photo_renditions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                django.db.models.expressions.CombinedExpression(
+                    django.db.models.functions.comparison.Cast(
+                        models.F("rating_sum"), models.FloatField()
+                    ),
+                    "/",
+                    django.db.models.functions.comparison.NullIf(
+                        models.F("rating_count"), models.Value(0)
+                    ),
+                ),
+                name="recipe_avg_rating_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:12
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipe", "0008_recipe_ingredient_index"),
+        ("users", "0020_userprofile_photo_renditions"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="recipe",
+            name="recipe_avg_rating_idx",
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                django.db.models.functions.comparison.Coalesce(
+                    django.db.models.expressions.CombinedExpression(
+                        django.db.models.functions.comparison.Cast(
+                            models.F("rating_sum"), models.FloatField()
+                        ),
+                        "/",
+                        django.db.models.functions.comparison.NullIf(
+                            models.F("rating_count"), models.Value(0)
+                        ),
+                    ),
+                    models.Value(0.0),
+                ),
+                name="recipe_avg_rating_idx",
+            ),
+        ),
+    ]
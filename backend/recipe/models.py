@@ -1,16 +1,45 @@
 from django.db import models
-from django.core.files.base import ContentFile
 from django.core.validators import MinValueValidator, MaxValueValidator
 from io import BytesIO
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
+from django.utils import timezone
 from django.utils.text import slugify
+from healthquest_backend.dirty_fields import DirtyFieldsMixin
 from users.models import UserProfile
-from django.db.models import Avg
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
 
+# Recipe columns written only by the PDF rendering queue (recipe.pdf_queue)
+PDF_QUEUE_FIELDS = ("pdf_file", "pdf_status", "pdf_status_changed_at", "pdf_attempts")
 
-class Recipe(models.Model):
+
+# text search configuration of Recipe.search_vector, see recipe.search
+SEARCH_CONFIG = "english"
+
+
+def average_rating_expression():
+    """
+    Average rating from the stored aggregates, 0 for unrated recipes (as
+    Recipe.average_rating), so it can be a keyset pagination column. Queries
+    must use this exact expression to be served by recipe_avg_rating_idx.
+    """
+    return Coalesce(
+        Cast(F("rating_sum"), FloatField()) / NullIf(F("rating_count"), Value(0)),
+        Value(0.0),
+    )
+
+
+class Recipe(DirtyFieldsMixin, models.Model):
     LEVEL_CHOICES = [("silver", "Silver"), ("gold", "Gold")]
+    PDF_STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("rendering", "Rendering"),
+        ("ready", "Ready"),
+        ("failed", "Failed"),
+    ]
 
     user_profile = models.ForeignKey(
         UserProfile, on_delete=models.CASCADE, related_name="recipes"
@@ -22,17 +51,38 @@ class Recipe(models.Model):
         max_length=50, choices=LEVEL_CHOICES, default="silver"
     )
     image = models.ImageField(upload_to="recipes/images/", null=True, blank=True)
+    # healthquest_backend.images.process_upload output for `image`
+    image_renditions = models.JSONField(default=dict, blank=True)
     pdf_file = models.FileField(upload_to="recipes/pdfs/", null=True, blank=True)
+    # rendering queue state, see recipe.pdf_queue
+    pdf_status = models.CharField(
+        max_length=20, choices=PDF_STATUS_CHOICES, default="pending"
+    )
+    pdf_status_changed_at = models.DateTimeField(default=timezone.now)
+    pdf_attempts = models.PositiveSmallIntegerField(default=0)
+    # kept in step with RecipeRating by recipe.signals, see recipe.ratings
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    search_vector = models.GeneratedField(
+        expression=SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("ingredients", weight="B", config=SEARCH_CONFIG)
+        + SearchVector("steps", weight="C", config=SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # a stale instance must not overwrite the queue's state
+    dirty_fields_exclude = PDF_QUEUE_FIELDS
+
     def __str__(self):
         return f"{self.title} ({self.user_profile.user.username})"
 
-    def create_pdf(self):
+    def render_pdf(self):
         """
         Generate a simple PDF containing title, author, ingredients, and steps.
-        Saves the PDF to self.pdf_file.
+        Returns the PDF bytes; recipe.pdf_queue stores them.
         """
 
         buffer = BytesIO()
@@ -83,39 +133,58 @@ class Recipe(models.Model):
         p.showPage()
         p.save()
 
-        # Save file to model
-        buffer.seek(0)
-        pdf_content = buffer.read()
+        pdf_content = buffer.getvalue()
         buffer.close()
-
-        safe_title = slugify(self.title) or "recipe"
-        filename = f"{safe_title}.pdf"
-        self.pdf_file.save(filename, ContentFile(pdf_content), save=True)
-
-        return self.pdf_file.url
+        return pdf_content
 
     @property
-    def average_rating(self):
-        return self.ratings.aggregate(Avg("rating"))["rating__avg"] or 0
+    def pdf_filename(self):
+        return f"{slugify(self.title) or 'recipe'}.pdf"
 
     @property
-    def rating_count(self):
-        return self.ratings.count()
-
-    def save(self, *args, **kwargs):
-        if self.pk:
-            old = Recipe.objects.get(pk=self.pk)
-            self._changed_fields = [
-                f
-                for f in ["title", "ingredients", "steps"]
-                if getattr(old, f) != getattr(self, f)
-            ]
-        else:
-            self._changed_fields = ["title", "ingredients", "steps"]
-        super().save(*args, **kwargs)
+    def average_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else 0
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["pdf_status_changed_at"],
+                name="recipe_pdf_queue_idx",
+                condition=models.Q(pdf_status__in=["pending", "rendering"]),
+            ),
+            models.Index(average_rating_expression(), name="recipe_avg_rating_idx"),
+            GinIndex(fields=["search_vector"], name="recipe_search_idx"),
+        ]
+
+
+class RecipeIngredient(models.Model):
+    """One parsed ingredient of a recipe, kept in step by recipe.signals."""
+
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE, related_name="ingredient_items"
+    )
+    position = models.PositiveSmallIntegerField()
+    # normalised by recipe.ingredients.normalise_name
+    name = models.CharField(max_length=100)
+    quantity = models.DecimalField(
+        max_digits=10, decimal_places=3, null=True, blank=True
+    )
+    unit = models.CharField(max_length=20, blank=True)
+
+    class Meta:
+        ordering = ["recipe", "position"]
+        indexes = [
+            # pattern ops serve both name = 'x' and name LIKE 'x %'
+            models.Index(
+                fields=["name"],
+                name="recipeingredient_name_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
 
 
 class RecipeRating(models.Model):
@@ -126,6 +195,13 @@ class RecipeRating(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # the stored value, so a save can apply the delta to the recipe
+        instance._stored_rating = instance.__dict__.get("rating")
+        return instance
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -0,0 +1,120 @@
+"""
+Database-backed queue for rendering recipe PDFs.
+
+The queue is the Recipe table itself: a recipe whose PDF needs rendering has
+pdf_status "pending", so any number of edits before a worker gets to it
+collapse into one render. Workers (the `render_recipe_pdfs` command) claim
+recipes with SELECT ... FOR UPDATE SKIP LOCKED, render outside any
+transaction and store the PDF only if the recipe was not queued again in the
+meantime; pdf_status_changed_at doubles as the claim token.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+# a claim older than this belongs to a worker that died mid-render
+RENDER_TIMEOUT = timedelta(minutes=10)
+MAX_RENDER_ATTEMPTS = 3
+RETRY_AFTER_SECONDS = 5
+
+
+def queue_pdf_render(recipes):
+    """Mark `recipes` (a queryset) as needing a new PDF."""
+    return recipes.update(
+        pdf_status="pending", pdf_status_changed_at=timezone.now(), pdf_attempts=0
+    )
+
+
+def claim_recipes(batch_size, now=None):
+    """
+    Claim up to `batch_size` queued recipes, oldest first, and return them
+    with pdf_status "rendering".
+    """
+    now = now or timezone.now()
+    claimable = Q(pdf_status="pending") | Q(
+        pdf_status="rendering", pdf_status_changed_at__lt=now - RENDER_TIMEOUT
+    )
+    with transaction.atomic():
+        recipes = list(
+            Recipe.objects.filter(claimable)
+            .select_related("user_profile__user")
+            .select_for_update(skip_locked=True, of=("self",))
+            .order_by("pdf_status_changed_at")[:batch_size]
+        )
+        Recipe.objects.filter(pk__in=[recipe.pk for recipe in recipes]).update(
+            pdf_status="rendering",
+            pdf_status_changed_at=now,
+            pdf_attempts=F("pdf_attempts") + 1,
+        )
+    for recipe in recipes:
+        recipe.pdf_status = "rendering"
+        recipe.pdf_status_changed_at = now
+        recipe.pdf_attempts += 1
+        recipe.mark_clean(["pdf_status", "pdf_status_changed_at", "pdf_attempts"])
+    return recipes
+
+
+def _finish(recipe, claimed_at, **fields):
+    """
+    Apply `fields` to `recipe` unless it was queued again or reclaimed since
+    `claimed_at`. Returns whether the claim was still current.
+    """
+    with transaction.atomic():
+        current = (
+            Recipe.objects.select_for_update()
+            .filter(
+                pk=recipe.pk, pdf_status="rendering", pdf_status_changed_at=claimed_at
+            )
+            .first()
+        )
+        if current is None:
+            return False
+        pdf_content = fields.pop("pdf_content", None)
+        if pdf_content is not None:
+            current.pdf_file.save(
+                current.pdf_filename, ContentFile(pdf_content), save=False
+            )
+        for name, value in fields.items():
+            setattr(current, name, value)
+        current.pdf_status_changed_at = timezone.now()
+        current.save(update_fields=["pdf_file", "pdf_status", "pdf_status_changed_at"])
+        return True
+
+
+def render_recipe(recipe):
+    """
+    Render a claimed recipe. Returns "ready", "failed", "retry" or
+    "superseded" (edited while rendering; it stays queued).
+    """
+    claimed_at = recipe.pdf_status_changed_at
+    try:
+        pdf_content = recipe.render_pdf()
+    except Exception:
+        logger.exception("Failed to generate PDF for recipe %s", recipe.pk)
+        outcome = "failed" if recipe.pdf_attempts >= MAX_RENDER_ATTEMPTS else "retry"
+        status = "failed" if outcome == "failed" else "pending"
+        if _finish(recipe, claimed_at, pdf_status=status):
+            return outcome
+        return "superseded"
+
+    if _finish(recipe, claimed_at, pdf_status="ready", pdf_content=pdf_content):
+        return "ready"
+    return "superseded"
+
+
+def render_pending(batch_size=20):
+    """Claim and render one batch. Returns {outcome: count}."""
+    outcomes = {}
+    for recipe in claim_recipes(batch_size):
+        outcome = render_recipe(recipe)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    return outcomes
@@ -0,0 +1,56 @@
+"""
+Rating aggregates stored on Recipe.
+
+Recipe.rating_sum and Recipe.rating_count are adjusted with F() deltas as
+ratings are created, changed and deleted (see recipe.signals), so a recipe's
+average needs no aggregate query and sorting or filtering by it is an index
+scan on recipe_avg_rating_idx. `reconcile_ratings` repairs any drift, e.g.
+after ratings were changed with queryset.update().
+"""
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Recipe, RecipeRating
+
+
+def apply_rating_delta(recipe_id, rating_delta, count_delta):
+    Recipe.objects.filter(pk=recipe_id).update(
+        rating_sum=F("rating_sum") + rating_delta,
+        rating_count=F("rating_count") + count_delta,
+    )
+
+
+def _totals():
+    """Subqueries for the actual rating sum and count of the outer recipe."""
+    ratings = (
+        RecipeRating.objects.filter(recipe=OuterRef("pk")).order_by().values("recipe")
+    )
+    rating_sum = Subquery(
+        ratings.annotate(total=Sum("rating")).values("total"),
+        output_field=IntegerField(),
+    )
+    rating_count = Subquery(
+        ratings.annotate(total=Count("id")).values("total"),
+        output_field=IntegerField(),
+    )
+    return Coalesce(rating_sum, 0), Coalesce(rating_count, 0)
+
+
+def reconcile_ratings(recipes=None, dry_run=False):
+    """
+    Recompute the stored aggregates of `recipes` (default: all) that differ
+    from their ratings. Returns the number of recipes that were off.
+    """
+    recipes = Recipe.objects.all() if recipes is None else recipes
+    actual_sum, actual_count = _totals()
+    stale = recipes.alias(actual_sum=actual_sum, actual_count=actual_count).exclude(
+        rating_sum=F("actual_sum"), rating_count=F("actual_count")
+    )
+    if dry_run:
+        return stale.count()
+
+    actual_sum, actual_count = _totals()
+    return Recipe.objects.filter(pk__in=stale.values("pk")).update(
+        rating_sum=actual_sum, rating_count=actual_count
+    )
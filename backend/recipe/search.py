@@ -0,0 +1,78 @@
+"""
+Recipe search.
+
+Queries match Recipe.search_vector (title weighted above ingredients above
+steps, kept current by the database as a generated column) through the
+recipe_search_idx GIN index. Every search word is matched as a prefix, and
+results are ranked. When nothing matches and pg_trgm is installed, titles
+similar to the query are returned instead, so typos still find the recipe.
+"""
+
+import re
+from functools import lru_cache
+
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db import connection
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+from .models import SEARCH_CONFIG
+
+MAX_SEARCH_WORDS = 8
+
+
+@lru_cache(maxsize=None)
+def trigram_available():
+    """Whether pg_trgm is installed (recipe migration 0007 adds it if it can)."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def prefix_query(text):
+    """
+    A tsquery matching every word of `text` as a prefix ("chick sal" finds
+    "chicken salad"), or None when `text` has no words.
+    """
+    words = re.findall(r"\w+", text.lower())[:MAX_SEARCH_WORDS]
+    if not words:
+        return None
+    # \w+ words contain no tsquery operators, so they are safe in a raw query
+    raw = " & ".join(f"{word}:*" for word in words)
+    return SearchQuery(raw, search_type="raw", config=SEARCH_CONFIG)
+
+
+def _float8(score):
+    # ts_rank and word_similarity return real; as double precision the score
+    # survives a round trip through a pagination cursor unchanged
+    return Cast(score, FloatField())
+
+
+def search_recipes(recipes, text):
+    """
+    Filter `recipes` to matches for `text`, best match first. The ordering
+    ends with the primary key, so it can be used for keyset pagination.
+    """
+    query = prefix_query(text)
+    if query is None:
+        return recipes.none()
+
+    matches = (
+        recipes.filter(search_vector=query)
+        .annotate(rank=_float8(SearchRank(F("search_vector"), query)))
+        .order_by("-rank", "-created_at", "-id")
+    )
+    if not trigram_available() or matches.exists():
+        return matches
+
+    # trigram_word_similar uses pg_trgm.word_similarity_threshold and is
+    # served by recipe_title_trgm_idx
+    return (
+        recipes.filter(title__trigram_word_similar=text)
+        .annotate(similarity=_float8(TrigramWordSimilarity(text, "title")))
+        .order_by("-similarity", "-created_at", "-id")
+    )
@@ -1,13 +1,20 @@
+from django.utils.text import slugify
 from rest_framework import serializers
+from healthquest_backend.images import ProcessedImageMixin, srcset
 from .models import Recipe, RecipeRating
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(ProcessedImageMixin, serializers.ModelSerializer):
+    image_folder = "recipes/images"
+
     user_profile = serializers.SerializerMethodField()
     user_id = serializers.SerializerMethodField()
     user_profile_username = serializers.SerializerMethodField()
     image = serializers.ImageField(use_url=True, required=False, allow_null=True)
-    pdf_file = serializers.FileField(use_url=True, required=False, allow_null=True)
+    image_srcset = serializers.SerializerMethodField()
+    # written only by the PDF queue worker (recipe.pdf_queue)
+    pdf_file = serializers.FileField(use_url=True, read_only=True)
+    average_rating = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Recipe
@@ -21,7 +28,11 @@ class RecipeSerializer(serializers.ModelSerializer):
             "steps",
             "access_level",
             "image",
+            "image_srcset",
             "pdf_file",
+            "pdf_status",
+            "average_rating",
+            "rating_count",
             "created_at",
             "updated_at",
         ]
@@ -30,16 +41,26 @@ class RecipeSerializer(serializers.ModelSerializer):
             "user_profile",
             "user_id",
             "user_profile_username",
+            "pdf_file",
+            "pdf_status",
+            "rating_count",
             "created_at",
             "updated_at",
         ]
 
+    def image_name(self, upload, validated_data):
+        title = validated_data.get("title") or getattr(self.instance, "title", "")
+        return f"{slugify(title) or 'recipe'}-{upload.name}"
+
     def get_user_profile(self, obj):
         """Return a display name for the recipe owner ("First Last" or username)."""
         user = obj.user_profile.user
         full_name = f"{user.first_name} {user.last_name}".strip()
         return full_name if full_name else user.username
 
+    def get_image_srcset(self, obj):
+        return srcset(obj.image_renditions, obj.image.name, self.context.get("request"))
+
     def get_user_id(self, obj):
         try:
             return obj.user_profile.user.id
@@ -56,8 +77,7 @@ class RecipeSerializer(serializers.ModelSerializer):
         request = self.context["request"]
         user_profile = request.user.userprofile
 
-        # Fetch current level safely
-        current_level = user_profile.get_current_level().level.lower()
+        current_level = user_profile.level.lower()
         role = user_profile.role.lower()
 
         # Access control: only coaches or gold users can create
@@ -70,6 +90,18 @@ class RecipeSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class RecipeCardSerializer(RecipeSerializer):
+    """Read-only listing representation: no ingredients or steps text."""
+
+    class Meta(RecipeSerializer.Meta):
+        fields = [
+            field
+            for field in RecipeSerializer.Meta.fields
+            if field not in ("ingredients", "steps", "pdf_file")
+        ]
+        read_only_fields = fields
+
+
 class RecipeRatingSerializer(serializers.ModelSerializer):
     user = serializers.CharField(source="user_profile.user.username", read_only=True)
 
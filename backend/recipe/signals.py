@@ -1,43 +1,65 @@
-from django.db.models.signals import post_save
-from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import Recipe
+from .ingredients import index_ingredients
+from .models import Recipe, RecipeRating
+from .pdf_queue import queue_pdf_render
+from .ratings import apply_rating_delta, reconcile_ratings
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def _generate_pdf(instance: Recipe):
-    try:
-        instance.create_pdf()
-    except Exception as exc:
-        logger.exception("Failed to generate PDF for recipe %s: %s", instance.pk, exc)
-
-
 @receiver(post_save, sender=Recipe)
 def generate_or_update_recipe_pdf(sender, instance, created, raw=False, **kwargs):
     """
-    Generate or update the PDF for a Recipe when it's created or edited.
+    Queue the PDF of an edited Recipe for the `render_recipe_pdfs` worker.
+    New recipes start out queued (pdf_status defaults to "pending").
     """
+    if created or raw:
+        return
+
+    # Only re-render if the recipe content changed. Requeueing a pending
+    # recipe keeps it a single queue entry, and invalidates a render that
+    # is already running on the old content.
+    changed_fields = getattr(instance, "_changed_fields", None) or []
+    if not any(field in changed_fields for field in ["title", "ingredients", "steps"]):
+        return
+
+    queue_pdf_render(Recipe.objects.filter(pk=instance.pk))
+    instance.pdf_status = "pending"
+    logger.info("Queued PDF render for recipe %s", instance.pk)
+
 
-    # Skip PDF generation during fixture loading
+@receiver(post_save, sender=Recipe)
+def index_recipe_ingredients(sender, instance, created, raw=False, **kwargs):
+    """Re-parse the ingredient index of a new recipe or changed ingredients."""
+    # fixture loading is followed by `index_recipe_ingredients`
+    if raw:
+        return
+    if "ingredients" in (getattr(instance, "_changed_fields", None) or []):
+        index_ingredients([instance])
+
+
+@receiver(post_save, sender=RecipeRating)
+def add_rating_to_recipe(sender, instance, created, raw=False, **kwargs):
+    """Fold a new or changed rating into the recipe's stored aggregates."""
+    # fixture loading is followed by `reconcile_recipe_ratings`
     if raw:
-        logger.info(
-            "Skipping PDF generation for recipe %s (fixture loading)", instance.pk
-        )
         return
+    stored = getattr(instance, "_stored_rating", None)
+    if created:
+        apply_rating_delta(instance.recipe_id, instance.rating, 1)
+    elif stored is None:
+        # saved without being loaded first, the previous value is unknown
+        reconcile_ratings(Recipe.objects.filter(pk=instance.recipe_id))
+    elif stored != instance.rating:
+        apply_rating_delta(instance.recipe_id, instance.rating - stored, 0)
+    instance._stored_rating = instance.rating
+
 
-    def _needs_pdf_update():
-        # Only regenerate if PDF is missing or the recipe content changed
-        if not instance.pdf_file:
-            return True
-        changed_fields = getattr(instance, "_changed_fields", None)
-        if changed_fields:
-            return any(
-                field in changed_fields for field in ["title", "ingredients", "steps"]
-            )
-        return True
-
-    # Always trigger on commit, to avoid race condition
-    if created or _needs_pdf_update():
-        transaction.on_commit(lambda: _generate_pdf(instance))
+@receiver(post_delete, sender=RecipeRating)
+def remove_rating_from_recipe(sender, instance, **kwargs):
+    """Take a deleted rating back out of the recipe's aggregates."""
+    stored = getattr(instance, "_stored_rating", None)
+    rating = instance.rating if stored is None else stored
+    apply_rating_delta(instance.recipe_id, -rating, -1)
@@ -1,11 +1,16 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
 from rest_framework.test import APIClient
 from django.contrib.auth.models import User
 from django.urls import reverse
-from ..models import Recipe, RecipeRating
+from healthquest_backend.testing import TemporaryMediaMixin
+from ..models import Recipe, RecipeRating, average_rating_expression
 
 
-class RecipeRatingTests(TestCase):
+class RecipeRatingTests(TemporaryMediaMixin, TestCase):
     def setUp(self):
         """Set up test data for rating tests"""
         self.client = APIClient()
@@ -183,9 +188,13 @@ class RecipeRatingTests(TestCase):
         url = reverse("download-recipe-pdf", kwargs={"id": self.recipe.id})
 
         self.client.force_login(self.coach)
+        # the PDF is rendered by the worker, not by the download request
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 202)
+        call_command("render_recipe_pdfs", "--once", stdout=StringIO())
+
         response = self.client.get(url)
-        # PDF generation might create the file or return 200
-        self.assertIn(response.status_code, [200, 201])
+        self.assertEqual(response.status_code, 200)
         self.client.logout()
 
     def test_download_recipe_pdf_gold_access(self):
@@ -198,6 +207,7 @@ class RecipeRatingTests(TestCase):
             user_profile=self.coach_profile,
             access_level="gold",
         )
+        call_command("render_recipe_pdfs", "--once", stdout=StringIO())
 
         url = reverse("download-recipe-pdf", kwargs={"id": gold_recipe.id})
 
@@ -210,9 +220,77 @@ class RecipeRatingTests(TestCase):
         # Gold user should have access
         self.client.force_login(self.gold_user)
         response = self.client.get(url)
-        self.assertIn(response.status_code, [200, 201])
+        self.assertEqual(response.status_code, 200)
         self.client.logout()
 
+    def _aggregates(self, recipe=None):
+        recipe = recipe or self.recipe
+        recipe.refresh_from_db()
+        return recipe.rating_sum, recipe.rating_count
+
+    def test_rating_aggregates_follow_ratings(self):
+        """Creating, changing and deleting ratings adjust the stored totals"""
+        url = reverse("give-recipe-rating", kwargs={"id": self.recipe.id})
+        self.client.force_login(self.silver_user)
+        self.client.post(url, {"rating": 2}, format="json")
+        self.client.force_login(self.gold_user)
+        response = self.client.post(url, {"rating": 5}, format="json")
+        self.assertEqual(response.data["average_rating"], 3.5)
+        self.assertEqual(response.data["rating_count"], 2)
+
+        response = self.client.post(url, {"rating": 4}, format="json")
+        self.assertEqual(response.data["average_rating"], 3.0)
+        self.assertEqual(self._aggregates(), (6, 2))
+
+        self.client.delete(
+            reverse("delete-recipe-rating", kwargs={"id": self.recipe.id})
+        )
+        self.assertEqual(self._aggregates(), (2, 1))
+
+    def test_reconcile_command_repairs_drift(self):
+        """reconcile_recipe_ratings fixes totals changed behind the model's back"""
+        RecipeRating.objects.create(
+            recipe=self.recipe, user_profile=self.silver_profile, rating=4
+        )
+        RecipeRating.objects.update(rating=1)
+        self.assertEqual(self._aggregates(), (4, 1))
+
+        out = StringIO()
+        call_command("reconcile_recipe_ratings", stdout=out)
+
+        self.assertIn("Fixed the rating aggregates of 1 recipes", out.getvalue())
+        self.assertEqual(self._aggregates(), (1, 1))
+
+    def test_rating_sort_uses_stored_average(self):
+        """rating_high lists the best rated first, served by the average index"""
+        better = Recipe.objects.create(
+            title="Better Recipe",
+            ingredients="Test",
+            steps="Test",
+            user_profile=self.coach_profile,
+        )
+        RecipeRating.objects.create(
+            recipe=self.recipe, user_profile=self.silver_profile, rating=2
+        )
+        RecipeRating.objects.create(
+            recipe=better, user_profile=self.silver_profile, rating=5
+        )
+        self.client.force_login(self.coach)
+
+        response = self.client.get(reverse("recipe-list"), {"sort_by": "rating_high"})
+        titles = [r["title"] for r in response.data]
+        self.assertEqual(titles, ["Better Recipe", "Test Recipe"])
+        self.assertEqual(response.data[0]["average_rating"], 5.0)
+
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+        plan = (
+            Recipe.objects.alias(avg_rating=average_rating_expression())
+            .filter(avg_rating__gte=4)
+            .explain()
+        )
+        self.assertIn("recipe_avg_rating_idx", plan)
+
 
 # Run the tests with: python manage.py test recipe
 # Run specific test: python manage.py test recipe.RecipeRatingTests
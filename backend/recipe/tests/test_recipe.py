@@ -1,12 +1,25 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
-from ..models import Recipe, RecipeRating
+from io import StringIO
+from healthquest_backend.testing import TemporaryMediaMixin, image_upload
+from ..ingredients import parse_ingredient_filter, parse_ingredients
+from users.models import UserProfile
+from ..models import Recipe, RecipeIngredient, RecipeRating
+from ..pdf_queue import MAX_RENDER_ATTEMPTS, claim_recipes, render_recipe
+from ..views import RECIPE_SORTS
+from ..search import prefix_query, trigram_available
 
 
-class RecipeTests(TestCase):
+class RecipeTests(TemporaryMediaMixin, TestCase):
     def setUp(self):
         """Set up test data"""
         self.client = APIClient()
@@ -416,18 +429,59 @@ class RecipeTests(TestCase):
         url = reverse("upload-recipe-image", kwargs={"id": self.recipe.id})
 
         # Create a simple test image
-        image = SimpleUploadedFile(
-            "test_image.jpg", b"file_content", content_type="image/jpeg"
-        )
+        image = image_upload("test_image.jpg")
 
         self.client.force_login(self.coach)
         response = self.client.post(url, {"image": image}, format="multipart")
         self.assertEqual(response.status_code, 200)
         self.assertIn("photo_url", response.data)
+        self.assertIn("64w", response.data["recipe"]["image_srcset"]["webp"])
         self.recipe.refresh_from_db()
         self.assertTrue(bool(self.recipe.image))
         self.client.logout()
 
+    def test_recipe_saved_with_an_image_goes_through_the_pipeline(self):
+        """Images sent with a recipe create or update are stored as renditions"""
+        self.client.force_login(self.coach)
+        data = {
+            "title": "Pictured Recipe",
+            "ingredients": "Rice",
+            "steps": "Cook",
+            "access_level": "silver",
+            "image": image_upload("dish.jpg"),
+        }
+        response = self.client.post(reverse("recipe-list"), data, format="multipart")
+
+        self.assertEqual(response.status_code, 201)
+        recipe = Recipe.objects.get(pk=response.data["id"])
+        self.assertEqual(recipe.image.name, recipe.image_renditions["full"]["jpeg"])
+        self.assertTrue(recipe.image.name.startswith("recipes/images/"))
+        self.assertIn("64w", response.data["image_srcset"]["webp"])
+
+        url = reverse("update-recipe", kwargs={"id": recipe.id})
+        image = image_upload("bigger.jpg", (400, 300), "blue")
+        response = self.client.patch(url, {"image": image}, format="multipart")
+
+        self.assertEqual(response.status_code, 200)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_renditions["full"]["width"], 400)
+        self.assertEqual(recipe.image.name, recipe.image_renditions["full"]["jpeg"])
+
+    def test_update_ignores_a_client_pdf_file(self):
+        """pdf_file is read-only, so sending one cannot fail the save"""
+        self.client.force_login(self.coach)
+        url = reverse("update-recipe", kwargs={"id": self.recipe.id})
+        pdf = SimpleUploadedFile("mine.pdf", b"%PDF-1.4", "application/pdf")
+
+        response = self.client.patch(
+            url, {"title": "Renamed", "pdf_file": pdf}, format="multipart"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.title, "Renamed")
+        self.assertFalse(self.recipe.pdf_file.name.endswith("mine.pdf"))
+
     def test_upload_recipe_image_no_file(self):
         """Test uploading without providing an image file"""
         url = reverse("upload-recipe-image", kwargs={"id": self.recipe.id})
@@ -452,7 +506,7 @@ class RecipeTests(TestCase):
         self.client.logout()
 
 
-class RecipeRatingTests(TestCase):
+class RecipeRatingTests(TemporaryMediaMixin, TestCase):
     def setUp(self):
         """Set up test data for rating tests"""
         self.client = APIClient()
@@ -630,9 +684,13 @@ class RecipeRatingTests(TestCase):
         url = reverse("download-recipe-pdf", kwargs={"id": self.recipe.id})
 
         self.client.force_login(self.coach)
+        # the PDF is rendered by the worker, not by the download request
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 202)
+        call_command("render_recipe_pdfs", "--once", stdout=StringIO())
+
         response = self.client.get(url)
-        # PDF generation might create the file or return 200
-        self.assertIn(response.status_code, [200, 201])
+        self.assertEqual(response.status_code, 200)
         self.client.logout()
 
     def test_download_recipe_pdf_gold_access(self):
@@ -645,6 +703,7 @@ class RecipeRatingTests(TestCase):
             user_profile=self.coach_profile,
             access_level="gold",
         )
+        call_command("render_recipe_pdfs", "--once", stdout=StringIO())
 
         url = reverse("download-recipe-pdf", kwargs={"id": gold_recipe.id})
 
@@ -657,9 +716,361 @@ class RecipeRatingTests(TestCase):
         # Gold user should have access
         self.client.force_login(self.gold_user)
         response = self.client.get(url)
-        self.assertIn(response.status_code, [200, 201])
+        self.assertEqual(response.status_code, 200)
         self.client.logout()
 
 
 # Run the tests with: python manage.py test recipe
 # Run specific test: python manage.py test recipe.RecipeTests.test_recipe_coach_access
+
+
+class RecipePdfQueueTests(TemporaryMediaMixin, TestCase):
+    """PDFs are rendered by the queue worker, once per burst of edits"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.coach = User.objects.create_user(username="coach", password="pass")
+        profile = self.coach.userprofile
+        profile.role = "coach"
+        profile.save()
+        self.recipe = Recipe.objects.create(
+            title="Queued Recipe",
+            ingredients="Oats",
+            steps="Cook",
+            user_profile=profile,
+        )
+        self.url = reverse("download-recipe-pdf", kwargs={"id": self.recipe.id})
+        self.client.force_login(self.coach)
+
+    def _work(self):
+        call_command("render_recipe_pdfs", "--once", stdout=StringIO())
+        self.recipe.refresh_from_db()
+
+    def test_download_pending_asks_client_to_retry(self):
+        """Downloads of a queued PDF return 202 with Retry-After"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response["Retry-After"], "5")
+        self.assertEqual(response.data["pdf_status"], "pending")
+
+    def test_repeated_edits_render_once(self):
+        """Edits made before the worker runs coalesce into one render"""
+        self._work()
+        for n in range(3):
+            self.recipe.steps = f"Cook for {n} minutes"
+            self.recipe.save()
+
+        with mock.patch.object(
+            Recipe, "render_pdf", autospec=True, return_value=b"%PDF-1.4"
+        ) as render:
+            self._work()
+
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(self.recipe.pdf_status, "ready")
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_edit_during_render_keeps_recipe_queued(self):
+        """A render of outdated content is discarded and the recipe re-queued"""
+        (claimed,) = claim_recipes(batch_size=10)
+        self.recipe.title = "Renamed Recipe"
+        self.recipe.save()
+
+        self.assertEqual(render_recipe(claimed), "superseded")
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.pdf_status, "pending")
+        self.assertFalse(self.recipe.pdf_file)
+
+    def test_failing_render_gives_up_after_retries(self):
+        """Renders that keep failing end as failed and downloads report it"""
+        with mock.patch.object(
+            Recipe, "render_pdf", autospec=True, side_effect=ValueError
+        ), self.assertLogs("recipe.pdf_queue", level="ERROR"):
+            self._work()
+
+        self.assertEqual(self.recipe.pdf_status, "failed")
+        self.assertEqual(self.recipe.pdf_attempts, MAX_RENDER_ATTEMPTS)
+        self.assertEqual(self.client.get(self.url).status_code, 503)
+
+
+class RecipeSearchTests(TestCase):
+    """Ranked full-text search over title, ingredients and steps"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.coach = User.objects.create_user(username="coach", password="pass")
+        profile = self.coach.userprofile
+        profile.role = "coach"
+        profile.save()
+        for title, ingredients in (
+            ("Chicken Salad", "Chicken, Lettuce"),
+            ("Beef Stew", "Beef, Chicken stock"),
+            ("Fruit Bowl", "Banana, Mango"),
+        ):
+            Recipe.objects.create(
+                title=title,
+                ingredients=ingredients,
+                steps="Mix everything",
+                user_profile=profile,
+            )
+        self.client.force_login(self.coach)
+
+    def _search(self, text):
+        response = self.client.get(reverse("recipe-list"), {"search": text})
+        self.assertEqual(response.status_code, 200)
+        return [recipe["title"] for recipe in response.data]
+
+    def test_title_matches_rank_above_ingredient_matches(self):
+        """Ingredients are searched too, but title hits come first"""
+        self.assertEqual(self._search("chicken"), ["Chicken Salad", "Beef Stew"])
+
+    def test_words_match_as_prefixes(self):
+        """Partial words find recipes as the user types"""
+        self.assertEqual(self._search("chick sal"), ["Chicken Salad"])
+        self.assertEqual(self._search("mang"), ["Fruit Bowl"])
+
+    def test_query_syntax_is_not_interpreted(self):
+        """tsquery operators in the search text are treated as separators"""
+        self.assertEqual(self._search("salad & | ! :* ("), ["Chicken Salad"])
+        self.assertEqual(self._search("&&"), [])
+
+    def test_search_uses_gin_index(self):
+        """Matching is served by the search vector index"""
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+        plan = Recipe.objects.filter(search_vector=prefix_query("salad")).explain()
+        self.assertIn("recipe_search_idx", plan)
+
+    def test_typos_fall_back_to_trigram_titles(self):
+        """A misspelt title still finds the recipe"""
+        if not trigram_available():
+            self.skipTest("pg_trgm is not installed")
+        self.assertEqual(self._search("chiken salda"), ["Chicken Salad"])
+
+
+class RecipeIngredientIndexTests(TestCase):
+    """Parsed ingredient rows and ?ingredients= include/exclude filtering"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.coach = User.objects.create_user(username="coach", password="pass")
+        self.profile = self.coach.userprofile
+        self.profile.role = "coach"
+        self.profile.save()
+        self.satay = self._recipe(
+            "Chicken Satay", "500 g boneless chicken breasts\n2 tbsp peanut butter"
+        )
+        self.salad = self._recipe("Chicken Salad", "1 cup cooked chicken, Lettuce")
+        self.curry = self._recipe("Veggie Curry", "2 Potatoes\n1 can chickpeas")
+        self.client.force_login(self.coach)
+
+    def _recipe(self, title, ingredients):
+        return Recipe.objects.create(
+            title=title,
+            ingredients=ingredients,
+            steps="Cook",
+            user_profile=self.profile,
+        )
+
+    def _filter(self, text):
+        response = self.client.get(
+            reverse("recipe-list"), {"ingredients": text, "sort_by": "title_az"}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [recipe["title"] for recipe in response.data]
+
+    def test_lines_are_parsed_into_quantity_unit_and_name(self):
+        """Quantities, units and preparation words are split off"""
+        parsed = parse_ingredients(
+            "- 1 1/2 cups cooked brown rice (optional)\n½ tsp salt, pepper\n\n"
+        )
+        self.assertEqual(
+            [(item.name, item.quantity, item.unit) for item in parsed],
+            [("brown rice", 1.5, "cup"), ("salt", 0.5, "tsp"), ("pepper", None, "")],
+        )
+
+    def test_quantities_that_do_not_fit_are_left_out(self):
+        """Unparsable or oversized quantities are stored as None, not a 500"""
+        url = reverse("update-recipe", kwargs={"id": self.curry.id})
+        text = "1/0 cup rice\n12345678 g sugar\n1/3 cup milk"
+
+        response = self.client.patch(url, {"ingredients": text}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(self.curry.ingredient_items.values_list("name", "quantity", "unit")),
+            [
+                ("rice", None, "cup"),
+                ("sugar", None, "g"),
+                ("milk", Decimal("0.333"), "cup"),
+            ],
+        )
+
+    def test_rows_follow_ingredient_edits(self):
+        """Saving new ingredients replaces the recipe's rows"""
+        items = self.satay.ingredient_items
+        self.assertEqual(
+            list(items.values_list("name", flat=True)),
+            ["chicken breast", "peanut butter"],
+        )
+
+        self.satay.ingredients = "Tofu"
+        self.satay.save()
+        self.assertEqual(list(items.values_list("name", flat=True)), ["tofu"])
+
+    def test_include_and_exclude(self):
+        """'chicken, no peanuts' keeps chicken dishes without any peanut"""
+        self.assertEqual(self._filter("chicken"), ["Chicken Salad", "Chicken Satay"])
+        self.assertEqual(self._filter("chicken, no peanuts"), ["Chicken Salad"])
+        self.assertEqual(self._filter("-peanut; -lettuce"), ["Veggie Curry"])
+
+    def test_terms_match_whole_words_only(self):
+        """A term matches whole words: chick is not chicken, chickpea is"""
+        self.assertEqual(self._filter("chick"), [])
+        self.assertEqual(self._filter("chickpea"), ["Veggie Curry"])
+        self.assertEqual(
+            parse_ingredient_filter("Without Nuts, noodles, ,"), (["noodle"], ["nut"])
+        )
+
+    def test_backfill_command_indexes_in_chunks(self):
+        """Rows missing after loaddata are rebuilt chunk by chunk"""
+        RecipeIngredient.objects.all().delete()
+        out = StringIO()
+        call_command("index_recipe_ingredients", "--chunk-size", "2", stdout=out)
+        self.assertIn("Indexed 2 recipes", out.getvalue())
+        self.assertIn("Indexed 6 ingredients of 3 recipes", out.getvalue())
+        self.assertEqual(self._filter("potato"), ["Veggie Curry"])
+
+    def test_filter_uses_name_index(self):
+        """Ingredient lookups are served by the name index"""
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+        plan = RecipeIngredient.objects.filter(name__startswith="chicken ").explain()
+        self.assertIn("recipeingredient_name_idx", plan)
+
+
+class RecipeLibraryTests(TestCase):
+    """Access-level filtering and cursor pages of recipe cards"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.coach = User.objects.create_user(username="coach", password="pass")
+        profile = self.coach.userprofile
+        profile.role = "coach"
+        profile.save()
+        self.silver_user = User.objects.create_user(username="silver", password="p")
+        silver_profile = self.silver_user.userprofile
+        UserProfile.objects.filter(pk=silver_profile.pk).update(level="Silver")
+
+        self.recipes = [
+            Recipe.objects.create(
+                title=f"Recipe {number}",
+                ingredients="Oats",
+                steps="Mix",
+                access_level="gold" if number % 3 == 0 else "silver",
+                user_profile=profile,
+            )
+            for number in range(7)
+        ]
+        for recipe, rating in zip(self.recipes, [4, 4, 5]):
+            RecipeRating.objects.create(
+                recipe=recipe, user_profile=silver_profile, rating=rating
+            )
+
+    def _pages(self, **params):
+        url = reverse("recipe-list")
+        titles, cursor = [], None
+        while True:
+            query = dict(params, page_size=2, **({"cursor": cursor} if cursor else {}))
+            response = self.client.get(url, query)
+            self.assertEqual(response.status_code, 200)
+            titles += [recipe["title"] for recipe in response.data["results"]]
+            cursor = response.data["next_cursor"]
+            if cursor is None:
+                return titles, response.data["results"]
+
+    def test_gold_recipes_are_filtered_for_silver_users(self):
+        """Silver users neither list nor open gold recipes"""
+        self.client.force_login(self.silver_user)
+        response = self.client.get(reverse("recipe-list"))
+        self.assertEqual(
+            {recipe["title"] for recipe in response.data},
+            {"Recipe 1", "Recipe 2", "Recipe 4", "Recipe 5"},
+        )
+        gold = self.recipes[3]
+        response = self.client.get(reverse("recipe-detail", kwargs={"pk": gold.pk}))
+        self.assertEqual(response.status_code, 403)
+
+        self.client.force_login(self.coach)
+        self.assertEqual(len(self.client.get(reverse("recipe-list")).data), 7)
+
+    def test_cursor_pages_walk_every_sort(self):
+        """Each sort pages through every visible recipe exactly once"""
+        self.client.force_login(self.coach)
+        for sort_by in RECIPE_SORTS:
+            unpaginated = self.client.get(reverse("recipe-list"), {"sort_by": sort_by})
+            titles, _ = self._pages(sort_by=sort_by)
+            self.assertEqual(titles, [r["title"] for r in unpaginated.data], sort_by)
+
+        titles, _ = self._pages(sort_by="rating_high", min_rating=4)
+        self.assertEqual(titles, ["Recipe 2", "Recipe 1", "Recipe 0"])
+        titles, _ = self._pages(search="recipe")
+        self.assertEqual(len(titles), 7)
+
+    def test_cards_leave_out_recipe_text(self):
+        """Pages hold cards; the full text stays on the detail endpoint"""
+        self.client.force_login(self.silver_user)
+        _, last_page = self._pages()
+        self.assertNotIn("ingredients", last_page[0])
+        self.assertNotIn("steps", last_page[0])
+        self.assertEqual(last_page[0]["user_profile_username"], "coach")
+
+    def test_listing_query_count_is_constant(self):
+        """Authors are joined in, not loaded per recipe"""
+        self.client.force_login(self.coach)
+        with self.assertNumQueries(4):
+            self.client.get(reverse("recipe-list"), {"page_size": 5})
+        with self.assertNumQueries(4):
+            self.client.get(reverse("recipe-list"))
+
+
+class RecipeDirtyFieldTests(TestCase):
+    """Recipe saves find their changed fields without reading the row"""
+
+    def setUp(self):
+        coach = User.objects.create_user(username="coach", password="pass")
+        self.recipe = Recipe.objects.create(
+            title="Oats",
+            ingredients="Oats",
+            steps="Mix",
+            user_profile=coach.userprofile,
+        )
+        self.recipe = Recipe.objects.get(pk=self.recipe.pk)
+
+    def test_title_edit_is_one_update_and_requeues_the_pdf(self):
+        """No SELECT before the UPDATE; the PDF signal still sees the edit"""
+        Recipe.objects.filter(pk=self.recipe.pk).update(pdf_status="ready")
+        self.recipe.title = "Overnight Oats"
+        with CaptureQueriesContext(connection) as ctx:
+            self.recipe.save()
+        self.assertTrue(ctx.captured_queries[0]["sql"].startswith("UPDATE"))
+        self.assertIn('"title"', ctx.captured_queries[0]["sql"])
+        self.assertNotIn('"steps"', ctx.captured_queries[0]["sql"])
+        self.assertEqual(self.recipe._changed_fields, ["title"])
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.pdf_status, "pending")
+
+    def test_unchanged_and_deferred_saves(self):
+        """Nothing changed, nothing written; deferred fields stay unloaded"""
+        with self.assertNumQueries(0):
+            self.recipe.save()
+
+        recipe = Recipe.objects.only("pk", "ingredients").get(pk=self.recipe.pk)
+        recipe.ingredients = "Oats\nMilk"
+        with CaptureQueriesContext(connection) as ctx:
+            recipe.save()
+        self.assertFalse(
+            any(q["sql"].startswith("SELECT") for q in ctx.captured_queries)
+        )
+        self.assertEqual(recipe.get_dirty_fields(), [])
+        self.assertEqual(recipe.ingredient_items.count(), 2)
@@ -5,59 +5,94 @@ from rest_framework import status
 from django.shortcuts import get_object_or_404
 from django.http import FileResponse, Http404
 from django.utils.text import slugify
-from django.db.models import Avg
 
-from .models import Recipe, RecipeRating
-from .serializers import RecipeSerializer, RecipeRatingSerializer
-from .permissions import CanViewRecipe
+from healthquest_backend.pagination import KeysetPaginator
+from healthquest_backend.images import InvalidImage, original_path, process_upload
+from .ingredients import filter_by_ingredients
+from .models import Recipe, RecipeRating, average_rating_expression
+from .pdf_queue import RETRY_AFTER_SECONDS, queue_pdf_render
+from .search import search_recipes
+from .serializers import (
+    RecipeCardSerializer,
+    RecipeRatingSerializer,
+    RecipeSerializer,
+)
+from .permissions import CanViewRecipe, can_view_gold_recipes
+
+
+# sort_by value -> ordering; rating sorts read the stored aggregates so that
+# they are served by recipe_avg_rating_idx. Every ordering ends with the
+# primary key, so it can be used for keyset pagination.
+RECIPE_SORTS = {
+    "oldest": ("created_at", "id"),
+    "newest": ("-created_at", "-id"),
+    "rating_high": ("-avg_rating", "-created_at", "-id"),
+    "rating_low": ("avg_rating", "-created_at", "-id"),
+    "title_az": ("title", "id"),
+    "title_za": ("-title", "-id"),
+}
+
+
+def _sort_recipes(recipes, sort_by):
+    ordering = RECIPE_SORTS.get(sort_by or "newest", RECIPE_SORTS["newest"])
+    if "avg_rating" in {field.lstrip("-") for field in ordering}:
+        # annotated rather than aliased: cursors read it from the rows
+        recipes = recipes.annotate(avg_rating=average_rating_expression())
+    return recipes.order_by(*ordering)
+
+
+def _visible_recipes(user):
+    """Recipes `user` may see, with the author loaded for the serializers."""
+    recipes = Recipe.objects.select_related("user_profile__user")
+    if not can_view_gold_recipes(user):
+        recipes = recipes.exclude(access_level="gold")
+    return recipes
 
 
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated, CanViewRecipe])
 def recipe_list(request):
-    """GET = list recipes with sorting/filtering, POST = create new recipe"""
+    """
+    GET = list recipes with sorting/filtering, POST = create new recipe.
+    Pass page_size (and then cursor) for cursor pages of recipe cards, which
+    leave out the ingredients and steps.
+    """
     if request.method == "GET":
-        recipes = Recipe.objects.all()
+        recipes = _visible_recipes(request.user)
 
-        # Search by title
+        # Full-text search over title, ingredients and steps
         search = request.query_params.get("search", None)
         if search:
-            recipes = recipes.filter(title__icontains=search)
+            recipes = search_recipes(recipes, search)
+
+        # Filter by ingredients, e.g. ?ingredients=chicken, no peanuts
+        ingredients = request.query_params.get("ingredients")
+        if ingredients:
+            recipes = filter_by_ingredients(recipes, ingredients)
 
         # Filter by minimum rating
         min_rating = request.query_params.get("min_rating", None)
         if min_rating:
             try:
                 min_rating = float(min_rating)
-                # Annotate with average rating and filter
-                recipes = recipes.annotate(avg_rating=Avg("ratings__rating")).filter(
+                recipes = recipes.alias(avg_rating=average_rating_expression()).filter(
                     avg_rating__gte=min_rating
                 )
             except ValueError:
                 pass
 
-        # Sorting
-        sort_by = request.query_params.get("sort_by", "newest")
+        # searches are ordered by relevance unless a sort is asked for
+        sort_by = request.query_params.get("sort_by")
+        if sort_by or not search:
+            recipes = _sort_recipes(recipes, sort_by)
 
-        if sort_by == "oldest":
-            recipes = recipes.order_by("created_at")
-        elif sort_by == "newest":
-            recipes = recipes.order_by("-created_at")
-        elif sort_by == "rating_high":
-            recipes = recipes.annotate(avg_rating=Avg("ratings__rating")).order_by(
-                "avg_rating", "-created_at"
-            )
-        elif sort_by == "rating_low":
-            recipes = recipes.annotate(avg_rating=Avg("ratings__rating")).order_by(
-                "-avg_rating", "-created_at"
+        if KeysetPaginator.is_requested(request):
+            paginator = KeysetPaginator(recipes.query.order_by)
+            page, next_cursor = paginator.paginate(recipes, request)
+            serializer = RecipeCardSerializer(
+                page, many=True, context={"request": request}
             )
-        elif sort_by == "title_az":
-            recipes = recipes.order_by("title")
-        elif sort_by == "title_za":
-            recipes = recipes.order_by("-title")
-        else:
-            # Default to newest
-            recipes = recipes.order_by("-created_at")
+            return paginator.get_paginated_response(serializer.data, next_cursor)
 
         serializer = RecipeSerializer(recipes, many=True, context={"request": request})
         return Response(serializer.data)
@@ -66,10 +101,7 @@ def recipe_list(request):
         user_profile = request.user.userprofile
 
         # Only coaches or gold users can create recipes
-        if (
-            user_profile.role != "coach"
-            and user_profile.get_current_level().level != "Gold"
-        ):
+        if user_profile.role != "coach" and user_profile.level != "Gold":
             return Response(
                 {"detail": "Only coaches and gold users can create recipes."},
                 status=status.HTTP_403_FORBIDDEN,
@@ -86,7 +118,14 @@ def recipe_list(request):
 @permission_classes([IsAuthenticated, CanViewRecipe])
 def recipe_detail(request, pk):
     """GET single recipe"""
-    recipe = get_object_or_404(Recipe, pk=pk)
+    recipe = get_object_or_404(
+        Recipe.objects.select_related("user_profile__user"), pk=pk
+    )
+    if recipe.access_level == "gold" and not can_view_gold_recipes(request.user):
+        return Response(
+            {"detail": "Access denied. Gold level required."},
+            status=status.HTTP_403_FORBIDDEN,
+        )
     serializer = RecipeSerializer(recipe, context={"request": request})
     return Response(serializer.data)
 
@@ -100,17 +139,23 @@ def download_recipe_pdf(request, id):
     except Recipe.DoesNotExist:
         raise Http404("Recipe not found")
 
-    user_profile = request.user.userprofile
-    if (
-        recipe.access_level == "gold"
-        and user_profile.role not in ["coach"]
-        and user_profile.get_current_level().level != "Gold"
-    ):
+    if recipe.access_level == "gold" and not can_view_gold_recipes(request.user):
         return Response({"detail": "Access denied. Gold level required."}, status=403)
 
-    # Generate PDF if missing
-    if not recipe.pdf_file:
-        recipe.create_pdf()
+    # PDFs are rendered by the render_recipe_pdfs worker, never inline
+    if recipe.pdf_status == "failed":
+        return Response(
+            {"detail": "PDF generation failed.", "pdf_status": recipe.pdf_status},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    if recipe.pdf_status != "ready" or not recipe.pdf_file:
+        if recipe.pdf_status == "ready":
+            queue_pdf_render(Recipe.objects.filter(pk=recipe.pk))
+        return Response(
+            {"detail": "PDF is being generated.", "pdf_status": "pending"},
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
 
     return FileResponse(
         recipe.pdf_file.open("rb"),
@@ -138,7 +183,7 @@ def upload_recipe_image(request, id):
     if (
         recipe.user_profile != user_profile
         and user_profile.role != "coach"
-        and user_profile.get_current_level().level != "Gold"
+        and user_profile.level != "Gold"
     ):
         return Response(
             {"detail": "Permission denied. You can only edit your own recipes."},
@@ -152,7 +197,14 @@ def upload_recipe_image(request, id):
         )
 
     safe_name = f"{slugify(recipe.title) or 'recipe'}-{image_file.name}"
-    recipe.image.save(safe_name, image_file, save=True)
+    try:
+        renditions = process_upload(image_file, "recipes/images", name=safe_name)
+    except InvalidImage as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    recipe.image = original_path(renditions)
+    recipe.image_renditions = renditions
+    recipe.save(update_fields=["image", "image_renditions", "updated_at"])
 
     full_url = request.build_absolute_uri(recipe.image.url)
     serializer = RecipeSerializer(recipe)
@@ -184,7 +236,7 @@ def delete_recipe(request, id):
     if (
         recipe.user_profile != user_profile
         and user_profile.role != "coach"
-        and user_profile.get_current_level().level != "Gold"
+        and user_profile.level != "Gold"
     ):
         return Response(
             {"detail": "Permission denied. You can only delete your own recipes."},
@@ -205,7 +257,7 @@ def update_recipe(request, id):
     if (
         recipe.user_profile != user_profile
         and user_profile.role != "coach"
-        and user_profile.get_current_level().level != "Gold"
+        and user_profile.level != "Gold"
     ):
         return Response(
             {"detail": "Permission denied. You can only update your own recipes."},
@@ -230,29 +282,12 @@ def update_recipe(request, id):
 def my_recipes(request):
     """Returns only the recipes created by the authenticated user."""
     user_profile = request.user.userprofile
-    recipes = Recipe.objects.filter(user_profile=user_profile)
+    recipes = Recipe.objects.filter(user_profile=user_profile).select_related(
+        "user_profile__user"
+    )
 
     # Apply same sorting logic
-    sort_by = request.query_params.get("sort_by", "newest")
-
-    if sort_by == "oldest":
-        recipes = recipes.order_by("created_at")
-    elif sort_by == "newest":
-        recipes = recipes.order_by("-created_at")
-    elif sort_by == "rating_high":
-        recipes = recipes.annotate(avg_rating=Avg("ratings__rating")).order_by(
-            "-avg_rating", "-created_at"
-        )
-    elif sort_by == "rating_low":
-        recipes = recipes.annotate(avg_rating=Avg("ratings__rating")).order_by(
-            "avg_rating", "-created_at"
-        )
-    elif sort_by == "title_az":
-        recipes = recipes.order_by("title")
-    elif sort_by == "title_za":
-        recipes = recipes.order_by("-title")
-    else:
-        recipes = recipes.order_by("-created_at")
+    recipes = _sort_recipes(recipes, request.query_params.get("sort_by"))
 
     serializer = RecipeSerializer(recipes, many=True, context={"request": request})
     return Response(serializer.data, status=status.HTTP_200_OK)
@@ -287,6 +322,8 @@ def give_rating(request, id):
         user_profile=user_profile,
         defaults={"rating": rating_value},
     )
+    # the aggregates were updated in the database by recipe.signals
+    recipe.refresh_from_db(fields=["rating_sum", "rating_count"])
 
     return Response(
         {
@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import StoredFile
+
+
+@admin.register(StoredFile)
+class StoredFileAdmin(admin.ModelAdmin):
+    list_display = ["id", "name", "size", "references", "created_at"]
+    search_fields = ["name"]
@@ -0,0 +1,63 @@
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.db.models import F
+
+
+class StoredFile(models.Model):
+    """
+    A content-addressed file in media storage and the number of model rows
+    referencing it. Rows are created by the storage when the file is
+    written; the file is deleted when the last reference is released.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    references = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.references})"
+
+    @classmethod
+    def register(cls, name, size):
+        """Record a newly written file, unreferenced until a row saves it."""
+        cls.objects.bulk_create(
+            [cls(name=name, size=size)],
+            ignore_conflicts=True,
+        )
+
+    @classmethod
+    def acquire(cls, names):
+        """Count one more reference to each of `names`."""
+        if not names:
+            return
+        cls.objects.bulk_create(
+            [cls(name=name) for name in names], ignore_conflicts=True
+        )
+        cls.objects.filter(name__in=names).update(references=F("references") + 1)
+
+    @classmethod
+    def release(cls, names):
+        """
+        Count one reference less to each of `names` and delete the files
+        nothing references any more once the transaction commits.
+        """
+        if not names:
+            return
+        with transaction.atomic():
+            cls.objects.filter(name__in=names).update(references=F("references") - 1)
+            unused = cls.objects.filter(name__in=names, references__lte=0)
+            orphaned = list(unused.values_list("name", flat=True))
+            unused.delete()
+        if orphaned:
+            transaction.on_commit(lambda: _delete_files(orphaned))
+
+
+def _delete_files(names):
+    # an upload of the same content may have registered the name again
+    reused = set(
+        StoredFile.objects.filter(name__in=names).values_list("name", flat=True)
+    )
+    for name in names:
+        if name not in reused:
+            default_storage.delete(name)
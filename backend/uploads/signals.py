@@ -0,0 +1,73 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_init, post_save
+
+from .models import StoredFile
+from .storage import is_content_addressed
+
+# model -> (file fields, rendition map fields) that reference stored files
+REFERENCING_FIELDS = {
+    "member.FoodPost": (("image",), ("image_renditions",)),
+    "recipe.Recipe": (("image", "pdf_file"), ("image_renditions",)),
+    "users.UserProfile": (("photo",), ("photo_renditions",)),
+    "coach.Coach": (("certification_doc",), ()),
+}
+
+
+def _field_names(value, is_rendition_map):
+    if is_rendition_map:
+        return {
+            path
+            for entry in (value or {}).values()
+            if isinstance(entry, dict)
+            for path in entry.values()
+            if isinstance(path, str)
+        }
+    name = getattr(value, "name", value)
+    return {name} if name else set()
+
+
+def referenced_names(instance):
+    """
+    {field: names of the stored files it references} for the fields loaded
+    on `instance`; deferred fields are left out instead of being fetched.
+    """
+    file_fields, rendition_fields = REFERENCING_FIELDS[instance._meta.label]
+    loaded = instance.__dict__
+    names = {}
+    for fields, is_rendition_map in ((file_fields, False), (rendition_fields, True)):
+        for field in fields:
+            if field in loaded:
+                names[field] = {
+                    name
+                    for name in _field_names(loaded[field], is_rendition_map)
+                    if is_content_addressed(name)
+                }
+    return names
+
+
+def remember_references(sender, instance, **kwargs):
+    instance._stored_file_names = referenced_names(instance)
+
+
+def update_references(sender, instance, created, **kwargs):
+    """Count the files a save started referencing, release the ones it dropped."""
+    before = {} if created else getattr(instance, "_stored_file_names", {})
+    now = referenced_names(instance)
+    fields = now.keys() if created else now.keys() & before.keys()
+
+    old = set().union(*(before.get(field, set()) for field in fields))
+    new = set().union(*(now[field] for field in fields))
+    StoredFile.acquire(new - old)
+    StoredFile.release(old - new)
+    instance._stored_file_names = now
+
+
+def release_references(sender, instance, **kwargs):
+    StoredFile.release(set().union(*referenced_names(instance).values()))
+
+
+for label in REFERENCING_FIELDS:
+    model = apps.get_model(label)
+    post_init.connect(remember_references, sender=model)
+    post_save.connect(update_references, sender=model)
+    post_delete.connect(release_references, sender=model)
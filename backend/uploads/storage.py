@@ -0,0 +1,69 @@
+"""
+Content-addressed media storage.
+
+Files are stored as ``<folder>/<sha256[:2]>/<sha256><ext>``, where the digest
+is computed while the upload is streamed to disk. Saving content that is
+already stored returns the existing name without writing a second copy, and
+since a name never changes content, the files can be cached forever.
+"""
+
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+CONTENT_ADDRESSED_NAME = re.compile(r"(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.[a-z0-9]+)?$")
+
+
+def is_content_addressed(name):
+    return bool(name and CONTENT_ADDRESSED_NAME.search(str(name)))
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def get_available_name(self, name, max_length=None):
+        # the final name is derived from the content in _save
+        return name
+
+    def _save(self, name, content):
+        from .models import StoredFile
+
+        folder = posixpath.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        os.makedirs(self.location, exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.location, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                if hasattr(content, "seek") and content.seekable():
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+                    size += len(chunk)
+
+            hexdigest = digest.hexdigest()
+            name = posixpath.join(folder, hexdigest[:2], hexdigest + extension)
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                if self.directory_permissions_mode is not None:
+                    os.chmod(
+                        os.path.dirname(full_path), self.directory_permissions_mode
+                    )
+                os.replace(temp_path, full_path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        StoredFile.register(name, size)
+        return name
@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import RequestFactory, TestCase, override_settings
+from uploads.models import StoredFile
+from uploads.views import IMMUTABLE_CACHE_CONTROL, serve_media
+
+
+class ContentAddressedStorageTests(TestCase):
+    """Uploads are stored once per content and deleted with their last row"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.profiles = []
+        for n in range(2):
+            user = User.objects.create_user(username=f"user{n}", password="pass")
+            self.profiles.append(user.userprofile)
+
+    def _save_photo(self, profile, data):
+        profile.photo = default_storage.save("profile_photos/me.jpg", ContentFile(data))
+        profile.save()
+        return profile.photo.name
+
+    def _references(self, name):
+        return StoredFile.objects.get(name=name).references
+
+    def test_same_content_is_stored_once(self):
+        """Two uploads of the same bytes share one file named by its hash"""
+        first = self._save_photo(self.profiles[0], b"same photo")
+        second = self._save_photo(self.profiles[1], b"same photo")
+
+        self.assertEqual(first, second)
+        self.assertRegex(first, r"^profile_photos/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$")
+        self.assertEqual(
+            len(os.listdir(os.path.dirname(default_storage.path(first)))), 1
+        )
+        self.assertEqual(self._references(first), 2)
+
+    def test_file_deleted_with_last_reference(self):
+        """Deleting rows releases the file only once nothing references it"""
+        name = self._save_photo(self.profiles[0], b"shared photo")
+        self._save_photo(self.profiles[1], b"shared photo")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profiles[0].delete()
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(self._references(name), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profiles[1].delete()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+
+    def test_replacing_file_releases_previous_one(self):
+        """Saving a row with a new file releases the one it replaced"""
+        old = self._save_photo(self.profiles[0], b"old photo")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            new = self._save_photo(self.profiles[0], b"new photo")
+
+        self.assertNotEqual(old, new)
+        self.assertFalse(default_storage.exists(old))
+        self.assertEqual(self._references(new), 1)
+
+    def test_content_addressed_files_served_immutable(self):
+        """Hashed names get a long-lived immutable Cache-Control header"""
+        name = self._save_photo(self.profiles[0], b"cached photo")
+        legacy = default_storage.path("profile_photos/legacy.jpg")
+        with open(legacy, "wb") as f:
+            f.write(b"legacy photo")
+        factory = RequestFactory()
+
+        response = serve_media(factory.get(f"/media/{name}"), name)
+        legacy_response = serve_media(
+            factory.get("/media/profile_photos/legacy.jpg"),
+            "profile_photos/legacy.jpg",
+        )
+
+        self.assertEqual(response["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+        self.assertNotIn("Cache-Control", legacy_response)
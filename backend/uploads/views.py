@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.views.static import serve
+
+from .storage import is_content_addressed
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def serve_media(request, path):
+    """
+    Serve a media file. Content-addressed names never change content, so
+    browsers and CDNs may cache them for good.
+    """
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if is_content_addressed(path):
+        response["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
@@ -1,6 +1,12 @@
 from django.contrib import admin
 
-from .models import UserProfile, UserLevel, FitnessGoal
+from .models import (
+    PROFILE_MANAGED_FIELDS,
+    FitnessGoal,
+    UserLevel,
+    UserProfile,
+    XPEvent,
+)
 
 
 @admin.register(UserProfile)
@@ -9,7 +15,17 @@ class UserProfileAdmin(admin.ModelAdmin):
     list_filter = ["role", "gender", "location"]
     search_fields = ["user__username", "user__email", "location"]
     ordering = ["-created_at"]
+    # copied from the current UserLevel (UserLevel.sync_profile) or bumped
+    # by UserProfile.goal_inputs_changed
+    readonly_fields = PROFILE_MANAGED_FIELDS
 
 
 admin.site.register(UserLevel)
 admin.site.register(FitnessGoal)
+
+
+@admin.register(XPEvent)
+class XPEventAdmin(admin.ModelAdmin):
+    list_display = ["user_profile", "source_type", "source_id", "amount", "created_at"]
+    list_filter = ["source_type"]
+    search_fields = ["user_profile__user__username"]
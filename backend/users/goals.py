@@ -0,0 +1,53 @@
+"""
+Fitness goal evaluation.
+All of a user's goals are checked against one GoalSnapshot, read from the
+UserDailyActivity rollup in a single aggregate query, and only when
+UserProfile.goal_inputs_version or the level changed since the last check.
+"""
+
+from typing import NamedTuple
+
+from django.db.models import Sum
+
+
+class GoalSnapshot(NamedTuple):
+    completions: int
+    minutes: int
+    level_rank: int
+
+
+# goal_type -> predicate over a GoalSnapshot
+GOAL_RULES = {
+    "lose_weight": lambda s: s.completions >= 5,
+    "build_muscle": lambda s: s.completions >= 10,
+    "improve_endurance": lambda s: s.minutes >= 500,
+    "general_fitness": lambda s: s.level_rank >= 1 and s.completions >= 5,
+    "increase_flexibility": lambda s: s.completions >= 15,
+}
+
+
+def take_snapshot(user_level):
+    """Read the counters every goal rule depends on."""
+    from workout.models import UserDailyActivity
+
+    totals = UserDailyActivity.objects.filter(
+        user_profile=user_level.user_profile_id
+    ).aggregate(completions=Sum("completions"), minutes=Sum("minutes"))
+    return GoalSnapshot(
+        completions=totals["completions"] or 0,
+        minutes=totals["minutes"] or 0,
+        level_rank=user_level.level_rank,
+    )
+
+
+def goal_met(goal_type, snapshot):
+    rule = GOAL_RULES.get(goal_type)
+    return bool(rule and rule(snapshot))
+
+
+def evaluation_key(inputs_version, level_rank):
+    """
+    Fingerprint of everything an evaluation depends on: the profile's
+    goal_inputs_version, moved by rollup and goal changes, and the level.
+    """
+    return f"{inputs_version}:{level_rank}"
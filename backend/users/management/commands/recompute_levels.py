@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from users.models import UserLevel
+from workout.xp_rules import get_level_table
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every user's level from their XP after the level table "
+        "changes, and resync profiles and the XP ledger after loaddata"
+    )
+
+    def handle(self, *args, **options):
+        table = get_level_table()
+        with transaction.atomic():
+            changed = UserLevel.recompute_levels()
+            opened = UserLevel.create_opening_balances()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recomputed levels against {len(table)} tiers, {changed} changed, "
+                f"{opened} opening balances created"
+            )
+        )
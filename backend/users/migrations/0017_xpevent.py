@@ -0,0 +1,78 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_opening_balances(apps, schema_editor):
+    UserLevel = apps.get_model("users", "UserLevel")
+    XPEvent = apps.get_model("users", "XPEvent")
+
+    XPEvent.objects.bulk_create(
+        (
+            XPEvent(
+                user_profile_id=level.user_profile_id,
+                source_type="opening_balance",
+                amount=level.xp,
+            )
+            for level in UserLevel.objects.filter(xp__gt=0).iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0016_remove_userachievement_achievement_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="XPEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "source_type",
+                    models.CharField(
+                        choices=[
+                            ("workout_day", "Workout Day Completion"),
+                            ("program_completion", "Program Completion Bonus"),
+                            ("assignment", "Assignment Completion"),
+                            ("opening_balance", "Opening Balance"),
+                            ("adjustment", "Manual Adjustment"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                ("source_id", models.PositiveBigIntegerField(blank=True, null=True)),
+                ("amount", models.IntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "user_profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="xp_events",
+                        to="users.userprofile",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["created_at"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user_profile", "source_type", "source_id"),
+                        name="one_xp_award_per_source",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_opening_balances, migrations.RunPython.noop),
+    ]
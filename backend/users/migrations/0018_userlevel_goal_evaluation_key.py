@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0017_xpevent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userlevel",
+            name="goal_evaluation_key",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+    ]
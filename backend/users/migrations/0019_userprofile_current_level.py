@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:40
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef, Subquery
+
+
+def backfill_current_level(apps, schema_editor):
+    UserProfile = apps.get_model("users", "UserProfile")
+    UserLevel = apps.get_model("users", "UserLevel")
+
+    # same row UserProfile.get_current_level picks
+    current = UserLevel.objects.filter(user_profile=OuterRef("pk")).order_by(
+        "-level_rank"
+    )
+    UserProfile.objects.filter(Exists(current)).update(
+        **{
+            field: Subquery(current.values(field)[:1])
+            for field in ("level", "level_rank", "xp", "goal_achieved")
+        }
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0018_userlevel_goal_evaluation_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="goal_achieved",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="level",
+            field=models.CharField(default="Bronze", max_length=20),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="level_rank",
+            field=models.IntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="xp",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_current_level, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0019_userprofile_current_level"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="photo_renditions",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
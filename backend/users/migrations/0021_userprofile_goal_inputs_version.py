@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0020_userprofile_photo_renditions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userprofile",
+            name="goal_inputs_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,10 +1,18 @@
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce
 from django.db.models.signals import post_save
 from django.core.exceptions import ValidationError
 
+from healthquest_backend.dirty_fields import DirtyFieldsMixin
 
-class UserProfile(models.Model):
+# UserProfile columns copied from the current UserLevel
+PROFILE_LEVEL_FIELDS = ("level", "level_rank", "xp", "goal_achieved")
+# UserProfile columns only written with queryset updates
+PROFILE_MANAGED_FIELDS = PROFILE_LEVEL_FIELDS + ("goal_inputs_version",)
+
+
+class UserProfile(DirtyFieldsMixin, models.Model):
     GENDER_CHOICES = [
         ("M", "Male"),
         ("F", "Female"),
@@ -30,6 +38,8 @@ class UserProfile(models.Model):
 
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     photo = models.ImageField(upload_to="profile_photos/", null=True, blank=True)
+    # healthquest_backend.images.process_upload output for `photo`
+    photo_renditions = models.JSONField(default=dict, blank=True)
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
     height = models.FloatField(null=True, blank=True)  # in cm
     weight = models.FloatField(null=True, blank=True)  # in kg
@@ -43,9 +53,33 @@ class UserProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # copy of the current UserLevel, kept in sync by UserLevel.sync_profile
+    level = models.CharField(max_length=20, default="Bronze")
+    level_rank = models.IntegerField(default=1)
+    xp = models.IntegerField(default=0)
+    goal_achieved = models.BooleanField(default=False)
+    # bumped by goal_inputs_changed whenever the activity rollup or the
+    # fitness goals change, see UserLevel.check_goal_achievement
+    goal_inputs_version = models.PositiveIntegerField(default=0)
+
+    # the level columns and goal_inputs_version are written with queryset
+    # updates only, so a stale profile instance cannot overwrite them
+    dirty_fields_exclude = PROFILE_MANAGED_FIELDS
+
     def __str__(self):
         return f"{self.user.username} - {self.role}"
 
+    @classmethod
+    def goal_inputs_changed(cls, user_profile_ids=None):
+        """
+        Invalidate the last goal evaluation of the given profiles (or of
+        every profile) in one UPDATE.
+        """
+        profiles = cls.objects.all()
+        if user_profile_ids is not None:
+            profiles = profiles.filter(pk__in=user_profile_ids)
+        profiles.update(goal_inputs_version=models.F("goal_inputs_version") + 1)
+
     def can_have_fitness_goals(self):
         """Check if this user can have fitness goals (only normal users can)"""
         return self.role == "normal" or self.role == "member"
@@ -112,6 +146,12 @@ class FitnessGoal(models.Model):
         """Override save to enforce validation"""
         self.clean()
         super().save(*args, **kwargs)
+        UserProfile.goal_inputs_changed([self.user_profile_id])
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        UserProfile.goal_inputs_changed([self.user_profile_id])
+        return result
 
     def __str__(self):
         return f"{self.user_profile.user.username} - {self.goal_type}"
@@ -125,96 +165,265 @@ class UserLevel(models.Model):
     )
     xp = models.IntegerField(default=0)
     goal_achieved = models.BooleanField(default=False)
+    # inputs of the last goal evaluation, see users.goals.evaluation_key
+    goal_evaluation_key = models.CharField(max_length=255, blank=True, default="")
 
     def __str__(self):
         return f"{self.user_profile.user.username} - {self.level} (xp={self.xp})"
 
-    def add_xp(self, amount: int):
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.sync_profile()
+
+    def sync_profile(self):
+        """Copy this level onto UserProfile so level checks need no query."""
+        values = {field: getattr(self, field) for field in PROFILE_LEVEL_FIELDS}
+        UserProfile.objects.filter(pk=self.user_profile_id).update(**values)
+        if UserLevel.user_profile.is_cached(self):
+            for field, value in values.items():
+                setattr(self.user_profile, field, value)
+            self.user_profile.mark_clean(PROFILE_LEVEL_FIELDS)
+
+    @classmethod
+    def recompute_levels(cls):
+        """
+        Re-derive every level from its xp with the current level table, in
+        one UPDATE per table. Returns the number of levels that changed.
+        """
+        from workout.xp_rules import level_case_expressions
+
+        rank, name = level_case_expressions(models.F("xp"))
+        with transaction.atomic():
+            changed = cls.objects.exclude(level_rank=rank, level=name).update(
+                level_rank=rank, level=name
+            )
+            cls.sync_profiles()
+        return changed
+
+    @classmethod
+    def _current_levels(cls, user_profile):
+        # the row UserProfile.get_current_level picks
+        return cls.objects.filter(user_profile=user_profile).order_by("-level_rank")
+
+    @classmethod
+    def sync_profiles(cls):
+        """
+        Copy every current level onto its UserProfile, for rows written
+        without sync_profile (loaddata, queryset updates). Returns the number
+        of profiles that were out of date.
+        """
+        current = cls._current_levels(models.OuterRef("pk"))
+        values = {
+            field: models.Subquery(current.values(field)[:1])
+            for field in PROFILE_LEVEL_FIELDS
+        }
+        stale = (
+            UserProfile.objects.filter(models.Exists(current))
+            .alias(**{f"current_{field}": value for field, value in values.items()})
+            .exclude(
+                **{
+                    field: models.F(f"current_{field}")
+                    for field in PROFILE_LEVEL_FIELDS
+                }
+            )
+        )
+        return stale.update(**values)
+
+    @classmethod
+    def create_opening_balances(cls):
+        """
+        Open the XP ledger of users whose xp was loaded without it (loaddata),
+        as migration 0017 did for existing data. Returns the events created.
+        """
+        current = cls._current_levels(models.OuterRef("user_profile"))
+        levels = cls.objects.filter(
+            xp__gt=0, pk=models.Subquery(current.values("pk")[:1])
+        ).exclude(
+            models.Exists(
+                XPEvent.objects.filter(user_profile=models.OuterRef("user_profile"))
+            )
+        )
+        events = XPEvent.objects.bulk_create(
+            (
+                XPEvent(
+                    user_profile_id=level.user_profile_id,
+                    source_type="opening_balance",
+                    amount=level.xp,
+                )
+                for level in levels.only("user_profile", "xp").iterator()
+            ),
+            batch_size=1000,
+        )
+        return len(events)
+
+    def add_xp(self, amount: int, source_type="adjustment", source_id=None):
         """
         Increase xp by `amount`, recompute level, and save.
+        Awards with a `source_id` are idempotent per (source_type, source_id).
         Returns a tuple: (leveled_up: bool, previous_level_rank, new_level_rank)
         """
-        from workout.xp_rules import level_for_xp
+        return self.award_xp([(source_type, source_id, amount)])
 
-        amount = int(amount or 0)
-        if amount <= 0:
+    def award_xp(self, awards):
+        """
+        Record `awards` — (source_type, source_id, amount) tuples — in the XP
+        ledger and apply their total with one atomic UPDATE that also
+        recomputes the level, so concurrent awards are never lost.
+        Returns a tuple: (leveled_up: bool, previous_level_rank, new_level_rank)
+        """
+        from workout.xp_rules import level_case_expressions, level_for_xp
+
+        awards = [
+            (source_type, source_id, int(amount or 0))
+            for source_type, source_id, amount in awards
+            if int(amount or 0) > 0
+        ]
+        if not awards:
             return (False, self.level_rank, self.level_rank)
 
-        previous_rank = self.level_rank
-        self.xp = max(0, self.xp + amount)
+        with transaction.atomic():
+            keyed = models.Q(pk__in=[])
+            for source_type, source_id, _ in awards:
+                if source_id is not None:
+                    keyed |= models.Q(source_type=source_type, source_id=source_id)
+            already_awarded = set(
+                XPEvent.objects.filter(
+                    keyed, user_profile=self.user_profile_id
+                ).values_list("source_type", "source_id")
+            )
+            events = [
+                XPEvent(
+                    user_profile_id=self.user_profile_id,
+                    source_type=source_type,
+                    source_id=source_id,
+                    amount=amount,
+                )
+                for source_type, source_id, amount in awards
+                if source_id is None or (source_type, source_id) not in already_awarded
+            ]
+            events = XPEvent.insert_new(events)
+            if not events:
+                return (False, self.level_rank, self.level_rank)
+
+            amount = sum(event.amount for event in events)
+            new_xp = models.F("xp") + amount
+            rank, name = level_case_expressions(new_xp)
+            UserLevel.objects.filter(pk=self.pk).update(
+                xp=new_xp, level_rank=rank, level=name
+            )
+            self.refresh_from_db(fields=["xp", "level_rank", "level"])
+            self.sync_profile()
 
-        new_rank, new_name, xp_needed = level_for_xp(self.xp)
-        self.level_rank = new_rank
-        self.level = new_name
-        self.save()
+        previous_rank = level_for_xp(self.xp - amount)[0]
 
         # Check goal achievement after level up
         self.check_goal_achievement()
 
-        return (new_rank != previous_rank, previous_rank, new_rank)
+        return (self.level_rank != previous_rank, previous_rank, self.level_rank)
+
+    def replay_xp(self):
+        """Recompute xp and level from the XP ledger."""
+        from workout.xp_rules import level_case_expressions
+
+        total = models.Subquery(
+            XPEvent.objects.filter(user_profile=self.user_profile_id)
+            .values("user_profile")
+            .annotate(total=models.Sum("amount"))
+            .values("total")
+        )
+        xp = Coalesce(total, 0)
+        rank, name = level_case_expressions(xp)
+        UserLevel.objects.filter(pk=self.pk).update(xp=xp, level_rank=rank, level=name)
+        self.refresh_from_db(fields=["xp", "level_rank", "level"])
+        self.sync_profile()
+        return self.xp
 
     def check_goal_achievement(self):
         """
-        Check if user has achieved their fitness goals based on current stats
+        Check if user has achieved their fitness goals based on current stats.
+        All active goals are evaluated against one snapshot of the user's
+        counters. Unless the profile's goal_inputs_version or the level moved
+        since the last evaluation, nothing beyond that version is read.
         """
-
-        try:
-            active_goals = self.user_profile.fitness_goals.filter(
+        from .goals import evaluation_key, goal_met, take_snapshot
+
+        version = (
+            UserProfile.objects.filter(pk=self.user_profile_id)
+            .values_list("goal_inputs_version", flat=True)
+            .first()
+        )
+        key = evaluation_key(version, self.level_rank)
+        if key == self.goal_evaluation_key:
+            return self.goal_achieved
+
+        goal_types = list(
+            self.user_profile.fitness_goals.filter(
                 end_date__isnull=True  # Ongoing goals
-            )
-
-            if not active_goals.exists():
-                self.goal_achieved = False
-                self.save(update_fields=["goal_achieved"])
-                return False
-
-            goal_achieved = False
-            for goal in active_goals:
-                if self._meets_goal_criteria(goal):
-                    goal_achieved = True
-                    break
-
-            if self.goal_achieved != goal_achieved:
-                self.goal_achieved = goal_achieved
-                self.save(update_fields=["goal_achieved"])
-
-            return goal_achieved
-
-        except Exception as e:
-            print(f"Error in check_goal_achievement: {e}")
-            return False
+            ).values_list("goal_type", flat=True)
+        )
+        snapshot = take_snapshot(self)
+        self.goal_achieved = any(goal_met(g, snapshot) for g in goal_types)
+        self.goal_evaluation_key = key
+        self.save(update_fields=["goal_achieved", "goal_evaluation_key"])
+        return self.goal_achieved
 
     def meets_goal_criteria(self, goal):
         """
         Check if this user level meets specific goal criteria
         """
-        from workout.models import WorkoutDayCompletion
+        from .goals import goal_met, take_snapshot
 
-        completed_workouts = WorkoutDayCompletion.objects.filter(
-            user_profile=self.user_profile
-        ).count()
+        return goal_met(goal.goal_type, take_snapshot(self))
 
-        if goal.goal_type == "lose_weight":
-            return completed_workouts >= 5
 
-        elif goal.goal_type == "build_muscle":
-            return completed_workouts >= 10
+class XPEvent(models.Model):
+    """Append-only ledger of XP awards; UserLevel.xp is the running total."""
 
-        elif goal.goal_type == "improve_endurance":
-            total_duration = (
-                WorkoutDayCompletion.objects.filter(
-                    user_profile=self.user_profile
-                ).aggregate(total_duration=models.Sum("workout_day__duration"))[
-                    "total_duration"
-                ]
-                or 0
-            )
-            return total_duration >= 500
+    SOURCE_CHOICES = [
+        ("workout_day", "Workout Day Completion"),
+        ("program_completion", "Program Completion Bonus"),
+        ("assignment", "Assignment Completion"),
+        ("opening_balance", "Opening Balance"),
+        ("adjustment", "Manual Adjustment"),
+    ]
+
+    user_profile = models.ForeignKey(
+        UserProfile, on_delete=models.CASCADE, related_name="xp_events"
+    )
+    source_type = models.CharField(max_length=30, choices=SOURCE_CHOICES)
+    source_id = models.PositiveBigIntegerField(null=True, blank=True)
+    amount = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
 
-        elif goal.goal_type == "general_fitness":
-            return self.level_rank >= 1 and completed_workouts >= 5
+    class Meta:
+        ordering = ["created_at"]
+        constraints = [
+            # one award per source; awards without a source id are not deduped
+            models.UniqueConstraint(
+                fields=["user_profile", "source_type", "source_id"],
+                name="one_xp_award_per_source",
+            )
+        ]
 
-        elif goal.goal_type == "increase_flexibility":
-            return completed_workouts >= 15
+    def __str__(self):
+        return f"{self.user_profile.user.username} +{self.amount} ({self.source_type})"
 
-        return False
+    @classmethod
+    def insert_new(cls, events):
+        """
+        Insert `events` and return the ones actually inserted. An award
+        another transaction recorded first (a double submit) is skipped
+        instead of failing on one_xp_award_per_source.
+        """
+        unkeyed = [event for event in events if event.source_id is None]
+        inserted = cls.objects.bulk_create(unkeyed)
+        for event in events:
+            if event.source_id is None:
+                continue
+            try:
+                with transaction.atomic():
+                    event.save(force_insert=True)
+            except IntegrityError:
+                continue
+            inserted.append(event)
+        return inserted
@@ -1,6 +1,7 @@
 from django.apps import apps
 from django.contrib.auth.models import User
 from rest_framework import serializers
+from healthquest_backend.images import srcset
 
 
 def get_user_profile_model():
@@ -30,6 +31,7 @@ class UserLevelSerializer(serializers.ModelSerializer):
 
 class UserProfileSerializer(serializers.ModelSerializer):
     photo = serializers.ImageField(use_url=True, required=False, allow_null=True)
+    photo_srcset = serializers.SerializerMethodField()
     fitness_goals = FitnessGoalSerializer(many=True, read_only=True)
     current_goal = serializers.SerializerMethodField()
     current_level = serializers.SerializerMethodField()
@@ -44,6 +46,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
             "gender",
             "location",
             "photo",
+            "photo_srcset",
             "fitness_goals",
             "current_goal",
             "current_level",
@@ -51,6 +54,9 @@ class UserProfileSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["role"]
 
+    def get_photo_srcset(self, obj):
+        return srcset(obj.photo_renditions, obj.photo.name, self.context.get("request"))
+
     def get_current_goal(self, obj):
         """Return the most recent fitness goal type for normal users."""
         if obj.role == "normal" or obj.role == "member":
@@ -60,8 +66,8 @@ class UserProfileSerializer(serializers.ModelSerializer):
         return None  # coaches/members/admins
 
     def get_current_level(self, obj):
-        ul = obj.get_current_level()
-        return UserLevelSerializer(ul).data
+        # read from the profile's copy of the current level
+        return UserLevelSerializer(obj).data
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -1,4 +1,7 @@
 from django.apps import apps
+from django.contrib import admin
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from rest_framework.test import APIClient
@@ -6,6 +9,10 @@ from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from datetime import date, timedelta
 
+from healthquest_backend.dirty_fields import ExcludedFieldChanged
+from healthquest_backend.testing import TemporaryMediaMixin, image_upload
+from users.models import PROFILE_LEVEL_FIELDS, PROFILE_MANAGED_FIELDS, UserProfile
+
 User = get_user_model()
 
 
@@ -137,6 +144,64 @@ class UserInfoTests(TestCase):
         )
 
 
+class ProfileDirtyFieldTests(TestCase):
+    """Profile saves write only the columns that changed"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="pass")
+        self.profile = get_user_profile_model().objects.get(user=self.user)
+
+    def test_unchanged_profile_is_not_written(self):
+        """Saving an untouched profile (e.g. via the User signal) is free"""
+        with self.assertNumQueries(0):
+            self.profile.save()
+        with CaptureQueriesContext(connection) as ctx:
+            self.user.save()
+        self.assertFalse(
+            any(
+                q["sql"].startswith('UPDATE "users_userprofile"')
+                for q in ctx.captured_queries
+            )
+        )
+
+    def test_only_changed_columns_are_updated(self):
+        """A changed field is written with updated_at, without a re-read"""
+        self.profile.weight = 68.5
+        self.profile.photo_renditions["thumb"] = {}
+        self.assertEqual(
+            self.profile.get_dirty_fields(), ["photo_renditions", "weight"]
+        )
+        with self.assertNumQueries(1) as ctx:
+            self.profile.save()
+        sql = ctx.captured_queries[0]["sql"]
+        self.assertIn('"weight"', sql)
+        self.assertIn('"updated_at"', sql)
+        self.assertNotIn('"height"', sql)
+        self.assertEqual(self.profile.get_dirty_fields(), [])
+
+    def test_level_columns_are_not_written_by_plain_saves(self):
+        """Changing a level column and saving raises instead of dropping it"""
+        self.profile.level = "Gold"
+        with self.assertRaises(ExcludedFieldChanged):
+            self.profile.save()
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.level, "Bronze")
+
+    def test_synced_levels_do_not_dirty_the_profile(self):
+        """XP awards update the cached profile without making it dirty"""
+        self.profile.get_current_level().add_xp(1200)
+        self.assertEqual(self.profile.level, "Silver")
+        self.assertEqual(self.profile.get_dirty_fields(), [])
+        self.profile.save()
+
+    def test_admin_shows_level_columns_read_only(self):
+        """The profile admin cannot submit level or goal version changes"""
+        self.assertEqual(
+            set(admin.site._registry[UserProfile].readonly_fields),
+            set(PROFILE_MANAGED_FIELDS),
+        )
+
+
 class SetRoleTests(TestCase):
     """Test select-role endpoint"""
 
@@ -268,7 +333,7 @@ class UpdateProfileTests(UserInfoTests):
         self.assertEqual(response.data["status"], "success")
 
 
-class UploadPhotoTests(TestCase):
+class UploadPhotoTests(TemporaryMediaMixin, TestCase):
     """Test upload-photo endpoint"""
 
     def setUp(self):
@@ -290,11 +355,7 @@ class UploadPhotoTests(TestCase):
         url = reverse("upload-photo")
 
         # Create a test image
-        image = SimpleUploadedFile(
-            "test_photo.jpg",
-            b"fake_image_content",
-            content_type="image/jpeg",
-        )
+        image = image_upload("test_photo.jpg")
 
         response = self.client.post(url, {"photo": image}, format="multipart")
 
@@ -337,21 +398,13 @@ class UploadPhotoTests(TestCase):
         url = reverse("upload-photo")
 
         # Upload first photo
-        image1 = SimpleUploadedFile(
-            "photo1.jpg",
-            b"fake_image_1",
-            content_type="image/jpeg",
-        )
+        image1 = image_upload("photo1.jpg")
         response1 = self.client.post(url, {"photo": image1}, format="multipart")
         self.assertEqual(response1.status_code, 200)
         first_path = response1.data["file_path"]
 
         # Upload second photo
-        image2 = SimpleUploadedFile(
-            "photo2.jpg",
-            b"fake_image_2",
-            content_type="image/jpeg",
-        )
+        image2 = image_upload("photo2.jpg", color="blue")
         response2 = self.client.post(url, {"photo": image2}, format="multipart")
         self.assertEqual(response2.status_code, 200)
         second_path = response2.data["file_path"]
@@ -359,6 +412,21 @@ class UploadPhotoTests(TestCase):
         # Paths should be different
         self.assertNotEqual(first_path, second_path)
 
+    def test_upload_photo_not_an_image(self):
+        """Files Pillow cannot decode are rejected"""
+        self.client.force_login(self.user)
+        image = SimpleUploadedFile(
+            "test_photo.jpg", b"fake_image_content", content_type="image/jpeg"
+        )
+
+        response = self.client.post(
+            reverse("upload-photo"), {"photo": image}, format="multipart"
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.profile.refresh_from_db()
+        self.assertFalse(bool(self.profile.photo))
+
 
 class SetGoalTests(TestCase):
     """Test select-goal endpoint"""
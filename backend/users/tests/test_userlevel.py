@@ -1,8 +1,16 @@
+from datetime import date
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 from django.urls import reverse
-from users.models import UserLevel, UserProfile
+from users.models import FitnessGoal, UserLevel, UserProfile, XPEvent
+from users.serializers import UserProfileSerializer
+from workout.models import UserDailyActivity
+from workout.rollups import apply_activity_delta
 
 User = get_user_model()
 
@@ -227,4 +235,229 @@ class UserLevelsTests(TestCase):
             self.assertIn("level", current_level)
 
 
+class XPLedgerTests(TestCase):
+    """XP awards are recorded in the ledger and applied atomically"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="ledger", email="ledger@example.com", password="testpass123"
+        )
+        self.profile = UserProfile.objects.get(user=self.user)
+        self.level = self.profile.get_current_level()
+
+    def test_award_updates_xp_and_level_in_database(self):
+        """The level is recomputed in the same UPDATE as the xp"""
+        leveled_up, previous, new = self.level.add_xp(1200)
+
+        self.assertEqual((leveled_up, previous, new), (True, 1, 2))
+        stored = UserLevel.objects.get(pk=self.level.pk)
+        self.assertEqual(
+            (stored.xp, stored.level, stored.level_rank), (1200, "Silver", 2)
+        )
+
+    def test_stale_instance_does_not_lose_awards(self):
+        """Two instances loaded before either award both count"""
+        other = UserLevel.objects.get(pk=self.level.pk)
+        self.level.add_xp(600)
+        other.add_xp(600)
+
+        self.assertEqual(other.xp, 1200)
+        self.assertEqual(UserLevel.objects.get(pk=self.level.pk).level, "Silver")
+
+    def test_sourced_award_is_idempotent(self):
+        """Replaying an award for the same source changes nothing"""
+        awards = [("workout_day", 7, 100), ("program_completion", 3, 500)]
+        self.level.award_xp(awards)
+        self.assertEqual(self.level.award_xp(awards), (False, 1, 1))
+
+        self.assertEqual(self.level.xp, 600)
+        self.assertEqual(XPEvent.objects.filter(user_profile=self.profile).count(), 2)
+
+    def test_concurrent_duplicate_award_is_skipped(self):
+        """An award another request records after the duplicate check is skipped"""
+        insert_new = XPEvent.insert_new
+
+        def racing_insert(events):
+            XPEvent.objects.create(
+                user_profile=self.profile,
+                source_type="workout_day",
+                source_id=7,
+                amount=100,
+            )
+            return insert_new(events)
+
+        with mock.patch.object(XPEvent, "insert_new", side_effect=racing_insert):
+            self.level.award_xp([("workout_day", 7, 100), ("assignment", 2, 400)])
+
+        # only the award this request inserted is added to the counter
+        self.assertEqual(self.level.xp, 400)
+        self.assertEqual(XPEvent.objects.filter(user_profile=self.profile).count(), 2)
+
+    def test_replay_rebuilds_xp_from_ledger(self):
+        """replay_xp restores a drifted counter from the event sum"""
+        self.level.award_xp([("workout_day", 1, 700), ("assignment", 2, 400)])
+        UserLevel.objects.filter(pk=self.level.pk).update(xp=0, level="Bronze")
+
+        self.assertEqual(self.level.replay_xp(), 1100)
+        self.assertEqual(self.level.level, "Silver")
+
+
+class GoalEvaluationTests(TestCase):
+    """Goals are evaluated once per snapshot of the rolled-up counters"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="goals", email="goals@example.com", password="testpass123"
+        )
+        self.profile = UserProfile.objects.get(user=self.user)
+        self.profile.role = "normal"
+        self.profile.save()
+        self.level = self.profile.get_current_level()
+        FitnessGoal.objects.create(user_profile=self.profile, goal_type="lose_weight")
+        FitnessGoal.objects.create(
+            user_profile=self.profile, goal_type="improve_endurance"
+        )
+
+    def _log_activity(self, completions, minutes):
+        apply_activity_delta(
+            self.profile.pk,
+            date(2025, 1, UserDailyActivity.objects.count() + 1),
+            completions,
+            0,
+            minutes,
+        )
+
+    def test_all_goals_use_one_snapshot(self):
+        """Goals are read and counters aggregated once for every goal"""
+        self._log_activity(completions=5, minutes=100)
+
+        # version, goals, totals, save, profile copy
+        with self.assertNumQueries(5):
+            self.assertTrue(self.level.check_goal_achievement())
+
+    def test_unchanged_inputs_skip_evaluation(self):
+        """Only the inputs version is read when nothing changed"""
+        self._log_activity(completions=2, minutes=600)
+        self.assertTrue(self.level.check_goal_achievement())
+
+        with self.assertNumQueries(1):
+            self.assertTrue(self.level.check_goal_achievement())
+
+    def test_changed_counters_are_reevaluated(self):
+        """New activity invalidates the previous evaluation"""
+        self._log_activity(completions=2, minutes=60)
+        self.assertFalse(self.level.check_goal_achievement())
+
+        self._log_activity(completions=3, minutes=60)
+        self.assertTrue(self.level.check_goal_achievement())
+        self.assertTrue(UserLevel.objects.get(pk=self.level.pk).goal_achieved)
+
+    def test_changed_goals_are_reevaluated(self):
+        """Adding or removing a goal invalidates the previous evaluation"""
+        FitnessGoal.objects.filter(goal_type="lose_weight").get().delete()
+        self._log_activity(completions=5, minutes=60)
+        self.assertFalse(self.level.check_goal_achievement())
+
+        FitnessGoal.objects.create(user_profile=self.profile, goal_type="lose_weight")
+        self.assertTrue(self.level.check_goal_achievement())
+
+
+class ProfileLevelCopyTests(TestCase):
+    """UserProfile carries a copy of the current level"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="copy", email="copy@example.com", password="testpass123"
+        )
+        self.profile = UserProfile.objects.get(user=self.user)
+        self.level = self.profile.get_current_level()
+
+    def test_award_updates_profile_copy(self):
+        """XP awards are reflected on the profile row"""
+        self.level.add_xp(1500)
+
+        profile = UserProfile.objects.get(pk=self.profile.pk)
+        self.assertEqual((profile.level, profile.level_rank), ("Silver", 2))
+        self.assertEqual(profile.xp, 1500)
+
+    def test_stale_profile_save_keeps_level(self):
+        """Saving an instance loaded before the award keeps the new level"""
+        stale = UserProfile.objects.get(pk=self.profile.pk)
+        self.level.add_xp(6000)
+
+        stale.age = 30
+        stale.save()
+
+        profile = UserProfile.objects.get(pk=self.profile.pk)
+        self.assertEqual((profile.level, profile.age), ("Gold", 30))
+
+    def test_level_gate_needs_no_query(self):
+        """Reading the level from the profile issues no queries"""
+        self.level.add_xp(1500)
+        profile = UserProfile.objects.get(pk=self.profile.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(profile.level, "Silver")
+            self.assertEqual(
+                UserProfileSerializer().get_current_level(profile)["xp"], 1500
+            )
+
+
+class LevelTableTests(TestCase):
+    """Levels come from the compiled level table"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="tiers", email="tiers@example.com", password="testpass123"
+        )
+        self.profile = UserProfile.objects.get(user=self.user)
+        self.level = self.profile.get_current_level()
+        self.level.add_xp(1200)
+
+    def test_user_levels_reports_progress(self):
+        """user-levels returns the next threshold from the level table"""
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("user-levels"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["current"]["level"], "Silver")
+        self.assertEqual(response.data["next_xp"], 5000)
+        self.assertEqual(response.data["progress"]["xp_to_next"], 3800)
+
+    @override_settings(
+        HEALTHQUEST_LEVELS=[(1, "Rookie", 0), (2, "Pro", 500), (3, "Elite", 1000)]
+    )
+    def test_recompute_levels_after_table_change(self):
+        """Existing levels are re-derived from xp with the new table"""
+        call_command("recompute_levels", stdout=StringIO())
+
+        level = UserLevel.objects.get(pk=self.level.pk)
+        self.assertEqual((level.level, level.level_rank), ("Elite", 3))
+        self.assertEqual(UserProfile.objects.get(pk=self.profile.pk).level, "Elite")
+
+    def test_recompute_levels_resyncs_loaded_fixtures(self):
+        """Levels loaded without sync_profile or a ledger are repaired"""
+        user = User.objects.create_user(username="fixture", password="pass")
+        loaded = user.userprofile.get_current_level()
+        # what loaddata leaves behind: no sync_profile, no XPEvent
+        UserLevel.objects.filter(pk=loaded.pk).update(
+            level="Gold", level_rank=3, xp=5000
+        )
+
+        out = StringIO()
+        call_command("recompute_levels", stdout=out)
+        call_command("recompute_levels", stdout=out)
+
+        self.assertIn("1 opening balances created", out.getvalue())
+        self.assertIn("0 opening balances created", out.getvalue())
+        profile = UserProfile.objects.get(user=user)
+        self.assertEqual(
+            (profile.level, profile.level_rank, profile.xp), ("Gold", 3, 5000)
+        )
+        self.assertEqual(
+            list(XPEvent.objects.filter(user_profile=profile).values_list("amount")),
+            [(5000,)],
+        )
+
+
 # Run tests with: python manage.py test users.tests.test_userlevel
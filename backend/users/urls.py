@@ -8,6 +8,7 @@ urlpatterns = [
     path("select-goal/", views.set_goal, name="select-goal"),
     path("update-profile/", views.update_profile, name="update-profile"),
     path("upload-photo/", views.upload_photo, name="upload-photo"),
+    path("user-levels/", views.user_levels, name="user-levels"),
     path("users/", views.all_users, name="all-users"),
     path("delete-account/<int:user_id>/", views.delete_account, name="delete-account"),
 ]
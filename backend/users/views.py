@@ -1,11 +1,18 @@
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from django.apps import apps
 
+from healthquest_backend.images import (
+    InvalidImage,
+    original_path,
+    process_upload,
+    srcset,
+)
+from workout.xp_rules import level_progress
+
 from .serializers import UserProfileSerializer, UserSerializer
 
 User = get_user_model()
@@ -95,13 +102,16 @@ def upload_photo(request):
         return Response({"detail": "No file provided."}, status=400)
 
     photo = request.FILES["photo"]
-    file_path = default_storage.save(
-        f"profile_photos/{photo.name}", ContentFile(photo.read())
-    )
+    try:
+        renditions = process_upload(photo, "profile_photos")
+    except InvalidImage as exc:
+        return Response({"detail": str(exc)}, status=400)
+    file_path = original_path(renditions)
 
     user = request.user
     if hasattr(user, "userprofile"):
         user.userprofile.photo = file_path
+        user.userprofile.photo_renditions = renditions
         user.userprofile.save()
 
     full_url = request.build_absolute_uri(default_storage.url(file_path))
@@ -111,6 +121,7 @@ def upload_photo(request):
             "detail": "Photo uploaded successfully!",
             "file_path": file_path,
             "photo_url": full_url,
+            "photo_srcset": srcset(renditions, file_path, request),
         }
     )
 
@@ -159,22 +170,16 @@ def user_levels(request):
     profile = getattr(request.user, "userprofile", None)
     if not profile:
         return Response({"detail": "Profile not found"}, status=400)
-    current = (
-        profile.get_current_level() if hasattr(profile, "get_current_level") else None
-    )
 
-    next_xp = 1000 if current and current.level_rank == 1 else None
+    progress = level_progress(profile.xp)
     payload = {
-        "current": (
-            {
-                "level": current.level,
-                "level_rank": current.level_rank,
-                "xp": current.xp,
-            }
-            if current
-            else None
-        ),
-        "next_xp": next_xp,
+        "current": {
+            "level": profile.level,
+            "level_rank": profile.level_rank,
+            "xp": profile.xp,
+        },
+        "next_xp": progress["next_xp"],
+        "progress": progress,
     }
     return Response(payload)
 
@@ -1,8 +1,38 @@
 from django.contrib import admin
 
-from .models import WorkoutDay, WorkoutDayCompletion, WorkoutProgram, WorkoutAssignment
+from .models import (
+    UserDailyActivity,
+    WorkoutDay,
+    WorkoutDayCompletion,
+    WorkoutProgram,
+    WorkoutAssignment,
+    WorkoutProgramProgress,
+)
+from .rollups import removing_completions
+
+
+@admin.register(WorkoutProgram)
+class WorkoutProgramAdmin(admin.ModelAdmin):
+    def delete_queryset(self, request, queryset):
+        with removing_completions(WorkoutDay.objects.filter(program__in=queryset)):
+            super().delete_queryset(request, queryset)
+
+
+@admin.register(WorkoutDay)
+class WorkoutDayAdmin(admin.ModelAdmin):
+    def delete_queryset(self, request, queryset):
+        with removing_completions(queryset):
+            super().delete_queryset(request, queryset)
+
+
+@admin.register(WorkoutDayCompletion)
+class WorkoutDayCompletionAdmin(admin.ModelAdmin):
+    def delete_queryset(self, request, queryset):
+        # one Model.delete() per completion keeps the rollups right
+        for completion in queryset:
+            completion.delete()
+
 
-admin.site.register(WorkoutProgram)
-admin.site.register(WorkoutDay)
-admin.site.register(WorkoutDayCompletion)
 admin.site.register(WorkoutAssignment)
+admin.site.register(UserDailyActivity)
+admin.site.register(WorkoutProgramProgress)
@@ -0,0 +1,105 @@
+"""
+User workout analytics.
+All metrics are derived from the per-day UserDailyActivity rollup over the
+analytics window; only the streak may look further back, one bounded chunk
+at a time.
+"""
+
+from datetime import timedelta
+
+from .models import UserDailyActivity
+
+ANALYTICS_WINDOW_DAYS = 30
+STREAK_SCAN_DAYS = 90
+
+ACTIVITY_WINDOWS = (7, 30, 90, 365)
+ACTIVITY_BUCKETS = ("day", "week", "month")
+
+
+def daily_totals(user_profile, start, end):
+    """
+    Return {date: {"count": completions, "xp": xp, "minutes": minutes}} for
+    every day in [start, end] on which the user completed a workout.
+    Reads the UserDailyActivity rollup, one row per active day.
+    """
+    rows = UserDailyActivity.objects.filter(
+        user_profile=user_profile,
+        date__range=(start, end),
+        completions__gt=0,
+    ).values_list("date", "completions", "xp", "minutes")
+    return {
+        day: {"count": count, "xp": xp, "minutes": minutes}
+        for day, count, xp, minutes in rows
+    }
+
+
+def _bucket_start(day, bucket):
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())  # Monday
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def activity_buckets(user_profile, today, days=7, bucket="day"):
+    """
+    Return [(bucket_start, completions), ...] oldest first for the last `days`
+    days, including empty buckets. Built from a single per-day aggregation.
+    """
+    start = today - timedelta(days=days - 1)
+    totals = daily_totals(user_profile, start, today)
+
+    counts = {}
+    day = start
+    while day <= today:
+        key = _bucket_start(day, bucket)
+        counts[key] = counts.get(key, 0) + totals.get(day, {}).get("count", 0)
+        day += timedelta(days=1)
+    return list(counts.items())
+
+
+def current_streak(user_profile, today, active_days, scanned_from):
+    """
+    Count consecutive active days ending today.
+    `active_days` covers [scanned_from, today]; older days are only queried
+    when the streak reaches the start of what has been scanned so far.
+    """
+    streak = 0
+    day = today
+    while active_days:
+        while day >= scanned_from:
+            if day not in active_days:
+                return streak
+            streak += 1
+            day -= timedelta(days=1)
+
+        scanned_from = day - timedelta(days=STREAK_SCAN_DAYS - 1)
+        active_days = daily_totals(user_profile, scanned_from, day)
+    return streak
+
+
+def build_user_analytics(user_profile, today):
+    """Return the analytics payload for `user_profile` as of `today`."""
+    window_start = today - timedelta(days=ANALYTICS_WINDOW_DAYS - 1)
+    days = daily_totals(user_profile, window_start, today)
+
+    # weekly improvement: last 7 days vs the 7 days before
+    week_start = today - timedelta(days=6)
+    prev_week_start = week_start - timedelta(days=7)
+    this_week = sum(v["count"] for d, v in days.items() if d >= week_start)
+    prev_week = sum(
+        v["count"] for d, v in days.items() if prev_week_start <= d < week_start
+    )
+    if prev_week == 0:
+        improvement = 100 if this_week > 0 else 0
+    else:
+        improvement = round(((this_week - prev_week) / prev_week) * 100, 1)
+
+    return {
+        "weeklyImprovement": improvement,
+        "consistency": round((len(days) / ANALYTICS_WINDOW_DAYS) * 100, 1),
+        "xp_last_30_days": sum(v["xp"] for v in days.values()),
+        "completed_this_week": this_week,
+        "completed_prev_week": prev_week,
+        "current_streak": current_streak(user_profile, today, days, window_start),
+    }
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class WorkoutConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "workout"
+
+    def ready(self):
+        # keep the daily activity rollup in sync with completions
+        from . import signals  # noqa: F401
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from workout.rollups import rebuild_daily_activity, rebuild_program_progress
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the UserDailyActivity and WorkoutProgramProgress rollups "
+        "from workout completions"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user-profile",
+            type=int,
+            action="append",
+            dest="user_profiles",
+            help="Only rebuild this user profile id (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_daily_activity(options["user_profiles"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} daily activity rows"))
+
+        written = rebuild_program_progress(options["user_profiles"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {written} program progress rows")
+        )
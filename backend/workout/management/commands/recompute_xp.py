@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from workout.xp_recompute import (
+    RECOMPUTE_CHUNK_SIZE,
+    recompute_awards,
+    recompute_completions,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute stored XP (completions, ledger awards and level totals) "
+        "after the rules in workout.xp_rules change"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would change without writing anything",
+        )
+        parser.add_argument(
+            "--after-id",
+            type=int,
+            default=0,
+            help="Resume after this completion id (printed by an earlier run)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=RECOMPUTE_CHUNK_SIZE,
+            help="Completions fetched and written per chunk",
+        )
+        parser.add_argument(
+            "--show-diff",
+            type=int,
+            default=0,
+            metavar="N",
+            help="Print up to N changed rows",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        self.diff_budget = options["show_diff"]
+        started = time.monotonic()
+
+        if options["after_id"] == 0:
+            result = recompute_awards(dry_run=dry_run)
+            self._show_diffs(result)
+            self.stdout.write(
+                f"Awards: {result.changed} of {result.scanned} changed, "
+                f"xp delta {result.xp_delta:+d}"
+            )
+
+        scanned = changed = xp_delta = 0
+        for result in recompute_completions(
+            after_id=options["after_id"],
+            chunk_size=options["chunk_size"],
+            dry_run=dry_run,
+        ):
+            scanned += result.scanned
+            changed += result.changed
+            xp_delta += result.xp_delta
+            self._show_diffs(result)
+            self.stdout.write(
+                f"Completions through id {result.last_id}: {scanned} scanned, "
+                f"{changed} changed ({time.monotonic() - started:.1f}s)"
+            )
+
+        verb = "Would change" if dry_run else "Changed"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {changed} of {scanned} completions, xp delta {xp_delta:+d}"
+            )
+        )
+
+    def _show_diffs(self, result):
+        for source, pk, old, new in result.diffs[: self.diff_budget]:
+            self.stdout.write(f"  {source} {pk}: {old} -> {new}")
+        self.diff_budget -= min(self.diff_budget, len(result.diffs))
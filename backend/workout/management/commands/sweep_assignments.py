@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from workout.models import WorkoutAssignment
+from workout.rollups import sweep_overdue_assignments
+
+
+class Command(BaseCommand):
+    help = (
+        "Mark assignments past their due date as overdue; run periodically "
+        "(e.g. daily from cron)"
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        moved = sweep_overdue_assignments()
+        elapsed = (time.monotonic() - started) * 1000
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Marked {moved} assignments overdue in {elapsed:.0f}ms")
+        )
+        counts = (
+            WorkoutAssignment.objects.values("status")
+            .annotate(n=Count("id"))
+            .order_by("status")
+        )
+        for row in counts:
+            self.stdout.write(f"  {row['status']}: {row['n']}")
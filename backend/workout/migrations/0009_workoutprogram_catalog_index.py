@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0016_remove_userachievement_achievement_and_more"),
+        ("workout", "0008_alter_workoutassignment_status"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="workoutprogram",
+            index=models.Index(
+                fields=["is_public", "-created_at", "id"],
+                name="workout_program_catalog_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0016_remove_userachievement_achievement_and_more"),
+        ("workout", "0009_workoutprogram_catalog_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="workoutdaycompletion",
+            index=models.Index(
+                fields=["user_profile", "completed_at"],
+                name="workout_completion_user_idx",
+            ),
+        ),
+    ]
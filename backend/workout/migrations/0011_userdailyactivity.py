@@ -0,0 +1,76 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_activity(apps, schema_editor):
+    WorkoutDayCompletion = apps.get_model("workout", "WorkoutDayCompletion")
+    UserDailyActivity = apps.get_model("workout", "UserDailyActivity")
+
+    totals = (
+        WorkoutDayCompletion.objects.annotate(day=TruncDate("completed_at"))
+        .values("user_profile_id", "day")
+        .annotate(
+            completions=Count("id"),
+            xp=Sum("xp_earned"),
+            minutes=Sum("workout_day__duration"),
+        )
+        .order_by()
+    )
+    UserDailyActivity.objects.bulk_create(
+        (
+            UserDailyActivity(
+                user_profile_id=row["user_profile_id"],
+                date=row["day"],
+                completions=row["completions"],
+                xp=row["xp"] or 0,
+                minutes=row["minutes"] or 0,
+            )
+            for row in totals.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0016_remove_userachievement_achievement_and_more"),
+        ("workout", "0010_workoutdaycompletion_user_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserDailyActivity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("completions", models.PositiveIntegerField(default=0)),
+                ("xp", models.IntegerField(default=0)),
+                ("minutes", models.IntegerField(default=0)),
+                (
+                    "user_profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_activity",
+                        to="users.userprofile",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["date"],
+                "unique_together": {("user_profile", "date")},
+            },
+        ),
+        migrations.RunPython(backfill_daily_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_program_progress(apps, schema_editor):
+    WorkoutDayCompletion = apps.get_model("workout", "WorkoutDayCompletion")
+    WorkoutDay = apps.get_model("workout", "WorkoutDay")
+    WorkoutProgramProgress = apps.get_model("workout", "WorkoutProgramProgress")
+
+    total_days = dict(
+        WorkoutDay.objects.values("program_id")
+        .annotate(total=Count("day_number", distinct=True))
+        .values_list("program_id", "total")
+    )
+    totals = (
+        WorkoutDayCompletion.objects.values(
+            "user_profile_id", "workout_day__program_id"
+        )
+        .annotate(completed_days=Count("workout_day__day_number", distinct=True))
+        .order_by()
+    )
+    WorkoutProgramProgress.objects.bulk_create(
+        (
+            WorkoutProgramProgress(
+                user_profile_id=row["user_profile_id"],
+                program_id=row["workout_day__program_id"],
+                completed_days=row["completed_days"],
+                # finished programs already received their bonus
+                bonus_awarded=row["completed_days"]
+                >= total_days.get(row["workout_day__program_id"], 0),
+            )
+            for row in totals.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0016_remove_userachievement_achievement_and_more"),
+        ("workout", "0011_userdailyactivity"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WorkoutProgramProgress",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("completed_days", models.PositiveIntegerField(default=0)),
+                ("bonus_awarded", models.BooleanField(default=False)),
+                (
+                    "program",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="progress",
+                        to="workout.workoutprogram",
+                    ),
+                ),
+                (
+                    "user_profile",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="program_progress",
+                        to="users.userprofile",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("user_profile", "program")},
+            },
+        ),
+        migrations.RunPython(backfill_program_progress, migrations.RunPython.noop),
+    ]
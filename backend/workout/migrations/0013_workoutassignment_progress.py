@@ -0,0 +1,64 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:46
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+
+def backfill_assignment_progress(apps, schema_editor):
+    WorkoutAssignment = apps.get_model("workout", "WorkoutAssignment")
+    WorkoutDay = apps.get_model("workout", "WorkoutDay")
+    WorkoutProgramProgress = apps.get_model("workout", "WorkoutProgramProgress")
+
+    completed = WorkoutProgramProgress.objects.filter(
+        user_profile__member_profile=OuterRef("member"), program=OuterRef("program")
+    ).values("completed_days")[:1]
+    total = (
+        WorkoutDay.objects.filter(program=OuterRef("program"))
+        .order_by()
+        .values("program")
+        .annotate(n=Count("day_number", distinct=True))
+        .values("n")
+    )
+    WorkoutAssignment.objects.update(
+        completed_days=Coalesce(Subquery(completed), Value(0)),
+        total_days=Coalesce(Subquery(total), Value(0)),
+    )
+
+    # WorkoutAssignment.status_expression as of this migration
+    today = django.utils.timezone.localdate()
+    WorkoutAssignment.objects.update(
+        status=Case(
+            When(status="completed", then=Value("completed")),
+            When(
+                total_days__gt=0,
+                completed_days__gte=F("total_days"),
+                then=Value("completed"),
+            ),
+            When(due_date__lt=today, then=Value("overdue")),
+            When(completed_days__gt=0, then=Value("in_progress")),
+            When(status__in=["in_progress", "paused"], then=F("status")),
+            default=Value("assigned"),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("workout", "0012_workoutprogramprogress"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="workoutassignment",
+            name="completed_days",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="workoutassignment",
+            name="total_days",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_assignment_progress, migrations.RunPython.noop),
+    ]
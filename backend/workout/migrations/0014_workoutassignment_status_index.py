@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("member", "0008_rename_coach_foodpostcomment_author"),
+        ("workout", "0013_workoutassignment_progress"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="workoutassignment",
+            index=models.Index(
+                fields=["status", "due_date"], name="assignment_status_due_idx"
+            ),
+        ),
+    ]
@@ -1,12 +1,13 @@
 from django.db import models
 
 
+from healthquest_backend.dirty_fields import DirtyFieldsMixin
 from users.models import UserProfile
 from member.models import Member
 from django.utils import timezone
 
 
-class WorkoutProgram(models.Model):
+class WorkoutProgram(DirtyFieldsMixin, models.Model):
     CATEGORY_CHOICES = [
         ("strength_training", "Strength Training"),
         ("cardio", "Cardio"),
@@ -44,9 +45,25 @@ class WorkoutProgram(models.Model):
         max_length=50, choices=CATEGORY_CHOICES, default="full_body"
     )
 
+    class Meta:
+        indexes = [
+            # public catalogue keyset order: newest first, id as tie-breaker
+            models.Index(
+                fields=["is_public", "-created_at", "id"],
+                name="workout_program_catalog_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.title} (Coach: {self.coach.user.username})"
 
+    def delete(self, *args, **kwargs):
+        """Delete the program, correcting the rollups of its completions."""
+        from .rollups import removing_completions
+
+        with removing_completions(self.days.all()):
+            return super().delete(*args, **kwargs)
+
 
 class WorkoutDay(models.Model):
     WORKOUT_TYPE_CHOICES = [
@@ -89,6 +106,13 @@ class WorkoutDay(models.Model):
     def __str__(self):
         return f"{self.program.title} - Day {self.day_number}"
 
+    def delete(self, *args, **kwargs):
+        """Delete the day, correcting the rollups of its completions."""
+        from .rollups import removing_completions
+
+        with removing_completions(WorkoutDay.objects.filter(pk=self.pk)):
+            return super().delete(*args, **kwargs)
+
 
 class WorkoutDayCompletion(models.Model):
     user_profile = models.ForeignKey(
@@ -104,8 +128,81 @@ class WorkoutDayCompletion(models.Model):
     completed_at = models.DateTimeField(auto_now_add=True)
     xp_earned = models.IntegerField(default=0)
 
+    def delete(self, *args, **kwargs):
+        """
+        Take this completion back out of the rollups. There is deliberately
+        no post_delete receiver: it would turn every cascade from a workout
+        day or program into per-row deletes (see rollups.removing_completions).
+        """
+        from .rollups import record_completions
+
+        result = super().delete(*args, **kwargs)
+        record_completions([self], sign=-1)
+        return result
+
     class Meta:
         unique_together = ("user_profile", "workout_day")
+        indexes = [
+            # per-user activity over a date window (analytics)
+            models.Index(
+                fields=["user_profile", "completed_at"],
+                name="workout_completion_user_idx",
+            ),
+        ]
+
+
+class UserDailyActivity(models.Model):
+    """
+    Per-user, per-day rollup of WorkoutDayCompletion rows.
+    Kept up to date by workout.signals; rebuild with
+    `python manage.py rebuild_daily_activity` after bulk imports.
+    """
+
+    user_profile = models.ForeignKey(
+        UserProfile,
+        on_delete=models.CASCADE,
+        related_name="daily_activity",
+    )
+    date = models.DateField()
+    completions = models.PositiveIntegerField(default=0)
+    xp = models.IntegerField(default=0)
+    minutes = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("user_profile", "date")
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"{self.user_profile.user.username} - {self.date} ({self.completions})"
+
+
+class WorkoutProgramProgress(models.Model):
+    """
+    How many distinct day numbers of a program a user has completed.
+    Maintained incrementally alongside UserDailyActivity (workout.rollups).
+    """
+
+    user_profile = models.ForeignKey(
+        UserProfile,
+        on_delete=models.CASCADE,
+        related_name="program_progress",
+    )
+    program = models.ForeignKey(
+        WorkoutProgram,
+        on_delete=models.CASCADE,
+        related_name="progress",
+    )
+    completed_days = models.PositiveIntegerField(default=0)
+    bonus_awarded = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ("user_profile", "program")
+
+    def __str__(self):
+        return (
+            f"{self.user_profile.user.username} - {self.program.title} "
+            f"({self.completed_days} days)"
+        )
 
 
 class WorkoutAssignment(models.Model):
@@ -134,65 +231,68 @@ class WorkoutAssignment(models.Model):
     due_date = models.DateField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="assigned")
     completed_date = models.DateField(null=True, blank=True)
+    # distinct day numbers of the program done by the member / in the program,
+    # kept current by workout.rollups.refresh_assignments
+    completed_days = models.PositiveIntegerField(default=0)
+    total_days = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ["-assigned_date"]
         unique_together = ("member", "program")
+        indexes = [
+            # status filters and the overdue sweep
+            models.Index(
+                fields=["status", "due_date"], name="assignment_status_due_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.member.user.user.username} → {self.program.title}"
 
     def check_completion(self):
         """Check if all day_numbers are completed."""
-        total_days = self.program.days.values("day_number").distinct().count()
-        completed_days = (
-            WorkoutDayCompletion.objects.filter(
-                user_profile=self.member.user, workout_day__program=self.program
-            )
-            .values("workout_day__day_number")
-            .distinct()
-            .count()
-        )
-
-        if completed_days >= total_days:
+        if self.completed_days >= self.total_days:
             self.status = "completed"
             self.completed_date = timezone.now().date()
             self.save(update_fields=["status", "completed_date"])
             return True
         return False
 
-    def get_status(self):
+    def get_status(self, today=None):
         """
-        Dynamically determine current status of the assignment:
+        Determine the current status of the assignment from its stored
+        progress (status_expression is the same rule in SQL):
         - completed: all days done
         - overdue: due date passed, not completed
-        - in_progress: some days done, not overdue
+        - in_progress: some days done or started, not overdue
         """
-        today = timezone.now().date()
-
-        # Completed check
-        total_days = self.program.days.values("day_number").distinct().count()
-        completed_days = (
-            WorkoutDayCompletion.objects.filter(
-                user_profile=self.member.user,
-                workout_day__program=self.program,
-            )
-            .values("workout_day__day_number")
-            .distinct()
-            .count()
-        )
+        today = today or timezone.now().date()
 
-        # Check completed
-        if completed_days >= total_days and total_days > 0:
+        if self.status == "completed" or (
+            self.total_days > 0 and self.completed_days >= self.total_days
+        ):
             return "completed"
-
-        # Check overdue
         if self.due_date and self.due_date < today:
             return "overdue"
-
-        # Check in progress
-        if completed_days > 0:
+        if self.completed_days > 0:
             return "in_progress"
-
-        # Default pending
+        if self.status in ("in_progress", "paused"):
+            return self.status
         return "assigned"
+
+    @staticmethod
+    def status_expression(today):
+        """get_status as a SQL expression, for set-based status updates."""
+        return models.Case(
+            models.When(status="completed", then=models.Value("completed")),
+            models.When(
+                total_days__gt=0,
+                completed_days__gte=models.F("total_days"),
+                then=models.Value("completed"),
+            ),
+            models.When(due_date__lt=today, then=models.Value("overdue")),
+            models.When(completed_days__gt=0, then=models.Value("in_progress")),
+            models.When(status__in=["in_progress", "paused"], then=models.F("status")),
+            default=models.Value("assigned"),
+            output_field=models.CharField(),
+        )
@@ -0,0 +1,312 @@
+"""
+Maintenance of the completion rollups: UserDailyActivity,
+WorkoutProgramProgress and the progress stored on WorkoutAssignment.
+Completions are folded in incrementally as they are created or deleted;
+cascade deletes go through `removing_completions` (WorkoutProgram.delete()
+and WorkoutDay.delete() use it; queryset deletes have to be wrapped in it),
+and the rebuild_* functions recompute the tables from WorkoutDayCompletion.
+"""
+
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from users.models import UserProfile
+
+from .models import (
+    UserDailyActivity,
+    WorkoutAssignment,
+    WorkoutDay,
+    WorkoutDayCompletion,
+    WorkoutProgramProgress,
+)
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def apply_activity_delta(user_profile_id, day, completions, xp, minutes):
+    """Add (or with negative values, remove) activity for one user and day."""
+    if completions > 0:
+        UserDailyActivity.objects.get_or_create(
+            user_profile_id=user_profile_id, date=day
+        )
+
+    rows = UserDailyActivity.objects.filter(user_profile_id=user_profile_id, date=day)
+    rows.update(
+        completions=F("completions") + completions,
+        xp=F("xp") + xp,
+        minutes=F("minutes") + minutes,
+    )
+    if completions < 0:
+        rows.filter(completions__lte=0).delete()
+    UserProfile.goal_inputs_changed([user_profile_id])
+
+
+def apply_progress_delta(user_profile_id, program_id, day_number, added):
+    """
+    Adjust the completed day count after `added` (negative when deleting)
+    completions of one program day number. A day number counts once, no
+    matter how many workouts it has.
+    """
+    remaining = WorkoutDayCompletion.objects.filter(
+        user_profile_id=user_profile_id,
+        workout_day__program_id=program_id,
+        workout_day__day_number=day_number,
+    ).count()
+
+    progress = WorkoutProgramProgress.objects.filter(
+        user_profile_id=user_profile_id, program_id=program_id
+    )
+    if added > 0 and remaining == added:
+        # first completions for this day number
+        WorkoutProgramProgress.objects.get_or_create(
+            user_profile_id=user_profile_id, program_id=program_id
+        )
+        progress.update(completed_days=F("completed_days") + 1)
+    elif added < 0 and remaining == 0:
+        # recounted rather than decremented: a cascade delete of a day
+        # number's workouts calls this once per removed completion
+        recount_program_progress(progress)
+    else:
+        return
+
+    refresh_assignments(
+        WorkoutAssignment.objects.filter(
+            member__user_id=user_profile_id, program_id=program_id
+        )
+    )
+
+
+def recount_program_progress(progress):
+    """Recompute completed_days of `progress` rows from their completions."""
+    completed = (
+        WorkoutDayCompletion.objects.filter(
+            user_profile=OuterRef("user_profile"),
+            workout_day__program=OuterRef("program"),
+        )
+        .order_by()
+        .values("user_profile")
+        .annotate(n=Count("workout_day__day_number", distinct=True))
+        .values("n")
+    )
+    return progress.update(completed_days=Coalesce(Subquery(completed), Value(0)))
+
+
+def refresh_assignments(assignments, today=None):
+    """
+    Recompute completed_days, total_days and status of `assignments` from
+    WorkoutProgramProgress and the program's days, in two UPDATEs.
+    """
+    today = today or timezone.localdate()
+    completed = WorkoutProgramProgress.objects.filter(
+        user_profile__member_profile=OuterRef("member"), program=OuterRef("program")
+    ).values("completed_days")[:1]
+    total = (
+        WorkoutDay.objects.filter(program=OuterRef("program"))
+        .order_by()
+        .values("program")
+        .annotate(n=Count("day_number", distinct=True))
+        .values("n")
+    )
+    assignments.update(
+        completed_days=Coalesce(Subquery(completed), Value(0)),
+        total_days=Coalesce(Subquery(total), Value(0)),
+    )
+    update_assignment_statuses(assignments, today)
+
+
+def update_assignment_statuses(assignments, today=None):
+    """
+    Set the stored status of `assignments` to WorkoutAssignment.get_status
+    in one UPDATE. Returns the number of assignments whose status changed.
+    """
+    today = today or timezone.localdate()
+    status = WorkoutAssignment.status_expression(today)
+    return assignments.exclude(status=status).update(
+        status=status,
+        completed_date=Case(
+            When(
+                total_days__gt=0,
+                completed_days__gte=F("total_days"),
+                completed_date__isnull=True,
+                then=Value(today),
+            ),
+            default=F("completed_date"),
+        ),
+    )
+
+
+def record_completions(completions, sign=1):
+    """
+    Fold WorkoutDayCompletion instances into the rollups (sign=-1 removes them).
+    Used by the model signals and by code paths that bypass them (bulk_create).
+    """
+    days = {
+        pk: (duration, program_id, day_number)
+        for pk, duration, program_id, day_number in WorkoutDay.objects.filter(
+            pk__in={c.workout_day_id for c in completions}
+        ).values_list("pk", "duration", "program_id", "day_number")
+    }
+
+    deltas = {}
+    day_numbers = {}
+    for completion in completions:
+        duration, program_id, day_number = days.get(
+            completion.workout_day_id, (0, None, None)
+        )
+        completed_at = completion.completed_at or timezone.now()
+        key = (completion.user_profile_id, timezone.localdate(completed_at))
+        count, xp, minutes = deltas.get(key, (0, 0, 0))
+        deltas[key] = (
+            count + 1,
+            xp + (completion.xp_earned or 0),
+            minutes + (duration or 0),
+        )
+        if program_id is not None:
+            key = (completion.user_profile_id, program_id, day_number)
+            day_numbers[key] = day_numbers.get(key, 0) + 1
+
+    for (user_profile_id, day), (count, xp, minutes) in deltas.items():
+        apply_activity_delta(
+            user_profile_id, day, sign * count, sign * xp, sign * minutes
+        )
+    for (user_profile_id, program_id, day_number), count in day_numbers.items():
+        apply_progress_delta(user_profile_id, program_id, day_number, sign * count)
+
+
+@contextmanager
+def removing_completions(days):
+    """
+    Keep the rollups right while `days` (a WorkoutDay queryset) and the
+    completions cascading from them are deleted inside the block. The
+    completions go in one DELETE; the affected users' rollups are then
+    recomputed once instead of once per completion row.
+    """
+    with transaction.atomic():
+        pairs = set(
+            WorkoutDayCompletion.objects.filter(workout_day__in=days)
+            .values_list("user_profile_id", "workout_day__program_id")
+            .distinct()
+        )
+        yield
+        if pairs:
+            users = {user for user, _ in pairs}
+            programs = {program for _, program in pairs}
+            rebuild_daily_activity(users)
+            recount_program_progress(
+                WorkoutProgramProgress.objects.filter(
+                    user_profile_id__in=users, program_id__in=programs
+                )
+            )
+            refresh_assignments(
+                WorkoutAssignment.objects.filter(
+                    member__user_id__in=users, program_id__in=programs
+                )
+            )
+
+
+def sweep_overdue_assignments(today=None):
+    """
+    Move every unfinished assignment past its due date to "overdue" in one
+    UPDATE. Returns the number of assignments moved.
+    """
+    today = today or timezone.localdate()
+    return (
+        WorkoutAssignment.objects.filter(due_date__lt=today)
+        .exclude(status__in=["completed", "overdue"])
+        .update(status="overdue")
+    )
+
+
+def rebuild_daily_activity(user_profile_ids=None):
+    """
+    Recompute the rollup from scratch, for every user or only the given ones.
+    Returns the number of rollup rows written.
+    """
+    completions = WorkoutDayCompletion.objects.all()
+    existing = UserDailyActivity.objects.all()
+    if user_profile_ids is not None:
+        completions = completions.filter(user_profile_id__in=user_profile_ids)
+        existing = existing.filter(user_profile_id__in=user_profile_ids)
+
+    totals = (
+        completions.annotate(day=TruncDate("completed_at"))
+        .values("user_profile_id", "day")
+        .annotate(
+            completions=Count("id"),
+            xp=Sum("xp_earned"),
+            minutes=Sum("workout_day__duration"),
+        )
+        .order_by()
+    )
+
+    written = 0
+    with transaction.atomic():
+        existing.delete()
+        batch = []
+        for row in totals.iterator(chunk_size=REBUILD_BATCH_SIZE):
+            batch.append(
+                UserDailyActivity(
+                    user_profile_id=row["user_profile_id"],
+                    date=row["day"],
+                    completions=row["completions"],
+                    xp=row["xp"] or 0,
+                    minutes=row["minutes"] or 0,
+                )
+            )
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                UserDailyActivity.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        UserDailyActivity.objects.bulk_create(batch)
+        written += len(batch)
+        UserProfile.goal_inputs_changed(user_profile_ids)
+    return written
+
+
+def rebuild_program_progress(user_profile_ids=None):
+    """
+    Recompute completed day counts, and the assignment progress derived from
+    them, from scratch. Bonus flags are kept for rows that still exist.
+    Returns the number of progress rows written.
+    """
+    completions = WorkoutDayCompletion.objects.all()
+    existing = WorkoutProgramProgress.objects.all()
+    if user_profile_ids is not None:
+        completions = completions.filter(user_profile_id__in=user_profile_ids)
+        existing = existing.filter(user_profile_id__in=user_profile_ids)
+
+    totals = (
+        completions.values("user_profile_id", "workout_day__program_id")
+        .annotate(completed_days=Count("workout_day__day_number", distinct=True))
+        .order_by()
+    )
+
+    with transaction.atomic():
+        awarded = set(
+            existing.filter(bonus_awarded=True).values_list(
+                "user_profile_id", "program_id"
+            )
+        )
+        existing.delete()
+        rows = [
+            WorkoutProgramProgress(
+                user_profile_id=row["user_profile_id"],
+                program_id=row["workout_day__program_id"],
+                completed_days=row["completed_days"],
+                bonus_awarded=(
+                    (row["user_profile_id"], row["workout_day__program_id"]) in awarded
+                ),
+            )
+            for row in totals.iterator(chunk_size=REBUILD_BATCH_SIZE)
+        ]
+        WorkoutProgramProgress.objects.bulk_create(rows, batch_size=REBUILD_BATCH_SIZE)
+
+        assignments = WorkoutAssignment.objects.all()
+        if user_profile_ids is not None:
+            assignments = assignments.filter(member__user_id__in=user_profile_ids)
+        refresh_assignments(assignments)
+    return len(rows)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from .models import WorkoutDay, WorkoutProgram, WorkoutAssignment
+from .rollups import removing_completions
 
 
 class WorkoutDaySerializer(serializers.ModelSerializer):
@@ -36,13 +37,17 @@ class WorkoutProgramSerializer(serializers.ModelSerializer):
 
         # overwrite days if sent
         if days_data:
-            instance.days.all().delete()
+            with removing_completions(instance.days.all()):
+                instance.days.all().delete()
             for day_data in days_data:
                 WorkoutDay.objects.create(program=instance, **day_data)
 
         return instance
 
     def get_assigned_member_id(self, obj):
+        # listing querysets annotate the member code up front
+        if hasattr(obj, "assigned_member_code"):
+            return obj.assigned_member_code
         assignment = WorkoutAssignment.objects.filter(program=obj).first()
         return assignment.member.member_id if assignment else None
 
@@ -52,6 +57,32 @@ class WorkoutProgramSerializer(serializers.ModelSerializer):
         return None
 
 
+class WorkoutProgramSummarySerializer(WorkoutProgramSerializer):
+    """Compact catalogue row without the nested days and their video links."""
+
+    days = None
+
+    class Meta:
+        model = WorkoutProgram
+        fields = [
+            "id",
+            "coach",
+            "coach_name",
+            "title",
+            "description",
+            "category",
+            "category_display",
+            "difficulty_level",
+            "level_access",
+            "duration",
+            "is_public",
+            "assigned_member_id",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = fields
+
+
 class WorkoutAssignmentSerializer(serializers.ModelSerializer):
     program = WorkoutProgramSerializer(read_only=True)
     member_name = serializers.CharField(
@@ -61,7 +92,6 @@ class WorkoutAssignmentSerializer(serializers.ModelSerializer):
     coach_name = serializers.CharField(
         source="program.coach.user.username", read_only=True
     )
-    status = serializers.SerializerMethodField()
 
     class Meta:
         model = WorkoutAssignment
@@ -72,12 +102,10 @@ class WorkoutAssignmentSerializer(serializers.ModelSerializer):
             "coach_name",
             "program",
             "status",
+            "completed_days",
+            "total_days",
             "assigned_date",
             "due_date",
             "completed_date",
         ]
         read_only_fields = fields
-
-    def get_status(self, obj):
-        """Return dynamic status based on progress, completion, or overdue state."""
-        return obj.get_status()
@@ -0,0 +1,48 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+from .models import WorkoutAssignment, WorkoutDay, WorkoutDayCompletion
+from .rollups import record_completions, refresh_assignments
+from .xp_rules import get_level_table
+
+
+@receiver(post_save, sender=WorkoutDayCompletion)
+def add_completion_to_daily_activity(sender, instance, created, raw=False, **kwargs):
+    """Fold a new completion into the UserDailyActivity rollup."""
+    # Fixture loading is followed by `rebuild_daily_activity`
+    if created and not raw:
+        record_completions([instance])
+
+
+@receiver(post_save, sender=WorkoutDay)
+@receiver(post_delete, sender=WorkoutDay)
+def refresh_program_assignments(sender, instance, raw=False, **kwargs):
+    """Adding, renumbering or removing days changes assignments' total days."""
+    if not raw:
+        refresh_assignments(
+            WorkoutAssignment.objects.filter(program_id=instance.program_id)
+        )
+
+
+@receiver(post_save, sender=WorkoutAssignment)
+def refresh_saved_assignment(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Fill in the progress of new assignments and of assignments moved to
+    another member or program. Status-only saves are left alone.
+    """
+    if raw or (
+        update_fields is not None and not {"member", "program"} & set(update_fields)
+    ):
+        return
+    refresh_assignments(WorkoutAssignment.objects.filter(pk=instance.pk))
+    instance.refresh_from_db(
+        fields=["completed_days", "total_days", "status", "completed_date"]
+    )
+
+
+@receiver(setting_changed)
+def reload_level_table(sender, setting, **kwargs):
+    """Recompile the level table when tests override HEALTHQUEST_LEVELS."""
+    if setting == "HEALTHQUEST_LEVELS":
+        get_level_table.cache_clear()
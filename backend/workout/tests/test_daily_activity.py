@@ -0,0 +1,147 @@
+from io import StringIO
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
+from workout.models import (
+    UserDailyActivity,
+    WorkoutDay,
+    WorkoutDayCompletion,
+    WorkoutProgram,
+    WorkoutProgramProgress,
+)
+from workout.rollups import removing_completions
+
+User = get_user_model()
+
+
+class UserDailyActivityTests(TestCase):
+    """The daily rollup follows completions and can be rebuilt"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="member", password="pass123")
+        self.profile = self.user.userprofile
+        self.profile.role = "normal"
+        self.profile.save()
+
+        coach_user = User.objects.create_user(username="coach", password="pass123")
+        coach_user.userprofile.role = "coach"
+        coach_user.userprofile.save()
+        self.program = WorkoutProgram.objects.create(
+            coach=coach_user.userprofile, title="Program", description="Rollup"
+        )
+        self.day_1 = WorkoutDay.objects.create(
+            program=self.program, day_number=1, duration=45
+        )
+        self.day_2 = WorkoutDay.objects.create(
+            program=self.program, day_number=2, duration=30
+        )
+
+    def _rollup(self):
+        return list(
+            UserDailyActivity.objects.filter(user_profile=self.profile).values_list(
+                "date", "completions", "xp", "minutes"
+            )
+        )
+
+    def test_created_completions_are_rolled_up(self):
+        """Creating completions increments today's row"""
+        WorkoutDayCompletion.objects.create(
+            user_profile=self.profile, workout_day=self.day_1, xp_earned=45
+        )
+        WorkoutDayCompletion.objects.create(
+            user_profile=self.profile, workout_day=self.day_2, xp_earned=30
+        )
+
+        self.assertEqual(self._rollup(), [(timezone.localdate(), 2, 75, 75)])
+
+    def test_deleted_completions_are_removed(self):
+        """Deleting completions decrements and drops empty rows"""
+        first = WorkoutDayCompletion.objects.create(
+            user_profile=self.profile, workout_day=self.day_1, xp_earned=45
+        )
+        second = WorkoutDayCompletion.objects.create(
+            user_profile=self.profile, workout_day=self.day_2, xp_earned=30
+        )
+
+        first.delete()
+        self.assertEqual(self._rollup(), [(timezone.localdate(), 1, 30, 30)])
+
+        second.delete()
+        self.assertEqual(self._rollup(), [])
+
+    def test_rebuild_command_matches_completions(self):
+        """The rebuild command recomputes rows moved by raw updates"""
+        completion = WorkoutDayCompletion.objects.create(
+            user_profile=self.profile, workout_day=self.day_1, xp_earned=45
+        )
+        WorkoutDayCompletion.objects.create(
+            user_profile=self.profile, workout_day=self.day_2, xp_earned=30
+        )
+        yesterday = timezone.now() - timedelta(days=1)
+        WorkoutDayCompletion.objects.filter(pk=completion.pk).update(
+            completed_at=yesterday
+        )
+
+        out = StringIO()
+        call_command("rebuild_daily_activity", stdout=out)
+
+        self.assertIn("Rebuilt 2 daily activity rows", out.getvalue())
+        self.assertEqual(
+            self._rollup(),
+            [
+                (timezone.localdate(yesterday), 1, 45, 45),
+                (timezone.localdate(), 1, 30, 30),
+            ],
+        )
+
+    def test_deleting_days_removes_completions_in_one_statement(self):
+        """Cascades keep the fast delete; rollups are recomputed once"""
+        other = User.objects.create_user(username="other", password="pass123")
+        for profile in (self.profile, other.userprofile):
+            for day in (self.day_1, self.day_2):
+                WorkoutDayCompletion.objects.create(
+                    user_profile=profile, workout_day=day, xp_earned=10
+                )
+        progress = WorkoutProgramProgress.objects.get(
+            user_profile=self.profile, program=self.program
+        )
+        self.assertEqual(progress.completed_days, 2)
+
+        days = WorkoutDay.objects.filter(pk=self.day_2.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            with removing_completions(days):
+                days.delete()
+
+        completion_deletes = [
+            q
+            for q in ctx.captured_queries
+            if q["sql"].startswith('DELETE FROM "workout_workoutdaycompletion"')
+        ]
+        self.assertEqual(len(completion_deletes), 1)
+        # a fast delete by day, not a SELECT of every row and a delete by id
+        self.assertIn('"workout_day_id" IN', completion_deletes[0]["sql"])
+        self.assertEqual(self._rollup(), [(timezone.localdate(), 1, 10, 45)])
+        progress.refresh_from_db()
+        self.assertEqual(progress.completed_days, 1)
+
+    def test_admin_deletes_correct_the_rollups(self):
+        """Django admin deletes of days and programs go through the rollups"""
+        for day in (self.day_1, self.day_2):
+            WorkoutDayCompletion.objects.create(
+                user_profile=self.profile, workout_day=day, xp_earned=10
+            )
+
+        day_admin = admin.site._registry[WorkoutDay]
+        day_admin.delete_model(None, self.day_2)
+        self.assertEqual(self._rollup(), [(timezone.localdate(), 1, 10, 45)])
+
+        program_admin = admin.site._registry[WorkoutProgram]
+        program_admin.delete_queryset(None, WorkoutProgram.objects.all())
+        self.assertEqual(self._rollup(), [])
+        self.assertFalse(WorkoutProgramProgress.objects.exists())
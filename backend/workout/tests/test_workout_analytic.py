@@ -6,6 +6,8 @@ from datetime import timedelta
 from rest_framework.test import APIClient
 from rest_framework import status
 from workout.models import WorkoutDayCompletion, WorkoutProgram, WorkoutDay
+from workout.analytics import activity_buckets, build_user_analytics
+from workout.rollups import rebuild_daily_activity
 from coach.models import Coach
 
 
@@ -119,6 +121,9 @@ class AnalyticsTests(TestCase):
             ).replace(tzinfo=timezone.get_current_timezone())
         )
 
+        # Raw updates bypass the rollup signals, rebuild like a data import
+        rebuild_daily_activity([self.normal_profile.id])
+
         # Refresh from DB to get new value
         comp1.refresh_from_db()
         self.assertEqual(comp1.completed_at.date(), yesterday)
@@ -138,3 +143,101 @@ class AnalyticsTests(TestCase):
 
         self.assertEqual(analytics["xp_last_30_days"], 60)
         self.assertEqual(analytics["current_streak"], 2)
+
+
+class AnalyticsEngineTests(TestCase):
+    """Analytics come from one grouped query; streaks scan in bounded chunks"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="streaker", password="pass123", email="streak@example.com"
+        )
+        self.profile = self.user.userprofile
+        self.profile.role = "normal"
+        self.profile.save()
+
+        coach_user = User.objects.create_user(username="coach", password="pass123")
+        coach_user.userprofile.role = "coach"
+        coach_user.userprofile.save()
+        self.program = WorkoutProgram.objects.create(
+            coach=coach_user.userprofile,
+            title="Long Program",
+            description="Many days",
+            difficulty_level="easy",
+        )
+        self.today = timezone.localdate()
+
+    def _complete_on(self, days_ago, xp=10):
+        """Create a completion dated `days_ago` days before today."""
+        day = WorkoutDay.objects.create(
+            program=self.program, day_number=self.program.days.count() + 1
+        )
+        completion = WorkoutDayCompletion.objects.create(
+            user_profile=self.profile, workout_day=day, xp_earned=xp
+        )
+        completed_at = timezone.now() - timedelta(days=days_ago)
+        WorkoutDayCompletion.objects.filter(pk=completion.pk).update(
+            completed_at=completed_at
+        )
+        rebuild_daily_activity([self.profile.id])
+
+    def test_metrics_use_single_query(self):
+        """All metrics for a normal history are computed with one query"""
+        for days_ago in (0, 0, 1, 3, 8, 9, 40):
+            self._complete_on(days_ago)
+
+        with self.assertNumQueries(1):
+            analytics = build_user_analytics(self.profile, self.today)
+
+        self.assertEqual(analytics["completed_this_week"], 4)
+        self.assertEqual(analytics["completed_prev_week"], 2)
+        self.assertEqual(analytics["weeklyImprovement"], 100.0)
+        self.assertEqual(analytics["xp_last_30_days"], 60)
+        self.assertEqual(analytics["consistency"], round(5 / 30 * 100, 1))
+        self.assertEqual(analytics["current_streak"], 2)
+
+    def test_streak_longer_than_window(self):
+        """A streak past the 30 day window scans one more bounded chunk"""
+        for days_ago in range(45):
+            self._complete_on(days_ago)
+
+        with self.assertNumQueries(2):
+            analytics = build_user_analytics(self.profile, self.today)
+
+        self.assertEqual(analytics["current_streak"], 45)
+        self.assertEqual(analytics["consistency"], 100.0)
+
+    def test_weekly_activity_single_query(self):
+        """Seven days of activity come from one grouped query"""
+        for days_ago in (0, 0, 2, 6, 7):
+            self._complete_on(days_ago)
+
+        with self.assertNumQueries(1):
+            buckets = activity_buckets(self.profile, self.today)
+
+        self.assertEqual(len(buckets), 7)
+        self.assertEqual(buckets[-1], (self.today, 2))
+        self.assertEqual(sum(count for _, count in buckets), 4)
+
+    def test_activity_window_and_buckets(self):
+        """Longer windows are grouped into week or month buckets"""
+        for days_ago in range(0, 90, 10):
+            self._complete_on(days_ago)
+        client = APIClient()
+        client.force_login(self.user)
+        url = reverse("weekly-activity")
+
+        response = client.get(url, {"days": 90, "bucket": "week"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(len(response.data), (13, 14))
+        self.assertEqual(sum(b["count"] for b in response.data), 9)
+        self.assertEqual(max(b["height"] for b in response.data), 100)
+
+        response = client.get(url, {"days": 365, "bucket": "month"})
+        self.assertIn(len(response.data), (12, 13))
+        self.assertEqual(sum(b["count"] for b in response.data), 9)
+
+        response = client.get(url, {"days": 14})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = client.get(url, {"bucket": "year"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,5 +1,10 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
@@ -11,6 +16,7 @@ from workout.models import (
     WorkoutProgram,
     WorkoutDay,
 )
+from workout.rollups import update_assignment_statuses
 from member.models import Member, CoachMemberRelationship
 from coach.models import Coach
 
@@ -226,3 +232,84 @@ class WorkoutAssignmentTests(TestCase):
         )
 
         self.assertTrue(WorkoutProgram.objects.filter(id=self.program.id).exists())
+
+    def test_progress_is_stored_as_days_are_completed(self):
+        """Completions update the stored progress and status"""
+        self.assertEqual(self.workout_assignment.total_days, 2)
+
+        WorkoutDayCompletion.objects.create(
+            user_profile=self.member_profile, workout_day=self.workout_day_1
+        )
+        self.workout_assignment.refresh_from_db()
+        self.assertEqual(self.workout_assignment.completed_days, 1)
+        self.assertEqual(self.workout_assignment.status, "in_progress")
+
+        WorkoutDayCompletion.objects.create(
+            user_profile=self.member_profile, workout_day=self.workout_day_2
+        )
+        self.workout_assignment.refresh_from_db()
+        self.assertEqual(self.workout_assignment.status, "completed")
+        self.assertEqual(self.workout_assignment.completed_date, timezone.localdate())
+
+    def test_program_edit_updates_total_days(self):
+        """Adding a day to the program reopens the day count"""
+        WorkoutDay.objects.create(program=self.program, day_number=3, duration=20)
+
+        self.workout_assignment.refresh_from_db()
+        self.assertEqual(self.workout_assignment.total_days, 3)
+
+    def test_overdue_status_is_applied_in_bulk(self):
+        """update_assignment_statuses flips past-due assignments"""
+        WorkoutAssignment.objects.filter(pk=self.workout_assignment.pk).update(
+            due_date=timezone.localdate() - timedelta(days=1)
+        )
+
+        changed = update_assignment_statuses(WorkoutAssignment.objects.all())
+
+        self.assertEqual(changed, 1)
+        self.workout_assignment.refresh_from_db()
+        self.assertEqual(self.workout_assignment.status, "overdue")
+
+    def test_listing_query_count_independent_of_assignments(self):
+        """Listing assignments does not query per row"""
+        self.client.force_login(self.coach_user)
+        url = reverse("list-my-assignments")
+        self.client.get(url)  # warm up the session and level rows
+        with CaptureQueriesContext(connection) as one:
+            self.client.get(url)
+
+        for i in range(5):
+            program = WorkoutProgram.objects.create(
+                coach=self.coach_profile,
+                title=f"Extra {i}",
+                description="Extra program",
+                is_public=False,
+            )
+            WorkoutDay.objects.create(program=program, day_number=1, duration=30)
+            member_user = User.objects.create_user(username=f"m{i}", password="pw")
+            member = Member.objects.create(
+                user=member_user.userprofile, member_id=f"M-1000{i}"
+            )
+            WorkoutAssignment.objects.create(member=member, program=program)
+
+        with CaptureQueriesContext(connection) as six:
+            response = self.client.get(url)
+        self.assertEqual(len(response.data), 6)
+        self.assertEqual(len(six.captured_queries), len(one.captured_queries))
+
+    def test_sweep_command_marks_overdue_and_filter_uses_it(self):
+        """sweep_assignments stores overdue so ?status= can filter on it"""
+        WorkoutAssignment.objects.filter(pk=self.workout_assignment.pk).update(
+            due_date=timezone.localdate() - timedelta(days=3)
+        )
+        out = StringIO()
+        call_command("sweep_assignments", stdout=out)
+
+        self.assertIn("Marked 1 assignments overdue", out.getvalue())
+        self.assertIn("overdue: 1", out.getvalue())
+
+        url = reverse("list-my-assignments")
+        response = self.client.get(url, {"status": "overdue"})
+        self.assertEqual([a["id"] for a in response.data], [self.workout_assignment.id])
+        response = self.client.get(url, {"status": "assigned,in_progress"})
+        self.assertEqual(response.data, [])
@@ -1,7 +1,16 @@
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 from rest_framework.test import APIClient
-from workout.models import WorkoutProgram, WorkoutDay, WorkoutDayCompletion
+from workout.models import (
+    WorkoutAssignment,
+    WorkoutProgram,
+    WorkoutDay,
+    WorkoutDayCompletion,
+    WorkoutProgramProgress,
+)
+from workout.xp_rules import COMPLETION_BONUS
+from member.models import Member
+from users.models import XPEvent
 
 User = get_user_model()
 
@@ -86,5 +95,102 @@ class WorkoutDayCompletionTest(TestCase):
             "WorkoutDayCompletion record should exist after completion",
         )
 
+    def test_repeat_completion_awards_xp_once(self):
+        """Completing the same day twice only awards XP the first time"""
+        url = f"/api/workout/day/{self.workout_day.id}/complete/"
+        first = self.client.post(url, {}, content_type="application/json").json()
+        second = self.client.post(url, {}, content_type="application/json").json()
+
+        self.assertGreater(first["xp_awarded"], 0)
+        self.assertEqual(second["xp_awarded"], 0)
+        self.assertEqual(second["total_xp"], first["total_xp"])
+        self.assertEqual(
+            WorkoutDayCompletion.objects.filter(user_profile=self.profile).count(), 1
+        )
+
+    def test_day_with_several_workouts_and_program_bonus(self):
+        """All workouts of a day number are completed and the bonus paid once"""
+        extra = WorkoutDay.objects.create(
+            program=self.program, day_number=1, title="Day 1 - Extra", duration=15
+        )
+        day_2 = WorkoutDay.objects.create(
+            program=self.program, day_number=2, title="Day 2", duration=30
+        )
+
+        url = f"/api/workout/day/{extra.id}/complete/"
+        data = self.client.post(url, {}, content_type="application/json").json()
+        # (45 + 15) minutes at medium difficulty
+        self.assertEqual(data["xp_awarded"], 120)
+        self.assertEqual(data["total_xp"], 120)
+
+        progress = WorkoutProgramProgress.objects.get(
+            user_profile=self.profile, program=self.program
+        )
+        self.assertEqual(progress.completed_days, 1)
+        self.assertFalse(progress.bonus_awarded)
+
+        url = f"/api/workout/day/{day_2.id}/complete/"
+        data = self.client.post(url, {}, content_type="application/json").json()
+        self.assertEqual(data["xp_awarded"], 60)
+        self.assertEqual(data["total_xp"], 120 + 60 + COMPLETION_BONUS)
+
+        progress.refresh_from_db()
+        self.assertEqual(progress.completed_days, 2)
+        self.assertTrue(progress.bonus_awarded)
+
+    def test_editing_days_after_completing_a_day_with_several_workouts(self):
+        """Replacing a program's days recounts progress instead of going negative"""
+        WorkoutDay.objects.create(
+            program=self.program, day_number=1, title="Day 1 - Extra", duration=15
+        )
+        WorkoutDay.objects.create(
+            program=self.program, day_number=2, title="Day 2", duration=30
+        )
+        url = f"/api/workout/day/{self.workout_day.id}/complete/"
+        self.client.post(url, {}, content_type="application/json")
+
+        self.client.force_login(self.coach_user)
+        response = self.client.patch(
+            f"/api/workout/programs/{self.program.id}/update/",
+            {"days": [{"day_number": 1, "title": "New Day 1", "duration": 20}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        progress = WorkoutProgramProgress.objects.get(
+            user_profile=self.profile, program=self.program
+        )
+        self.assertEqual(progress.completed_days, 0)
+        self.assertFalse(WorkoutDayCompletion.objects.exists())
+
+    def test_member_with_assignment_gets_the_program_bonus(self):
+        """Finishing an assigned program pays the bonus and completes it"""
+        self.profile.role = "member"
+        self.profile.save()
+        member = Member.objects.create(
+            user=self.profile, member_id="M-00001", status="approved"
+        )
+        self.program.difficulty_level = "easy"
+        self.program.save()
+        self.workout_day.duration = 10
+        self.workout_day.save()
+        assignment = WorkoutAssignment.objects.create(
+            member=member, program=self.program, status="assigned"
+        )
+
+        url = f"/api/workout/day/{self.workout_day.id}/complete/"
+        data = self.client.post(url, {}, content_type="application/json").json()
+
+        self.assertEqual(data["xp_awarded"], 10)
+        self.assertEqual(data["total_xp"], 10 + COMPLETION_BONUS)
+        assignment.refresh_from_db()
+        self.assertEqual(assignment.status, "completed")
+        self.assertEqual(
+            XPEvent.objects.filter(
+                user_profile=self.profile, source_type="program_completion"
+            ).count(),
+            1,
+        )
+
 
 # in backend : python manage.py test workout
@@ -0,0 +1,215 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from workout.models import WorkoutProgram, WorkoutDay, WorkoutAssignment
+from workout.serializers import WorkoutProgramSerializer
+from workout.views import _with_listing_relations
+from member.models import Member
+from users.models import FitnessGoal
+
+User = get_user_model()
+
+
+class WorkoutProgramListingQueryTests(TestCase):
+    """Listing workout programs must not issue queries per program"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+        # Create coach user
+        self.coach_user = User.objects.create_user(
+            username="coach", password="coachpass", email="coach@example.com"
+        )
+        self.coach_profile = self.coach_user.userprofile
+        self.coach_profile.role = "coach"
+        self.coach_profile.save()
+
+        # Create normal user with a goal so goal ordering is exercised
+        self.normal_user = User.objects.create_user(
+            username="normal_user", password="pass123", email="normal@example.com"
+        )
+        self.normal_profile = self.normal_user.userprofile
+        self.normal_profile.role = "normal"
+        self.normal_profile.save()
+        FitnessGoal.objects.create(
+            user_profile=self.normal_profile, goal_type="lose_weight"
+        )
+
+        # Create member with an assigned private program
+        self.member_user = User.objects.create_user(
+            username="member", password="pass123", email="member@example.com"
+        )
+        self.member_profile = self.member_user.userprofile
+        self.member_profile.role = "member"
+        self.member_profile.save()
+        self.member = Member.objects.create(
+            user=self.member_profile, member_id="M-00001", status="approved"
+        )
+        self.private_program = self._create_programs(1, is_public=False)[0]
+        WorkoutAssignment.objects.create(
+            member=self.member, program=self.private_program
+        )
+
+        # Level rows are created lazily on first read; create them up front
+        for profile in (self.normal_profile, self.member_profile):
+            profile.get_current_level()
+
+    def _create_programs(self, count, is_public=True):
+        programs = []
+        for i in range(count):
+            program = WorkoutProgram.objects.create(
+                coach=self.coach_profile,
+                title=f"Program {i}",
+                description="Listing test program",
+                is_public=is_public,
+                category="cardio" if i % 2 else "flexibility",
+            )
+            for day_number in (1, 2):
+                WorkoutDay.objects.create(
+                    program=program, day_number=day_number, duration=30
+                )
+            programs.append(program)
+        return programs
+
+    def _count_listing_queries(self, user):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("workout-programs"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries), response.data
+
+    def test_serializer_listing_uses_constant_queries(self):
+        """Programs, coaches, days and assignments load in two queries"""
+        self._create_programs(10)
+        programs = _with_listing_relations(WorkoutProgram.objects.all())
+
+        with self.assertNumQueries(2):
+            data = WorkoutProgramSerializer(programs, many=True).data
+
+        self.assertEqual(len(data), 11)
+        assigned = [p for p in data if p["id"] == self.private_program.id][0]
+        self.assertEqual(assigned["assigned_member_id"], "M-00001")
+        self.assertEqual(len(assigned["days"]), 2)
+        self.assertEqual(assigned["coach_name"], "coach")
+
+    def test_query_count_independent_of_program_count(self):
+        """Each role pays the same number of queries for 2 or 20 programs"""
+        self._create_programs(2)
+        before = {
+            user.username: self._count_listing_queries(user)[0]
+            for user in (self.coach_user, self.normal_user, self.member_user)
+        }
+
+        self._create_programs(18)
+        for user in (self.coach_user, self.normal_user, self.member_user):
+            count, data = self._count_listing_queries(user)
+            self.assertEqual(count, before[user.username], user.username)
+            self.assertGreaterEqual(len(data), 20)
+
+    def test_member_sees_assigned_member_id(self):
+        """Annotated assignment column matches the per-row lookup"""
+        _, data = self._count_listing_queries(self.member_user)
+        private = [p for p in data if p["id"] == self.private_program.id][0]
+
+        self.assertEqual(
+            private["assigned_member_id"],
+            WorkoutProgramSerializer(self.private_program).data["assigned_member_id"],
+        )
+
+
+class WorkoutProgramCatalogueTests(TestCase):
+    """Cursor pagination, server-side filters and summary rows"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.coach_user = User.objects.create_user(
+            username="coach", password="coachpass", email="coach@example.com"
+        )
+        self.coach_profile = self.coach_user.userprofile
+        self.coach_profile.role = "coach"
+        self.coach_profile.save()
+
+        self.user = User.objects.create_user(
+            username="normal_user", password="pass123", email="normal@example.com"
+        )
+        self.profile = self.user.userprofile
+        self.profile.role = "normal"
+        self.profile.save()
+        FitnessGoal.objects.create(user_profile=self.profile, goal_type="lose_weight")
+
+        categories = ["cardio", "flexibility", "weight_loss", "endurance"]
+        difficulties = ["easy", "medium", "hard"]
+        for i in range(8):
+            program = WorkoutProgram.objects.create(
+                coach=self.coach_profile,
+                title=f"Program {i}",
+                description="Catalogue test program",
+                category=categories[i % 4],
+                difficulty_level=difficulties[i % 3],
+                duration=(i + 1) * 7,
+                is_public=True,
+            )
+            WorkoutDay.objects.create(
+                program=program,
+                day_number=1,
+                duration=30,
+                video_links=["https://youtube.com/watch?v=example"],
+            )
+
+        self.client.force_login(self.user)
+        self.url = reverse("workout-programs")
+
+    def test_cursor_pages_cover_catalogue_in_goal_order(self):
+        """Walking all pages returns every program once, goal matches first"""
+        unpaginated = self.client.get(self.url).data
+        seen = []
+        params = {"page_size": 3}
+        while True:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 3)
+            seen.extend(p["id"] for p in response.data["results"])
+            if not response.data["next_cursor"]:
+                break
+            params = {"page_size": 3, "cursor": response.data["next_cursor"]}
+
+        self.assertEqual(seen, [p["id"] for p in unpaginated])
+        matching = [p["category"] in ("weight_loss", "cardio") for p in unpaginated]
+        self.assertEqual(matching, sorted(matching, reverse=True))
+
+    def test_filters_by_category_difficulty_and_duration(self):
+        """Filters are applied in the queryset"""
+        response = self.client.get(self.url, {"category": "cardio,endurance"})
+        self.assertEqual(
+            {p["category"] for p in response.data}, {"cardio", "endurance"}
+        )
+        self.assertEqual(len(response.data), 4)
+
+        response = self.client.get(self.url, {"difficulty_level": "hard"})
+        self.assertTrue(all(p["difficulty_level"] == "hard" for p in response.data))
+
+        response = self.client.get(self.url, {"duration_min": 14, "duration_max": 28})
+        self.assertEqual(sorted(p["duration"] for p in response.data), [14, 21, 28])
+
+        response = self.client.get(self.url, {"level_access": "gold"})
+        self.assertEqual(response.data, [])
+
+    def test_summary_view_leaves_out_days(self):
+        """Summary rows have no nested days or video links"""
+        response = self.client.get(self.url, {"view": "summary", "page_size": 5})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        row = response.data["results"][0]
+        self.assertNotIn("days", row)
+        self.assertIn("coach_name", row)
+        self.assertIn("assigned_member_id", row)
+
+    def test_invalid_cursor_is_rejected(self):
+        """A tampered cursor returns 400 instead of a server error"""
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,3 +1,5 @@
+import pytest
+
 from .. import xp_rules as xr
 
 
@@ -52,5 +54,29 @@ def test_invalid_difficulty_defaults_to_easy():
     assert xr.calculate_xp(duration=30, difficulty_level="unknown") == 30
 
 
+def test_level_table_bisects_many_tiers():
+    # 40-tier seasonal ladder, 250 xp apart, given out of order
+    table = xr.LevelTable([(r, f"Tier {r}", (r - 1) * 250) for r in range(40, 0, -1)])
+    assert table.level_for_xp(0) == (1, "Tier 1", 250)
+    assert table.level_for_xp(7499) == (30, "Tier 30", 1)
+    assert table.level_for_xp(7500) == (31, "Tier 31", 250)
+    assert table.level_for_xp(10**9) == (40, "Tier 40", None)
+
+
+def test_level_progress_towards_next_level():
+    progress = xr.LevelTable(xr.LEVELS).progress(3000)
+    assert progress["level"] == "Silver" and progress["next_level"] == "Gold"
+    assert progress["next_xp"] == 5000 and progress["xp_to_next"] == 2000
+    assert progress["progress"] == 0.5
+
+    top = xr.LevelTable(xr.LEVELS).progress(9000)
+    assert top["next_xp"] is None and top["progress"] == 1.0
+
+
+def test_level_table_rejects_duplicate_thresholds():
+    with pytest.raises(ValueError):
+        xr.LevelTable([(1, "A", 0), (2, "B", 0)])
+
+
 # Run tests with pytest in backend directory:
 # pytest workout/tests/test_xp.py
@@ -0,0 +1,98 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from users.models import UserLevel, UserProfile, XPEvent
+from workout.models import (
+    UserDailyActivity,
+    WorkoutDay,
+    WorkoutDayCompletion,
+    WorkoutProgram,
+)
+from workout.xp_rules import COMPLETION_BONUS
+
+User = get_user_model()
+
+
+class RecomputeXPCommandTests(TestCase):
+    """recompute_xp rewrites stored XP after a rule change"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="normal_user", password="pass123", email="normal@example.com"
+        )
+        self.profile = self.user.userprofile
+        self.profile.role = "normal"
+        self.profile.save()
+
+        coach = User.objects.create_user(username="coach", password="coachpass")
+        coach.userprofile.role = "coach"
+        coach.userprofile.save()
+        self.program = WorkoutProgram.objects.create(
+            coach=coach.userprofile,
+            title="Recompute Program",
+            description="Program for XP recomputation",
+            difficulty_level="medium",
+            is_public=True,
+        )
+        self.days = [
+            WorkoutDay.objects.create(program=self.program, day_number=n, duration=30)
+            for n in (1, 2)
+        ]
+
+        # 2 x 60 xp for the days plus the completion bonus
+        self.client.force_login(self.user)
+        for day in self.days:
+            self.client.post(reverse("complete-workout-day", args=[day.id]))
+
+    def _xp(self):
+        return UserLevel.objects.get(user_profile=self.profile).xp
+
+    def _recompute(self, *args):
+        out = StringIO()
+        with mock.patch.dict(
+            "workout.xp_rules.DIFFICULTY_MULTIPLIER", {"medium": 3.0}
+        ), mock.patch("workout.xp_recompute.COMPLETION_BONUS", 600):
+            call_command("recompute_xp", *args, stdout=out)
+        return out.getvalue()
+
+    def test_recompute_updates_completions_ledger_and_totals(self):
+        """Completions, daily rollup, ledger and level agree after a rerun"""
+        self.assertEqual(self._xp(), 120 + COMPLETION_BONUS)
+
+        self._recompute("--chunk-size", "1")
+
+        self.assertEqual(
+            list(WorkoutDayCompletion.objects.values_list("xp_earned", flat=True)),
+            [90, 90],
+        )
+        self.assertEqual(self._xp(), 180 + 600)
+        events = XPEvent.objects.filter(user_profile=self.profile)
+        self.assertEqual(sum(e.amount for e in events), 180 + 600)
+        activity = UserDailyActivity.objects.get(user_profile=self.profile)
+        self.assertEqual(activity.xp, 180)
+        self.assertEqual(UserProfile.objects.get(pk=self.profile.pk).xp, 780)
+
+    def test_dry_run_reports_without_writing(self):
+        """--dry-run prints the diff and leaves every table unchanged"""
+        out = self._recompute("--dry-run", "--show-diff", "5")
+
+        self.assertIn("60 -> 90", out)
+        self.assertIn("Would change 2 of 2 completions, xp delta +60", out)
+        self.assertEqual(self._xp(), 120 + COMPLETION_BONUS)
+
+    def test_resume_after_id_skips_earlier_completions(self):
+        """--after-id only recomputes completions after the given id"""
+        first, second = WorkoutDayCompletion.objects.order_by("pk")
+
+        self._recompute("--after-id", str(first.pk))
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.xp_earned, second.xp_earned), (60, 90))
+        self.assertEqual(self._xp(), 150 + COMPLETION_BONUS)
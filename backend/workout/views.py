@@ -1,7 +1,15 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from django.contrib.auth import get_user_model
-from django.db import models
-from django.db.models import Sum, Case, When, IntegerField, Value
+from django.db import models, transaction
+from django.db.models import (
+    Case,
+    When,
+    IntegerField,
+    Value,
+    OuterRef,
+    Subquery,
+    Prefetch,
+)
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import status
@@ -10,13 +18,27 @@ from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from healthquest_backend.pagination import KeysetPaginator
+from users.models import UserLevel
 from .models import (
     WorkoutDay,
     WorkoutDayCompletion,
     WorkoutProgram,
     WorkoutAssignment,
+    WorkoutProgramProgress,
+)
+from .rollups import record_completions, removing_completions
+from .serializers import (
+    WorkoutProgramSerializer,
+    WorkoutProgramSummarySerializer,
+    WorkoutAssignmentSerializer,
+)
+from .analytics import (
+    ACTIVITY_BUCKETS,
+    ACTIVITY_WINDOWS,
+    activity_buckets,
+    build_user_analytics,
 )
-from .serializers import WorkoutProgramSerializer, WorkoutAssignmentSerializer
 from .xp_rules import calculate_xp, COMPLETION_BONUS
 
 
@@ -26,6 +48,15 @@ User = get_user_model()
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def workout_programs(request):
+    """
+    List the programs visible to the current user.
+
+    Optional query params:
+      - category, difficulty_level, level_access: comma-separated values
+      - duration_min / duration_max: program duration range in days
+      - view=summary: compact rows without nested days
+      - cursor / page_size: keyset pagination, returns {results, next_cursor}
+    """
     if request.method == "GET":
         user_profile = request.user.userprofile
 
@@ -36,28 +67,26 @@ def workout_programs(request):
             or user_profile.role == "admin"
         ):
             programs = WorkoutProgram.objects.all()
-            serializer = WorkoutProgramSerializer(programs, many=True)
-            return Response(serializer.data)
+            return _program_listing_response(request, programs)
 
         # coach sees only their own programs
         if user_profile.role == "coach":
             programs = WorkoutProgram.objects.filter(coach=user_profile)
-            serializer = WorkoutProgramSerializer(programs, many=True)
-            return Response(serializer.data)
+            return _program_listing_response(request, programs)
 
         # Get user's fitness goals for sorting
         user_goals = user_profile.fitness_goals.values_list("goal_type", flat=True)
         matching_categories = _get_matching_categories(user_goals)
 
         # normal users and members see public programs filtered by level
-        user_level = user_profile.get_current_level()
+        level_rank = user_profile.level_rank
 
         level_filters = models.Q(level_access="all")
-        if user_level.level_rank >= 1:
+        if level_rank >= 1:
             level_filters |= models.Q(level_access="bronze")
-        if user_level.level_rank >= 2:
+        if level_rank >= 2:
             level_filters |= models.Q(level_access="silver")
-        if user_level.level_rank >= 3:
+        if level_rank >= 3:
             level_filters |= models.Q(level_access="gold")
 
         if user_profile.role == "member":
@@ -95,13 +124,71 @@ def workout_programs(request):
                     default=Value(1),
                     output_field=IntegerField(),
                 )
-            ).order_by("goal_match", "-created_at")
+            )
+            ordering = ("goal_match", "-created_at", "id")
         else:
             # No goals, sort by newest
-            programs = programs.order_by("-created_at")
+            ordering = ("-created_at", "id")
+
+        return _program_listing_response(request, programs, ordering)
+
+
+PROGRAM_FILTER_FIELDS = ["category", "difficulty_level", "level_access"]
+
 
-        serializer = WorkoutProgramSerializer(programs, many=True)
-        return Response(serializer.data)
+def _filter_programs(programs, params):
+    """Apply the catalogue filters from the query string."""
+    for field in PROGRAM_FILTER_FIELDS:
+        values = [v for v in params.get(field, "").split(",") if v]
+        if values:
+            programs = programs.filter(**{f"{field}__in": values})
+
+    for param, lookup in [("duration_min", "gte"), ("duration_max", "lte")]:
+        value = params.get(param)
+        if value:
+            try:
+                programs = programs.filter(**{f"duration__{lookup}": int(value)})
+            except ValueError:
+                pass
+
+    return programs
+
+
+def _program_listing_response(request, programs, ordering=None):
+    """Filter, optionally paginate and serialize a program listing."""
+    programs = _filter_programs(programs, request.query_params)
+
+    summary = request.query_params.get("view") == "summary"
+    serializer_class = (
+        WorkoutProgramSummarySerializer if summary else WorkoutProgramSerializer
+    )
+    programs = _with_listing_relations(programs, include_days=not summary)
+
+    if KeysetPaginator.is_requested(request):
+        paginator = KeysetPaginator(ordering or ("-created_at", "id"))
+        page, next_cursor = paginator.paginate(programs, request)
+        serializer = serializer_class(page, many=True)
+        return paginator.get_paginated_response(serializer.data, next_cursor)
+
+    if ordering:
+        programs = programs.order_by(*ordering)
+    serializer = serializer_class(programs, many=True)
+    return Response(serializer.data)
+
+
+def _with_listing_relations(programs, include_days=True):
+    """
+    Load everything WorkoutProgramSerializer touches in a fixed number of queries:
+    coach users are joined, days are prefetched and the assigned member code is
+    annotated instead of being looked up per program.
+    """
+    assignments = WorkoutAssignment.objects.filter(program=OuterRef("pk"))
+    programs = programs.select_related("coach__user").annotate(
+        assigned_member_code=Subquery(assignments.values("member__member_id")[:1])
+    )
+    if include_days:
+        programs = programs.prefetch_related("days")
+    return programs
 
 
 def _get_matching_categories(user_goals):
@@ -193,7 +280,9 @@ def update_workout_program(request, id):
 
             if days_data is not None:
                 # Delete existing days
-                WorkoutDay.objects.filter(program=updated_program).delete()
+                days = WorkoutDay.objects.filter(program=updated_program)
+                with removing_completions(days):
+                    days.delete()
 
                 # Create new days
                 for day_data in days_data:
@@ -244,89 +333,7 @@ def user_analytics(request):
     profile = request.user.userprofile
     today = timezone.localdate()
 
-    # Get base queryset
-    completions = WorkoutDayCompletion.objects.filter(user_profile=profile)
-
-    # Calculate all metrics
-    weekly_stats = _calculate_weekly_improvement(completions, today)
-    consistency_stats = _calculate_consistency(completions, today)
-    xp_stats = _calculate_xp_last_30_days(completions, today)
-    streak = _calculate_current_streak(completions, today)
-
-    return Response(
-        {
-            "analytics": {
-                "weeklyImprovement": weekly_stats["improvement"],
-                "consistency": consistency_stats["percentage"],
-                "xp_last_30_days": xp_stats["total"],
-                "completed_this_week": weekly_stats["this_week"],
-                "completed_prev_week": weekly_stats["prev_week"],
-                "current_streak": streak,
-            }
-        }
-    )
-
-
-def _calculate_weekly_improvement(completions, today):
-    """Calculate weekly workout improvement percentage."""
-    week_start = today - timedelta(days=6)
-    prev_week_start = week_start - timedelta(days=7)
-    prev_week_end = week_start - timedelta(days=1)
-
-    this_week = completions.filter(completed_at__date__gte=week_start).count()
-    prev_week = completions.filter(
-        completed_at__date__range=(prev_week_start, prev_week_end)
-    ).count()
-
-    if prev_week == 0:
-        improvement = 100 if this_week > 0 else 0
-    else:
-        improvement = round(((this_week - prev_week) / prev_week) * 100, 1)
-
-    return {
-        "this_week": this_week,
-        "prev_week": prev_week,
-        "improvement": improvement,
-    }
-
-
-def _calculate_consistency(completions, today):
-    """Calculate workout consistency over last 30 days."""
-    month_start = today - timedelta(days=29)
-    days_with_activity = (
-        completions.filter(completed_at__date__gte=month_start)
-        .values("completed_at__date")
-        .distinct()
-        .count()
-    )
-
-    percentage = round((days_with_activity / 30) * 100, 1)
-    return {"percentage": percentage, "active_days": days_with_activity}
-
-
-def _calculate_xp_last_30_days(completions, today):
-    """Calculate total XP earned in last 30 days."""
-    month_start = today - timedelta(days=29)
-    total = (
-        completions.filter(completed_at__date__gte=month_start).aggregate(
-            total=Sum("xp_earned")
-        )["total"]
-        or 0
-    )
-    return {"total": total}
-
-
-def _calculate_current_streak(completions, today):
-    """Calculate consecutive days streak up to today."""
-    completion_dates = set(completions.values_list("completed_at__date", flat=True))
-
-    streak = 0
-    current_day = today
-    while current_day in completion_dates:
-        streak += 1
-        current_day -= timedelta(days=1)
-
-    return streak
+    return Response({"analytics": build_user_analytics(profile, today)})
 
 
 # ========== ANALYTICS ==========
@@ -336,29 +343,39 @@ def _calculate_current_streak(completions, today):
 @permission_classes([IsAuthenticated])
 def user_weekly_activity(request):
     """
-    Return last 7 days of activity for the authenticated user.
+    Return recent activity for the authenticated user (last 7 days by default).
+    Query params: days (7, 30, 90 or 365) and bucket (day, week or month).
     Response: [{ label, date, count, height, isActive }, ...]
     height is a normalized integer 20-100 for frontend bar rendering.
     """
     user_profile = request.user.userprofile
     today = timezone.localdate()
-    counts = []
 
-    # collect counts per day (oldest -> newest)
-    for days_ago in range(6, -1, -1):
-        d = today - timedelta(days=days_ago)
-        cnt = WorkoutDayCompletion.objects.filter(
-            user_profile=user_profile, completed_at__date=d
-        ).count()
-        counts.append({"date": d, "count": cnt})
+    try:
+        days = int(request.query_params.get("days", 7))
+    except ValueError:
+        days = None
+    bucket = request.query_params.get("bucket", "day")
+
+    if days not in ACTIVITY_WINDOWS:
+        return Response(
+            {"error": f"days must be one of {', '.join(map(str, ACTIVITY_WINDOWS))}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if bucket not in ACTIVITY_BUCKETS:
+        return Response(
+            {"error": f"bucket must be one of {', '.join(ACTIVITY_BUCKETS)}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # counts per bucket (oldest -> newest)
+    counts = activity_buckets(user_profile, today, days=days, bucket=bucket)
 
     # compute normalization (avoid zero division)
-    max_count = max(item["count"] for item in counts) or 0
+    max_count = max(cnt for _, cnt in counts) or 0
 
     result = []
-    for item in counts:
-        d = item["date"]
-        cnt = item["count"]
+    for d, cnt in counts:
         # normalize height to 20..100 so very small values are visible
         if max_count > 0:
             height = int(20 + (cnt / max_count) * 80)
@@ -366,7 +383,7 @@ def user_weekly_activity(request):
             height = 20 if cnt == 0 else 100
         result.append(
             {
-                "label": d.strftime("%a")[0],  # 'M','T','W','T','F','S','S'
+                "label": _activity_label(d, bucket),
                 "date": d.isoformat(),
                 "count": cnt,
                 "height": height,  # for bar height in UI
@@ -377,6 +394,14 @@ def user_weekly_activity(request):
     return Response(result)
 
 
+def _activity_label(d, bucket):
+    if bucket == "week":
+        return d.strftime("%b %d")  # week starting 'Oct 13'
+    if bucket == "month":
+        return d.strftime("%b")  # 'Jan', 'Feb', ...
+    return d.strftime("%a")[0]  # 'M','T','W','T','F','S','S'
+
+
 # ========== WORKOUT DAY COMPLETION VIEWS ==========
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
@@ -403,94 +428,58 @@ def check_workout_day_completion(request, id):
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def complete_workout_day(request, id):
-    """Mark all workouts in a day_number as completed and award XP."""
+    """
+    Mark all workouts in a day_number as completed and award XP.
+
+    Runs in one transaction holding a lock on the user's level row, so
+    concurrent requests for the same user cannot award the same day twice.
+    """
     profile = request.user.userprofile
-    target_day = get_object_or_404(WorkoutDay, pk=id)
+    target_day = get_object_or_404(WorkoutDay.objects.select_related("program"), pk=id)
     program = target_day.program
 
-    # Get all workouts for this day_number in the program
-    same_day_workouts = WorkoutDay.objects.filter(
-        program=program, day_number=target_day.day_number
-    )
-
-    total_xp = 0
-    level = profile.get_current_level()
-    workouts_completed_now = 0
-
-    # Complete all workouts in this day
-    for workout in same_day_workouts:
-        # Skip if already completed
-        if WorkoutDayCompletion.objects.filter(
-            user_profile=profile, workout_day=workout
-        ).exists():
-            continue
-
-        # Calculate and award XP
-        xp_earned = calculate_xp(
-            duration=workout.duration or 30, difficulty_level=program.difficulty_level
+    with transaction.atomic():
+        level = UserLevel.objects.select_for_update().get(
+            pk=profile.get_current_level().pk
         )
 
-        WorkoutDayCompletion.objects.create(
-            user_profile=profile, workout_day=workout, xp_earned=xp_earned
+        # Get all workouts for this day_number in the program
+        same_day_workouts = list(
+            WorkoutDay.objects.filter(program=program, day_number=target_day.day_number)
         )
-        total_xp += xp_earned
-        workouts_completed_now += 1
-
-    # Award total XP for the day
-    if total_xp > 0:
-        level.add_xp(total_xp)
-
-    # Check program completion bonus
-    bonus_xp = 0
-    leveled_up = False
-
-    # Only check for bonus if we actually completed new workouts
-    if workouts_completed_now > 0:
-        # Check if ALL day_numbers in program are completed by this user
-        total_day_numbers = program.days.values("day_number").distinct().count()
-        completed_day_numbers = (
+        already_completed = set(
             WorkoutDayCompletion.objects.filter(
-                user_profile=profile, workout_day__program=program
-            )
-            .values("workout_day__day_number")
-            .distinct()
-            .count()
+                user_profile=profile, workout_day__in=same_day_workouts
+            ).values_list("workout_day_id", flat=True)
         )
 
-        program_just_completed = completed_day_numbers >= total_day_numbers
-
-        if profile.role == "member":
-            member_obj = getattr(profile, "member_profile", None)
-            if member_obj:
-                assignment = WorkoutAssignment.objects.filter(
-                    member=member_obj, program=program
-                ).first()
-
-                if assignment:
-                    was_completed = assignment.status == "completed"
-                    is_complete = assignment.check_completion()
-
-                    # Award bonus only on first completion
-                    if is_complete and not was_completed:
-                        bonus_xp = COMPLETION_BONUS
-                        leveled_up, prev_rank, new_rank = level.add_xp(bonus_xp)
-
-                else:  # completion workout program not assignment
-                    if program_just_completed:
-                        bonus_xp = COMPLETION_BONUS
-                        leveled_up, prev_rank, new_rank = level.add_xp(bonus_xp)
+        new_completions = [
+            WorkoutDayCompletion(
+                user_profile=profile,
+                workout_day=workout,
+                xp_earned=calculate_xp(
+                    duration=workout.duration or 30,
+                    difficulty_level=program.difficulty_level,
+                ),
+            )
+            for workout in same_day_workouts
+            if workout.id not in already_completed
+        ]
+        WorkoutDayCompletion.objects.bulk_create(new_completions, ignore_conflicts=True)
+        # bulk_create skips the model signals that maintain the rollups
+        record_completions(new_completions)
 
-        elif profile.role == "normal":
-            if program_just_completed:
-                # Check if we already awarded bonus for this program by
-                # checking if completion count matches total days
-                already_awarded = getattr(profile, f"bonus_program_{program.id}", False)
+        total_xp = sum(c.xp_earned for c in new_completions)
+        awards = [
+            ("workout_day", c.workout_day_id, c.xp_earned) for c in new_completions
+        ]
 
-                if not already_awarded:
-                    bonus_xp = COMPLETION_BONUS
-                    leveled_up, prev_rank, new_rank = level.add_xp(bonus_xp)
+        # Only check for bonus if we actually completed new workouts
+        if new_completions:
+            bonus_xp = _program_completion_bonus(profile, program)
+            awards.append(("program_completion", program.id, bonus_xp))
 
-    level.refresh_from_db()
+        leveled_up, _, _ = level.award_xp(awards)
 
     return Response(
         {
@@ -504,6 +493,32 @@ def complete_workout_day(request, id):
     )
 
 
+def _program_completion_bonus(profile, program):
+    """
+    Return the program completion bonus if this completion finished the
+    program for the first time. Uses the incrementally maintained
+    WorkoutProgramProgress counter.
+    """
+    progress = WorkoutProgramProgress.objects.filter(
+        user_profile=profile, program=program
+    ).first()
+    total_day_numbers = program.days.values("day_number").distinct().count()
+
+    if not progress or progress.completed_days < total_day_numbers:
+        return 0
+    if profile.role not in ["member", "normal"] or progress.bonus_awarded:
+        return 0
+
+    if profile.role == "member" and not getattr(profile, "member_profile", None):
+        return 0
+
+    # record_completions has already moved the member's assignment to
+    # "completed"; bonus_awarded is what keeps the bonus one-off
+    progress.bonus_awarded = True
+    progress.save(update_fields=["bonus_awarded"])
+    return COMPLETION_BONUS
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def workout_progress(request, id):
@@ -542,6 +557,7 @@ def list_my_assignments(request):
     """
     - Coach sees all their assigned programs
     - Member sees only their own assigned programs
+    Optional ?status=overdue,in_progress filters on the stored status.
     """
     profile = request.user.userprofile
 
@@ -555,7 +571,8 @@ def list_my_assignments(request):
                     When(status="in_progress", then=1),
                     When(status="assigned", then=2),
                     When(status="paused", then=3),
-                    When(status="completed", then=4),
+                    When(status="overdue", then=4),
+                    When(status="completed", then=5),
                     default=99,
                 )
             )
@@ -568,6 +585,15 @@ def list_my_assignments(request):
     else:
         assignments = WorkoutAssignment.objects.none()
 
+    statuses = [v for v in request.query_params.get("status", "").split(",") if v]
+    if statuses:
+        assignments = assignments.filter(status__in=statuses)
+
+    assignments = assignments.select_related("member__user__user").prefetch_related(
+        Prefetch(
+            "program", queryset=_with_listing_relations(WorkoutProgram.objects.all())
+        )
+    )
     serializer = WorkoutAssignmentSerializer(assignments, many=True)
     return Response(serializer.data)
 
@@ -818,7 +844,7 @@ def update_workout_assignment(request, id):
 
         # Award XP
         level = profile.get_current_level()
-        level.add_xp(xp)
+        level.add_xp(xp, source_type="assignment", source_id=assignment.id)
 
         return Response(
             {
@@ -0,0 +1,204 @@
+"""
+Recomputation of stored XP after the rules in workout.xp_rules change.
+
+Completions are streamed in primary-key order through a server-side cursor
+and rewritten one chunk at a time. Every chunk commits on its own (the
+completions, the UserDailyActivity xp, the XP ledger and the level totals
+together), so an interrupted run resumes from the last completion id it
+reported.
+"""
+
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from users.models import UserLevel, UserProfile, XPEvent
+
+from .models import WorkoutAssignment, WorkoutDayCompletion
+from .rollups import apply_activity_delta
+from .xp_rules import (
+    COMPLETION_BONUS,
+    calculate_xp,
+    calculate_xp_many,
+    level_case_expressions,
+)
+
+RECOMPUTE_CHUNK_SIZE = 2000
+
+
+@dataclass
+class RecomputeResult:
+    scanned: int = 0
+    changed: int = 0
+    xp_delta: int = 0
+    last_id: int = None
+    # (source, id, old xp, new xp) for the changed rows
+    diffs: list = field(default_factory=list)
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _apply_level_deltas(deltas):
+    """Add {user_profile_id: xp delta} to the levels and their profile copies."""
+    by_delta = {}
+    for user_profile_id, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(user_profile_id)
+
+    for delta, user_profile_ids in by_delta.items():
+        xp = F("xp") + delta
+        rank, name = level_case_expressions(xp)
+        UserLevel.objects.filter(user_profile_id__in=user_profile_ids).update(
+            xp=xp, level_rank=rank, level=name
+        )
+        UserProfile.objects.filter(pk__in=user_profile_ids).update(
+            xp=xp, level_rank=rank, level=name
+        )
+
+
+def _rewrite_ledger(source_type, new_amounts):
+    """
+    Set the amount of the `source_type` events keyed by (user_profile_id,
+    source_id) in `new_amounts`. Awards made before the ledger existed are
+    part of an opening balance, so their difference is booked as an
+    adjustment event instead. Returns {user_profile_id: xp delta}.
+    """
+    events = XPEvent.objects.filter(
+        source_type=source_type,
+        user_profile_id__in={user for user, _ in new_amounts},
+        source_id__in={source_id for _, source_id in new_amounts},
+    )
+    by_key = {(e.user_profile_id, e.source_id): e for e in events}
+
+    deltas = {}
+    changed_events = []
+    adjustments = {}
+    for key, (old, new) in new_amounts.items():
+        user_profile_id = key[0]
+        deltas[user_profile_id] = deltas.get(user_profile_id, 0) + new - old
+        event = by_key.get(key)
+        if event is None:
+            adjustments[user_profile_id] = (
+                adjustments.get(user_profile_id, 0) + new - old
+            )
+        elif event.amount != new:
+            event.amount = new
+            changed_events.append(event)
+
+    XPEvent.objects.bulk_update(changed_events, ["amount"])
+    XPEvent.objects.bulk_create(
+        XPEvent(user_profile_id=user, source_type="adjustment", amount=amount)
+        for user, amount in adjustments.items()
+        if amount
+    )
+    return deltas
+
+
+def _apply_completion_changes(changed):
+    """Write one chunk of recomputed completions and everything derived."""
+    activity = {}
+    new_amounts = {}
+    for (_, user, workout_day_id, completed_at, old), new in changed:
+        key = (user, timezone.localdate(completed_at))
+        activity[key] = activity.get(key, 0) + new - old
+        new_amounts[(user, workout_day_id)] = (old, new)
+
+    with transaction.atomic():
+        WorkoutDayCompletion.objects.bulk_update(
+            [WorkoutDayCompletion(pk=row[0], xp_earned=new) for row, new in changed],
+            ["xp_earned"],
+        )
+        for (user, day), delta in activity.items():
+            apply_activity_delta(user, day, 0, delta, 0)
+        _apply_level_deltas(_rewrite_ledger("workout_day", new_amounts))
+
+
+def recompute_completions(after_id=0, chunk_size=RECOMPUTE_CHUNK_SIZE, dry_run=False):
+    """
+    Recompute WorkoutDayCompletion.xp_earned for completions with a primary
+    key above `after_id`, yielding a RecomputeResult per chunk.
+    """
+    rows = (
+        WorkoutDayCompletion.objects.filter(pk__gt=after_id)
+        .order_by("pk")
+        .values_list(
+            "pk",
+            "user_profile_id",
+            "workout_day_id",
+            "completed_at",
+            "xp_earned",
+            "workout_day__duration",
+            "workout_day__program__difficulty_level",
+        )
+    )
+    for chunk in _chunks(rows.iterator(chunk_size=chunk_size), chunk_size):
+        new_xp = calculate_xp_many(
+            [row[5] or 30 for row in chunk], [row[6] for row in chunk]
+        )
+        changed = [(row[:5], new) for row, new in zip(chunk, new_xp) if new != row[4]]
+        if changed and not dry_run:
+            _apply_completion_changes(changed)
+
+        yield RecomputeResult(
+            scanned=len(chunk),
+            changed=len(changed),
+            xp_delta=sum(new - row[4] for row, new in changed),
+            last_id=chunk[-1][0],
+            diffs=[("completion", row[0], row[4], new) for row, new in changed],
+        )
+
+
+def recompute_awards(dry_run=False):
+    """
+    Recompute the program completion bonuses and assignment XP recorded in
+    the ledger. Returns a RecomputeResult.
+    """
+    events = XPEvent.objects.filter(
+        source_type__in=["program_completion", "assignment"]
+    ).values_list("source_type", "user_profile_id", "source_id", "amount")
+    programs = {
+        pk: (duration, difficulty)
+        for pk, duration, difficulty in WorkoutAssignment.objects.filter(
+            pk__in=events.filter(source_type="assignment").values("source_id")
+        ).values_list("pk", "program__duration", "program__difficulty_level")
+    }
+
+    result = RecomputeResult()
+    changes = {"program_completion": {}, "assignment": {}}
+    for source_type, user, source_id, old in events:
+        result.scanned += 1
+        if source_type == "program_completion":
+            new = COMPLETION_BONUS
+        elif source_id in programs:
+            duration, difficulty = programs[source_id]
+            new = calculate_xp(duration=duration, difficulty_level=difficulty)
+        else:
+            continue  # the assignment was deleted
+        if new != old:
+            changes[source_type][(user, source_id)] = (old, new)
+            result.changed += 1
+            result.xp_delta += new - old
+            result.diffs.append((source_type, source_id, old, new))
+
+    if result.changed and not dry_run:
+        with transaction.atomic():
+            deltas = {}
+            for source_type, new_amounts in changes.items():
+                if new_amounts:
+                    for user, delta in _rewrite_ledger(
+                        source_type, new_amounts
+                    ).items():
+                        deltas[user] = deltas.get(user, 0) + delta
+            _apply_level_deltas(deltas)
+    return result
@@ -3,8 +3,12 @@ XP rules and level thresholds.
 Defines how many XP points are needed for each level and any special rules.
 """
 
+from bisect import bisect_right
+from functools import lru_cache
+
 # LEVELS = list of (rank, name, xp_threshold)
 # threshold = minimum xp required to reach that level.
+# Override with settings.HEALTHQUEST_LEVELS; see get_level_table.
 LEVELS = [
     (1, "Bronze", 0),
     (2, "Silver", 1000),
@@ -47,31 +51,129 @@ def calculate_xp(
     return max(0, int(xp))
 
 
+def calculate_xp_many(durations, difficulty_levels):
+    """
+    calculate_xp over parallel sequences of durations and difficulty levels,
+    for recomputing many stored awards at once. Returns a list.
+    """
+    return [
+        calculate_xp(duration=duration, difficulty_level=difficulty_level)
+        for duration, difficulty_level in zip(durations, difficulty_levels)
+    ]
+
+
+class LevelTable:
+    """
+    A level table compiled into threshold-sorted arrays, so looking up the
+    level for an xp value is a bisection however many tiers there are.
+    """
+
+    def __init__(self, levels):
+        levels = sorted(levels, key=lambda level: level[2])
+        if not levels:
+            raise ValueError("A level table needs at least one level.")
+        thresholds = [threshold for _, _, threshold in levels]
+        if len(set(thresholds)) != len(thresholds):
+            raise ValueError("Level thresholds must be unique.")
+        self.ranks = tuple(rank for rank, _, _ in levels)
+        self.names = tuple(name for _, name, _ in levels)
+        self.thresholds = tuple(thresholds)
+
+    def __len__(self):
+        return len(self.thresholds)
+
+    def index_for_xp(self, xp):
+        # xp below the lowest threshold still counts as the lowest level
+        return max(0, bisect_right(self.thresholds, xp) - 1)
+
+    def level_for_xp(self, xp):
+        """Return (level_rank, level_name, xp_required_for_next_level)."""
+        xp = int(max(0, xp))
+        i = self.index_for_xp(xp)
+        if i + 1 < len(self):
+            xp_needed = self.thresholds[i + 1] - xp
+        else:
+            xp_needed = None
+        return self.ranks[i], self.names[i], xp_needed
+
+    def progress(self, xp):
+        """Describe where `xp` sits between the current and the next level."""
+        xp = int(max(0, xp))
+        i = self.index_for_xp(xp)
+        current = self.thresholds[i]
+        top = i + 1 == len(self)
+        next_threshold = None if top else self.thresholds[i + 1]
+        return {
+            "level": self.names[i],
+            "level_rank": self.ranks[i],
+            "xp": xp,
+            "level_xp": current,
+            "next_level": None if top else self.names[i + 1],
+            "next_xp": next_threshold,
+            "xp_to_next": None if top else next_threshold - xp,
+            "progress": (
+                1.0 if top else round((xp - current) / (next_threshold - current), 4)
+            ),
+        }
+
+    def case_expressions(self, xp_expression):
+        """
+        Build SQL CASE expressions mapping `xp_expression` to (level_rank,
+        level), so levels can be recomputed inside an UPDATE.
+        """
+        from django.db.models import Case, CharField, IntegerField, Value, When
+        from django.db.models.lookups import GreaterThanOrEqual
+
+        tiers = list(zip(self.ranks, self.names, self.thresholds))[::-1]
+        rank = Case(
+            *[
+                When(GreaterThanOrEqual(xp_expression, threshold), then=Value(r))
+                for r, _, threshold in tiers
+            ],
+            default=Value(self.ranks[0]),
+            output_field=IntegerField(),
+        )
+        name = Case(
+            *[
+                When(GreaterThanOrEqual(xp_expression, threshold), then=Value(n))
+                for _, n, threshold in tiers
+            ],
+            default=Value(self.names[0]),
+            output_field=CharField(),
+        )
+        return rank, name
+
+
+@lru_cache(maxsize=None)
+def get_level_table():
+    """
+    The compiled level table: settings.HEALTHQUEST_LEVELS when configured,
+    LEVELS otherwise. Loaded once per process.
+    """
+    from django.conf import settings
+
+    levels = LEVELS
+    if settings.configured:
+        levels = getattr(settings, "HEALTHQUEST_LEVELS", None) or LEVELS
+    return LevelTable(levels)
+
+
 def level_for_xp(xp: int):
     """
     Given XP, return a tuple: (level_rank, level_name, xp_required_for_next_level).
     xp_required_for_next_level is None if already at top level.
     """
-    xp = int(max(0, xp))
-    current_level = LEVELS[0]
-    next_level = None
-
-    for i, (rank, name, threshold) in enumerate(LEVELS):
-        if xp >= threshold:
-            current_level = (rank, name, threshold)
-            if i + 1 < len(LEVELS):
-                next_level = LEVELS[i + 1]
-            else:
-                next_level = None
-        else:
-            # xp below this threshold -> previous current_level is correct
-            break
+    return get_level_table().level_for_xp(xp)
 
-    rank, name, threshold = current_level
 
-    if next_level:
-        xp_needed = max(0, next_level[2] - xp)
-    else:
-        xp_needed = None
+def level_progress(xp: int):
+    """Progress towards the next level, see LevelTable.progress."""
+    return get_level_table().progress(xp)
 
-    return rank, name, xp_needed
+
+def level_case_expressions(xp_expression):
+    """
+    Build SQL CASE expressions mapping `xp_expression` to (level_rank, level)
+    so a level can be recomputed inside the same UPDATE that changes xp.
+    """
+    return get_level_table().case_expressions(xp_expression)